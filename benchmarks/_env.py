@@ -0,0 +1,71 @@
+"""Shared bootstrap for the benchmark scripts.
+
+kackle reads config.yaml from the working directory at import time, so every
+benchmark runs from a scratch directory holding a throwaway config before
+importing anything from the package.
+"""
+import os
+import sys
+import atexit
+import shutil
+import tempfile
+from pathlib import Path
+
+import yaml
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SAMPLE_ARTICLES = REPO_ROOT / 'assets' / 'articles'
+
+
+def bootstrap(overrides: dict = None) -> Path:
+    """Write a scratch config.yaml, chdir into it and make kackle importable.
+
+    The scratch directory is removed when the process exits.
+    """
+    workdir = Path(tempfile.mkdtemp(prefix='kackle-bench-'))
+    atexit.register(shutil.rmtree, workdir, ignore_errors=True)
+    config = {
+        'folders': {
+            'articles': str(workdir / 'articles'),
+            'images': str(workdir / 'images'),
+            'prompts': str(REPO_ROOT / 'prompts'),
+        },
+        'openai': {
+            'api_key': 'bench',
+            'orginization_id': 'bench',
+            'llm-model': 'bench-model',
+        },
+        'replicate': {
+            'api_key': 'bench',
+            'image-model': 'bench/flux',
+            'width': 512,
+            'height': 512,
+        },
+        'img_src': 'flux',
+    }
+    for key, value in (overrides or {}).items():
+        if isinstance(value, dict) and isinstance(config.get(key), dict):
+            config[key].update(value)
+        else:
+            config[key] = value
+
+    with open(workdir / 'config.yaml', 'w') as f:
+        yaml.safe_dump(config, f)
+    os.chdir(workdir)
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    return workdir
+
+
+def load_corpus(folder: Path = SAMPLE_ARTICLES) -> list:
+    """Return the body of every article below folder, inline or in content.md"""
+    bodies = []
+    for article_file in sorted(Path(folder).glob('*/article.yaml')):
+        with open(article_file) as f:
+            data = yaml.safe_load(f) or {}
+        body_file = article_file.parent / 'content.md'
+        if not data.get('content') and body_file.exists():
+            data['content'] = body_file.read_text(encoding='utf-8')
+        if data.get('content'):
+            bodies.append(data['content'])
+    return bodies
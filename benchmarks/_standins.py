@@ -0,0 +1,365 @@
+"""Local stand-ins for the OpenAI, Replicate and WordPress HTTP APIs.
+
+The server runs in a child process so its sleeps and JSON encoding do not
+compete with the pipeline for the GIL. Every response waits for a latency
+drawn from a log-normal distribution around the configured median, and a
+configurable share of requests fail with a 500. WordPress GETs carry an ETag
+and answer If-None-Match with a 304. GET /_stats returns request counts per
+service.
+"""
+import io
+import re
+import hashlib
+import json
+import math
+import time
+import random
+import base64
+import threading
+import multiprocessing
+from collections import Counter
+from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = [
+    'adaptive', 'edge', 'cache', 'observability', 'pipeline', 'zero-trust', 'mesh', 'vector',
+    'kernel', 'runtime', 'compliance', 'latency', 'serverless', 'telemetry', 'gateway',
+    'sharding', 'replication', 'firmware', 'supply-chain', 'identity', 'backup', 'streaming',
+    'compiler', 'scheduler', 'container', 'network', 'storage', 'database', 'encryption', 'audit'
+]
+TOPIC_PATTERN = re.compile(r'Generate (\d+) .* for (\d{4}-\d{2}-\d{2})')
+
+
+class Latency:
+    """Log-normal latency with the given median (seconds) and sigma"""
+
+    def __init__(self, median: float, sigma: float):
+        self.median = median
+        self.sigma = sigma
+
+    def sample(self) -> float:
+        if self.median <= 0:
+            return 0.0
+        return random.lognormvariate(math.log(self.median), self.sigma)
+
+
+def _png(width: int, height: int) -> str:
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (40, 90, 160)).save(buffer, 'PNG')
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+
+class StandinState:
+    """Counters, WordPress objects and canned content shared by request threads"""
+
+    def __init__(self, settings: dict):
+        self.latency = {service: Latency(settings[f'{service}_latency'], settings['jitter'])
+                        for service in ('openai', 'replicate', 'wordpress')}
+        self.error_rate = settings['error_rate']
+        self.bodies = settings['bodies'] or ["### Overview\n\nStand-in article body."]
+        self.image = _png(settings['width'], settings['height'])
+        self.counts = Counter()
+        self.lock = threading.Lock()
+        self.next_id = 100
+        self.topic_counter = 0
+        self.terms = {'tags': {}, 'categories': {}}
+        self.posts = {}
+        self.media = {}
+
+    def new_id(self) -> int:
+        with self.lock:
+            self.next_id += 1
+            return self.next_id
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.counts[key] += 1
+
+    # Canned content ------------------------------------------------------
+
+    def topics(self, count: int, date: str) -> list:
+        topics = []
+        for _ in range(count):
+            with self.lock:
+                self.topic_counter += 1
+                number = self.topic_counter
+            words = random.sample(WORDS, 3)
+            topics.append({
+                'topic': f"{' '.join(words).title()} {number:05d}",
+                'description': f"How teams apply {words[0]} {words[1]} to {words[2]}.",
+                'tags': words,
+                'date': date,
+                'company': '',
+                'key_details': ''
+            })
+        return topics
+
+    def completion(self, body: dict) -> str:
+        messages = body.get('messages', [])
+        system = next((m['content'] for m in messages if m['role'] == 'system'), '')
+        user = next((m['content'] for m in messages if m['role'] == 'user'), '')
+        structured = bool(body.get('response_format'))
+
+        match = TOPIC_PATTERN.search(user)
+        if match:
+            topics = self.topics(int(match.group(1)), match.group(2))
+            return json.dumps({'items': topics} if structured else topics)
+        if user.startswith('Outline a blog post'):
+            sections = [{'heading': f"Part {index}", 'summary': f"Summary of part {index}."}
+                        for index in range(1, 5)]
+            return json.dumps({'items': sections} if structured else sections)
+        if 'Write the section:' in user:
+            return random.choice(self.bodies)[:1500]
+        if user.startswith('topic: '):
+            return f"Wide-angle technical illustration of {user[len('topic: '):]}, icons, blueprint style."
+        if 'image_prompt' in system:
+            return json.dumps({'image_prompt': "Wide-angle technical illustration, icons, blueprint style.",
+                               'content': random.choice(self.bodies)})
+        return random.choice(self.bodies)
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    state: StandinState = None
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _send(self, status: int, payload, headers: dict = None) -> None:
+        data = json.dumps(payload).encode()
+        if self.command == 'GET' and status == 200 and self.path.startswith('/wp-json/'):
+            etag = f'"{hashlib.sha1(data).hexdigest()}"'
+            headers = dict(headers or {}, ETag=etag)
+            if self.headers.get('If-None-Match') == etag:
+                self.state.count('wordpress.not_modified')
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _fail(self, service: str) -> bool:
+        if random.random() < self.state.error_rate:
+            self.state.count(f"{service}.errors")
+            self._send(500, {'error': {'message': 'injected failure', 'type': 'server_error'}})
+            return True
+        return False
+
+    def do_GET(self):
+        self._route('GET', b'')
+
+    def do_POST(self):
+        self._route('POST', self._body())
+
+    def do_PUT(self):
+        self._route('PUT', self._body())
+
+    def do_DELETE(self):
+        self._route('DELETE', b'')
+
+    def _route(self, method: str, raw: bytes) -> None:
+        path = self.path.split('?', 1)[0]
+        if path == '/_stats':
+            with self.state.lock:
+                return self._send(200, dict(self.state.counts))
+
+        if path.startswith('/v1/chat/completions') or path.startswith('/v1/embeddings'):
+            service = 'openai'
+        elif path.startswith('/v1/models/') or path.startswith('/v1/predictions'):
+            service = 'replicate'
+        elif path.startswith('/wp-json/wp/v2/'):
+            service = 'wordpress'
+        else:
+            return self._send(404, {'message': f'No stand-in for {path}'})
+
+        self.state.count(service)
+        self.state.count(f"{service} {method} {re.sub(r'/[0-9]+', '/{id}', path)}")
+        if self._fail(service):
+            return
+        delay = self.state.latency[service].sample()
+        body = json.loads(raw) if raw and self.headers.get('Content-Type', '').startswith('application/json') else {}
+
+        if path.startswith('/v1/chat/completions'):
+            return self._chat(body, delay)
+        time.sleep(delay)
+        if path.startswith('/v1/embeddings'):
+            return self._embeddings(body)
+        if service == 'replicate':
+            return self._prediction(body)
+        return self._wordpress(method, path[len('/wp-json/wp/v2/'):], body)
+
+    # OpenAI --------------------------------------------------------------
+
+    def _chat(self, body: dict, delay: float) -> None:
+        content = self.state.completion(body)
+        prompt_tokens = sum(len(m.get('content', '')) for m in body.get('messages', [])) // 4
+        usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': len(content) // 4,
+                 'total_tokens': prompt_tokens + len(content) // 4}
+        base = {'id': f"chatcmpl-{self.state.new_id()}", 'created': int(time.time()),
+                'model': body.get('model', 'standin')}
+
+        if not body.get('stream'):
+            time.sleep(delay)
+            return self._send(200, dict(base, object='chat.completion', usage=usage, choices=[{
+                'index': 0, 'finish_reason': 'stop',
+                'message': {'role': 'assistant', 'content': content}
+            }]))
+
+        # First token after a fifth of the latency, the rest spread over the remainder
+        time.sleep(delay * 0.2)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        pieces = [content[i:i + 40] for i in range(0, len(content), 40)] or ['']
+        gap = delay * 0.8 / len(pieces)
+        try:
+            for piece in pieces:
+                self._event(dict(base, object='chat.completion.chunk', choices=[{
+                    'index': 0, 'delta': {'content': piece}, 'finish_reason': None
+                }]))
+                time.sleep(gap)
+            self._event(dict(base, object='chat.completion.chunk', choices=[], usage=usage))
+            self._chunk(b"data: [DONE]\n\n")
+            self._chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client closed the stream early, as aborted validations do
+            self.close_connection = True
+
+    def _chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _event(self, payload: dict) -> None:
+        self._chunk(f"data: {json.dumps(payload)}\n\n".encode())
+
+    def _embeddings(self, body: dict) -> None:
+        texts = body.get('input', [])
+        texts = [texts] if isinstance(texts, str) else texts
+        data = []
+        for index, text in enumerate(texts):
+            rng = random.Random(text)
+            data.append({'object': 'embedding', 'index': index,
+                         'embedding': [rng.uniform(-1, 1) for _ in range(64)]})
+        tokens = sum(len(text) for text in texts) // 4
+        self._send(200, {'object': 'list', 'data': data, 'model': body.get('model', 'standin'),
+                         'usage': {'prompt_tokens': tokens, 'total_tokens': tokens}})
+
+    # Replicate -----------------------------------------------------------
+
+    def _prediction(self, body: dict) -> None:
+        prediction_id = f"p{self.state.new_id()}"
+        now = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        self._send(201, {
+            'id': prediction_id, 'model': self.path, 'version': 'standin', 'status': 'succeeded',
+            'input': body.get('input', {}), 'output': self.state.image, 'logs': '', 'error': None,
+            'metrics': {'predict_time': 0.0}, 'created_at': now, 'started_at': now, 'completed_at': now,
+            'urls': {'get': f"/v1/predictions/{prediction_id}", 'cancel': f"/v1/predictions/{prediction_id}/cancel"}
+        })
+
+    # WordPress -----------------------------------------------------------
+
+    def _wordpress(self, method: str, route: str, body: dict) -> None:
+        parts = route.strip('/').split('/')
+        collection = parts[0]
+        query = parse_qs(self.path.split('?', 1)[1]) if '?' in self.path else {}
+
+        if collection in self.state.terms:
+            terms = self.state.terms[collection]
+            if method == 'GET' and len(parts) == 1:
+                search = query.get('search', [None])[0]
+                with self.state.lock:
+                    matches = {term_id: {'id': term_id, 'name': name} for name, term_id in terms.items()
+                               if search is None or search.lower() in name.lower()}
+                return self._page(matches, query)
+            if method == 'POST':
+                name = body.get('name', '')
+                new_id = self.state.new_id()
+                with self.state.lock:
+                    term_id = terms.setdefault(name, new_id)
+                if term_id != new_id:
+                    # What WordPress answers for a duplicate term name
+                    return self._send(400, {'code': 'term_exists', 'message': 'A term with the name provided already exists.',
+                                            'data': {'status': 400, 'term_id': term_id}})
+                return self._send(201, {'id': term_id, 'name': name})
+        if collection == 'media':
+            if method == 'POST' and len(parts) == 1:
+                media_id = self.state.new_id()
+                media = {'id': media_id, 'media_type': 'image', 'post': 0,
+                         'date_gmt': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime()),
+                         'source_url': f"/wp-content/uploads/2030/01/image-{media_id}.webp"}
+                with self.state.lock:
+                    self.state.media[media_id] = media
+                return self._send(201, media)
+            if method == 'GET' and len(parts) == 1:
+                return self._page(self.state.media, query)
+            if method == 'DELETE' and len(parts) == 2:
+                with self.state.lock:
+                    media = self.state.media.pop(int(parts[1]), None)
+                return self._send(200 if media else 404, {'deleted': bool(media), 'previous': media})
+        if collection in ('posts', 'pages'):
+            if method == 'POST' and len(parts) == 1:
+                post_id = self.state.new_id()
+                post = {'id': post_id, 'status': 'publish', 'link': f"/?p={post_id}",
+                        'modified': time.strftime('%Y-%m-%dT%H:%M:%S'), 'tags': [], 'categories': [],
+                        'featured_media': body.get('featured_media', 0),
+                        'content': {'rendered': body.get('content', ''), 'raw': body.get('content', ''),
+                                    'protected': False}}
+                with self.state.lock:
+                    self.state.posts[post_id] = post
+                return self._send(201, post)
+            if method == 'GET' and len(parts) == 1:
+                return self._page(self.state.posts if collection == 'posts' else {}, query)
+            if method == 'GET' and len(parts) == 2:
+                post = self.state.posts.get(int(parts[1]))
+                return self._send(200 if post else 404, post or {'message': 'Not found'})
+        return self._send(200, {'id': self.state.new_id()})
+
+    def _page(self, items: dict, query: dict) -> None:
+        """One page of a collection with WordPress's paging headers and _fields"""
+        per_page = int(query.get('per_page', ['10'])[0])
+        page = int(query.get('page', ['1'])[0])
+        fields = query.get('_fields', [''])[0].split(',') if '_fields' in query else None
+        with self.state.lock:
+            ordered = [items[key] for key in sorted(items, reverse=True)]
+        total_pages = max(1, math.ceil(len(ordered) / per_page))
+        if page > total_pages:
+            return self._send(400, {'code': 'rest_post_invalid_page_number'})
+        chunk = ordered[(page - 1) * per_page:page * per_page]
+        if fields:
+            chunk = [{key: item[key] for key in fields if key in item} for item in chunk]
+        self._send(200, chunk, {'X-WP-Total': str(len(ordered)), 'X-WP-TotalPages': str(total_pages)})
+
+
+def _serve(settings: dict, ready) -> None:
+    StandinHandler.state = StandinState(settings)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandinHandler)
+    server.daemon_threads = True
+    ready.put(server.server_port)
+    server.serve_forever()
+
+
+def start(settings: dict):
+    """Start the stand-ins in a child process; returns (process, base_url)"""
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(settings, ready), daemon=True)
+    process.start()
+    port = ready.get(timeout=30)
+    return process, f"http://127.0.0.1:{port}"
+
+
+def stats(base_url: str) -> dict:
+    import requests
+    return requests.get(f"{base_url}/_stats").json()
@@ -0,0 +1,189 @@
+"""Micro-benchmarks for the CPU hot paths, with a stored baseline and regression gate.
+
+Fixtures start from the sample articles under assets/articles and are scaled
+up to a synthetic archive of --archive topics.
+
+Usage: python benchmarks/bench_micro.py [--archive N] [--filter TEXT]
+       python benchmarks/bench_micro.py --save-baseline [--baseline FILE]
+       python benchmarks/bench_micro.py --compare [--threshold 0.15] [--baseline FILE]
+
+--compare exits with status 1 when any case is slower than the baseline by
+more than the threshold (0.15 = 15%).
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+from _env import bootstrap, load_corpus, REPO_ROOT, SAMPLE_ARTICLES
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+WORDS = ['Adaptive', 'Data', 'Governance', 'for', 'AI-Driven', 'Applications', 'Edge', 'Caching',
+         'Zero-Trust', 'Networks', 'in', 'the', 'Cloud', 'Observability', "Kubernetes'", 'Rust',
+         'Supply', 'Chain', 'Security:', 'What', 'Changed', '(2025)', 'Déjà', 'vu', '<b>HTML</b>']
+
+
+def synthetic_topics(count, seed=7):
+    rng = random.Random(seed)
+    return [{
+        'topic': " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 9))),
+        'description': "A concise explanation of the topic and why it matters to engineers.",
+        'tags': rng.sample(WORDS, 3),
+        'date': f"20{rng.randint(20, 29)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        'company': '',
+        'key_details': ''
+    } for _ in range(count)]
+
+
+def build_cases(archive_size, workdir):
+    """name -> (callable, operations per call); fixture files go under workdir"""
+    from kackle.utils import clean_title, sanitize_folder_name, get_clean_path
+    from kackle.code_blocks import convert_codeblocks, convert_markdown_to_wp
+    from kackle.topic import TopicGenerator
+    from kackle.schema_validator import SchemaValidator
+    from kackle.article import Article
+
+    corpus = load_corpus(SAMPLE_ARTICLES)
+    article_files = sorted(SAMPLE_ARTICLES.glob('*/article.yaml'))
+    with open(article_files[0]) as f:
+        article_data = yaml.safe_load(f)
+    article = Article.from_yaml(article_data)
+    article_text = yaml.safe_dump(article_data)
+    # The same article in the split layout: article.yaml metadata plus content.md
+    split_dir = Path(workdir) / 'article'
+    split_dir.mkdir()
+    Article.from_yaml(dict(article_data)).save(split_dir / 'article.yaml')
+    split_file = split_dir / 'article.yaml'
+
+    topics = synthetic_topics(archive_size)
+    titles = [topic['topic'] for topic in topics]
+    sample_titles = titles[:500]
+    # score_topic_match does not touch instance state, so skip the archive-loading constructor
+    scorer = TopicGenerator.__new__(TopicGenerator)
+    validator = SchemaValidator(schema_dir=str(REPO_ROOT / 'prompt_validator'))
+    topics_document = json.dumps(topics[:50])
+
+    def each(func, items):
+        return lambda: [func(item) for item in items]
+
+    return {
+        'clean_title': (each(clean_title, sample_titles), len(sample_titles)),
+        'sanitize_folder_name': (each(sanitize_folder_name, sample_titles), len(sample_titles)),
+        'get_clean_path': (each(get_clean_path, sample_titles), len(sample_titles)),
+        'convert_codeblocks': (each(convert_codeblocks, corpus), len(corpus)),
+        'convert_markdown_to_wp': (each(convert_markdown_to_wp, corpus), len(corpus)),
+        f'score_topic_match[{archive_size}]': (lambda: scorer.score_topic_match(titles[0], titles), 1),
+        'schema_validate[50 topics]': (lambda: validator.validate('article_topics.system.txt', topics_document), 1),
+        'article_from_yaml': (lambda: Article.from_yaml(dict(article_data)), 1),
+        'article_to_yaml': (article.to_yaml, 1),
+        'article_yaml_roundtrip': (lambda: Article.from_yaml(yaml.safe_load(yaml.safe_dump(
+            Article.from_yaml(yaml.safe_load(article_text)).to_yaml()))), 1),
+        'article_load_legacy': (lambda: Article.load(article_files[0]), 1),
+        'article_load_metadata': (lambda: Article.load(split_file), 1),
+        'article_load_full': (lambda: Article.load(split_file).content, 1),
+    }
+
+
+def measure(func, per_call, min_time, repeats):
+    """Best-of-repeats time per operation in microseconds"""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    best = elapsed
+    for _ in range(repeats - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        best = min(best, time.perf_counter() - started)
+    return best / (loops * per_call) * 1e6
+
+
+def environment():
+    return {'python': platform.python_version(), 'implementation': platform.python_implementation(),
+            'machine': platform.machine(), 'node': platform.node()}
+
+
+def compare(results, baseline, threshold):
+    """Print old/new per case and return the names that regressed"""
+    regressions = []
+    print(f"{'case':<32} {'baseline us':>12} {'current us':>12} {'change':>8}")
+    for name, current in results.items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            print(f"{name:<32} {'-':>12} {current:>12.2f} {'new':>8}")
+            continue
+        change = current / previous - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<32} {previous:>12.2f} {current:>12.2f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot path micro-benchmarks")
+    parser.add_argument("--archive", type=int, default=5000, help="Synthetic archive size in topics")
+    parser.add_argument("--filter", type=str, default=None, help="Only run cases containing this text")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs per case (best is kept)")
+    parser.add_argument("--baseline", type=str, default=str(DEFAULT_BASELINE), help="Baseline file")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="Fail when a case regresses past --threshold")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed slowdown, 0.15 = 15%%")
+    args = parser.parse_args()
+    baseline_path = Path(args.baseline).resolve()
+
+    bootstrap()
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='kackle-bench-') as workdir:
+        cases = build_cases(args.archive, workdir)
+        if args.filter:
+            cases = {name: case for name, case in cases.items() if args.filter in name}
+
+        for name, (func, per_call) in cases.items():
+            results[name] = round(measure(func, per_call, args.min_time, args.repeat), 3)
+            if not args.compare:
+                print(f"{name:<32} {results[name]:>12.2f} us/op")
+
+    if args.save_baseline:
+        baseline = {'environment': environment(), 'archive': args.archive, 'results': results}
+        if baseline_path.exists() and args.filter:
+            # Keep the cases that were not re-measured
+            with open(baseline_path) as f:
+                baseline['results'] = dict(json.load(f)['results'], **results)
+        with open(baseline_path, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline saved to {baseline_path}")
+
+    if args.compare:
+        if not baseline_path.exists():
+            print(f"No baseline at {baseline_path}; run with --save-baseline first")
+            sys.exit(2)
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if baseline.get('environment') != environment():
+            print(f"Warning: baseline was recorded on {baseline.get('environment')}")
+        if baseline.get('archive') != args.archive:
+            print(f"Warning: baseline used --archive {baseline.get('archive')}")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} case(s) regressed more than {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Offline end-to-end pipeline throughput against local provider stand-ins.
+
+Runs generate_topics, generate_batch (generation, image, WordPress publish)
+and upload_article against local OpenAI, Replicate and wp-json stand-ins,
+then reports articles per minute, upstream requests per article and peak RSS.
+
+Usage: python benchmarks/bench_pipeline.py [--articles N] [--mode single|sections|combined]
+       [--openai-latency S] [--replicate-latency S] [--wordpress-latency S]
+       [--jitter SIGMA] [--error-rate P] [--stream] [--sites N] [--workers N] [--json FILE] [--verbose]
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import resource
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from _env import bootstrap, load_corpus, REPO_ROOT, SAMPLE_ARTICLES
+import _standins
+
+
+def diff(after: dict, before: dict) -> dict:
+    return {key: value - before.get(key, 0) for key, value in after.items() if value - before.get(key, 0)}
+
+
+def run(args, base_url):
+    from kackle.config import config
+    from kackle.topic import TopicGenerator
+    from kackle.article import ArticleGenerator
+    from kackle.cli import upload_article
+    from kackle.accounting import ledger
+    from kackle.limiter import limits_report
+
+    if not args.verbose:
+        for handler in logging.getLogger().handlers:
+            handler.setLevel(logging.WARNING)
+    topic_generator = TopicGenerator(config)
+    article_generator = ArticleGenerator(config)
+    from_date = date(2030, 1, 1)
+    to_date = from_date + timedelta(days=args.articles - 1)
+    phases = {}
+
+    before = _standins.stats(base_url)
+    since = ledger.mark()
+    # The pipeline prints progress as it goes; keep the report readable
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        started = time.perf_counter()
+        topics = topic_generator.generate_topics(from_date, to_date, args.articles, report=False)
+        if not args.stream:
+            topics = list(topics)
+            phases['topics'] = time.perf_counter() - started
+        articles = article_generator.generate_batch(topics)
+        phases['articles'] = time.perf_counter() - started - phases.get('topics', 0.0)
+
+        upload_started = time.perf_counter()
+        for article in articles[:args.uploads]:
+            upload_article(article._file_path)
+        phases['uploads'] = time.perf_counter() - upload_started
+        elapsed = time.perf_counter() - started
+    requests = diff(_standins.stats(base_url), before)
+    print(ledger.report(since))
+    print(limits_report())
+
+    count = max(len(articles), 1)
+    return {
+        'mode': args.mode,
+        'stream': args.stream,
+        'articles': len(articles),
+        'uploads': min(args.uploads, len(articles)),
+        'seconds': round(elapsed, 3),
+        'phases': {name: round(seconds, 3) for name, seconds in phases.items()},
+        'articles_per_minute': round(len(articles) / elapsed * 60, 2) if elapsed else 0.0,
+        'requests': requests,
+        'requests_per_article': {service: round(requests.get(service, 0) / count, 2)
+                                 for service in ('openai', 'replicate', 'wordpress')},
+        # ru_maxrss is in kilobytes on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end pipeline benchmark")
+    parser.add_argument("--articles", type=int, default=10, help="Topics and articles to generate")
+    parser.add_argument("--uploads", type=int, default=3, help="Articles re-published through upload_article")
+    parser.add_argument("--mode", choices=["single", "sections", "combined"], default="single",
+                        help="article.mode to run")
+    parser.add_argument("--structured", action="store_true", help="Use structured output")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream topics into generate_batch instead of generating them first")
+    parser.add_argument("--workers", type=int, default=4, help="Articles built at once (article.workers)")
+    parser.add_argument("--sites", type=int, default=1, help="WordPress sites to fan out to")
+    parser.add_argument("--openai-latency", type=float, default=0.3, help="Median chat/embedding latency (s)")
+    parser.add_argument("--replicate-latency", type=float, default=0.5, help="Median prediction latency (s)")
+    parser.add_argument("--wordpress-latency", type=float, default=0.05, help="Median wp-json latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Log-normal sigma of every latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 500")
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's own output and logs")
+    args = parser.parse_args()
+    json_path = Path(args.json).resolve() if args.json else None
+
+    settings = {
+        'openai_latency': args.openai_latency,
+        'replicate_latency': args.replicate_latency,
+        'wordpress_latency': args.wordpress_latency,
+        'jitter': args.jitter,
+        'error_rate': args.error_rate,
+        'bodies': load_corpus(SAMPLE_ARTICLES),
+        'width': 512,
+        'height': 512,
+    }
+    process, base_url = _standins.start(settings)
+    site = {'url': base_url, 'username': 'bench', 'password': 'bench'}
+    if args.sites > 1:
+        wordpress = [dict(site, name=f"site{index}") for index in range(args.sites)]
+    else:
+        wordpress = site
+    try:
+        workdir = bootstrap({
+            'openai': {'base_url': f"{base_url}/v1", 'structured_output': args.structured},
+            'replicate': {'base_url': base_url},
+            'wordpress': wordpress,
+            'article': {'mode': args.mode, 'workers': args.workers},
+            'accounting': {'dir': 'accounting'},
+        })
+        # SchemaValidator looks for prompt_validator/ in the working directory
+        (workdir / 'prompt_validator').symlink_to(REPO_ROOT / 'prompt_validator')
+        results = run(args, base_url)
+    finally:
+        process.terminate()
+
+    print(f"\n{results['articles']} articles in {results['seconds']:.1f}s "
+          f"({results['articles_per_minute']:.1f} articles/min, mode={results['mode']}, "
+          f"stream={results['stream']})")
+    print("phases: " + ", ".join(f"{name} {seconds:.1f}s" for name, seconds in results['phases'].items()))
+    print("requests per article: " + ", ".join(
+        f"{service} {count:.1f}" for service, count in results['requests_per_article'].items()))
+    for key, value in sorted(results['requests'].items()):
+        if ' ' in key or key.endswith(('.errors', '.not_modified')):
+            print(f"  {key:<48} {value:>6}")
+    print(f"peak RSS: {results['peak_rss_mb']:.1f} MB")
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
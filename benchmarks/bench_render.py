@@ -0,0 +1,54 @@
+"""Markdown-to-WordPress render throughput.
+
+Usage: python benchmarks/bench_render.py [--corpus DIR] [--seconds N] [--threads N]
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from _env import bootstrap, load_corpus, SAMPLE_ARTICLES
+
+
+def run(corpus, seconds, threads):
+    from kackle.code_blocks import convert_markdown_to_wp
+
+    def render_for(deadline):
+        count = 0
+        while time.perf_counter() < deadline:
+            for body in corpus:
+                convert_markdown_to_wp(body)
+            count += len(corpus)
+        return count
+
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        total = sum(pool.map(render_for, [deadline] * threads))
+    elapsed = time.perf_counter() - started
+    return total, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render throughput benchmark")
+    parser.add_argument("--corpus", type=str, default=str(SAMPLE_ARTICLES),
+                        help="Articles folder to read article.yaml bodies from")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Run time")
+    parser.add_argument("--threads", type=int, default=1, help="Rendering threads")
+    args = parser.parse_args()
+
+    corpus = load_corpus(Path(args.corpus).resolve())
+    if not corpus:
+        print(f"No article bodies found under {args.corpus}")
+        return
+    bootstrap()
+
+    total, elapsed = run(corpus, args.seconds, args.threads)
+    size = sum(len(body) for body in corpus)
+    print(f"corpus: {len(corpus)} documents, {size / len(corpus):.0f} chars avg")
+    print(f"rendered {total} documents in {elapsed:.2f}s "
+          f"({total / elapsed:.1f} docs/sec, {args.threads} thread(s))")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""SchemaValidator cost per validated item.
+
+Usage: python benchmarks/bench_schema.py [--items N] [--repeat N]
+"""
+import argparse
+import json
+import time
+
+from _env import bootstrap, REPO_ROOT
+
+PROMPT = "article_topics.system.txt"
+
+
+def make_items(count):
+    return [
+        {
+            "topic": f"Topic {i}",
+            "description": "A concise explanation of the topic and its impact.",
+            "tags": ["Cloud", "Security", "DevOps"],
+            "date": f"2024-{(i % 12) + 1:02d}-{(i % 28) + 1:02d}",
+            "company": "Example",
+            "key_details": "Critical data points and notable developments."
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Schema validation benchmark")
+    parser.add_argument("--items", type=int, default=100, help="Items per document")
+    parser.add_argument("--repeat", type=int, default=200, help="Documents to validate")
+    args = parser.parse_args()
+
+    bootstrap()
+    from kackle.schema_validator import SchemaValidator
+
+    validator = SchemaValidator(schema_dir=str(REPO_ROOT / "prompt_validator"))
+    document = json.dumps(make_items(args.items))
+    parsed = json.loads(document)
+
+    for label, payload in (("json text", document), ("parsed", parsed)):
+        is_valid, issues, _ = validator.validate(PROMPT, payload)
+        if not is_valid:
+            print(f"Fixture failed validation: {issues}")
+            return
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            validator.validate(PROMPT, payload)
+        elapsed = time.perf_counter() - started
+        per_item = elapsed / (args.repeat * args.items) * 1e6
+        print(f"{label:>10}: {per_item:.2f} us/item ({args.repeat} x {args.items} items in {elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
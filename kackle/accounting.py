@@ -0,0 +1,212 @@
+import json
+import math
+import time
+import logging
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_RECORDS = 200000
+# Article timings kept; the oldest are dropped so a long-running worker stays bounded
+MAX_ARTICLES = 10000
+
+# Title of the article the current call is made for, carried into pool threads by bound()
+current_article = contextvars.ContextVar('current_article', default=None)
+
+
+def bound(func):
+    """Run func in the caller's context, for pool submissions.
+
+    Each call gets its own copy since a Context can only be entered by one
+    thread at a time, and pool.map runs the same callable concurrently.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.copy().run(func, *args, **kwargs)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class Ledger:
+    """Per-call accounting of upstream requests for a process.
+
+    Every OpenAI completion or embedding, Replicate prediction and WordPress
+    request appends one record: service, operation, model, latency, tokens,
+    retries, bytes and estimated cost, tagged with the article being built.
+    Records carry a sequence number so a batch can report on just the calls
+    made since it started (see mark()).
+    """
+
+    def __init__(self):
+        self.records = deque(maxlen=MAX_RECORDS)
+        self.articles = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def _price(self, service: str, model: Optional[str], record: Dict) -> Optional[float]:
+        from .config import config
+        pricing = config.get('pricing', {}).get(model) if model else None
+        if not pricing:
+            return None
+        if service == 'replicate':
+            return pricing.get('per_image', 0.0) + pricing.get('per_second', 0.0) * record['latency']
+        return (record['prompt_tokens'] * pricing.get('input', 0.0)
+                + record['completion_tokens'] * pricing.get('output', 0.0)) / 1_000_000
+
+    def record(self, service: str, operation: str, latency: float, model: Optional[str] = None,
+               prompt_tokens: int = 0, completion_tokens: int = 0, retries: int = 0,
+               bytes_sent: int = 0, bytes_received: int = 0, status: Optional[str] = None) -> Dict:
+        record = {
+            'service': service,
+            'operation': operation,
+            'model': model,
+            'article': current_article.get(),
+            'latency': round(latency, 4),
+            'prompt_tokens': prompt_tokens or 0,
+            'completion_tokens': completion_tokens or 0,
+            'retries': retries,
+            'bytes_sent': bytes_sent,
+            'bytes_received': bytes_received,
+            'status': status,
+            'time': time.time()
+        }
+        record['cost'] = self._price(service, model, record)
+        with self._lock:
+            self._seq += 1
+            record['seq'] = self._seq
+            self.records.append(record)
+        return record
+
+    def mark(self) -> int:
+        """Sequence number to pass to report()/summary() as `since`"""
+        with self._lock:
+            return self._seq
+
+    @contextmanager
+    def article(self, title: str) -> Iterator[None]:
+        """Attribute calls in this block to title and time the whole article"""
+        token = current_article.set(title)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            current_article.reset(token)
+            with self._lock:
+                self.articles.pop(title, None)
+                self.articles[title] = {'seconds': round(time.monotonic() - started, 3),
+                                        'finished': time.time()}
+                while len(self.articles) > MAX_ARTICLES:
+                    del self.articles[next(iter(self.articles))]
+
+    def _since(self, since: int) -> List[Dict]:
+        with self._lock:
+            return [record for record in self.records if record['seq'] > since]
+
+    def summary(self, since: int = 0) -> Dict:
+        """Run, per-operation and per-article aggregates of the records after since"""
+        records = self._since(since)
+
+        def aggregate(group: List[Dict]) -> Dict:
+            latencies = [record['latency'] for record in group]
+            costs = [record['cost'] for record in group if record['cost'] is not None]
+            return {
+                'calls': len(group),
+                'retries': sum(record['retries'] for record in group),
+                'timeouts': sum(record['status'] == 'timeout' for record in group),
+                'prompt_tokens': sum(record['prompt_tokens'] for record in group),
+                'completion_tokens': sum(record['completion_tokens'] for record in group),
+                'bytes_sent': sum(record['bytes_sent'] for record in group),
+                'bytes_received': sum(record['bytes_received'] for record in group),
+                'cost': round(sum(costs), 6) if costs else None,
+                'latency_total': round(sum(latencies), 3),
+                'latency_p50': percentile(latencies, 50),
+                'latency_p95': percentile(latencies, 95),
+                'latency_p99': percentile(latencies, 99)
+            }
+
+        operations, articles = {}, {}
+        for record in records:
+            operations.setdefault((record['service'], record['operation'], record['model']), []).append(record)
+            if record['article']:
+                articles.setdefault(record['article'], []).append(record)
+
+        article_stats = {}
+        with self._lock:
+            timings = dict(self.articles)
+        for title, group in articles.items():
+            article_stats[title] = aggregate(group)
+            article_stats[title]['seconds'] = timings.get(title, {}).get('seconds')
+
+        return {
+            'generated': datetime.now().isoformat(),
+            'run': aggregate(records),
+            'operations': [dict(service=service, operation=operation, model=model, **aggregate(group))
+                           for (service, operation, model), group in sorted(operations.items(), key=str)],
+            'articles': article_stats
+        }
+
+    def report(self, since: int = 0) -> str:
+        """p50/p95/p99 latency table per operation plus article totals"""
+        summary = self.summary(since)
+        if not summary['operations']:
+            return ""
+        lines = [f"{'service':<10} {'operation':<22} {'model':<22} {'calls':>5} {'retry':>5} "
+                 f"{'p50 s':>7} {'p95 s':>7} {'p99 s':>7} {'tok in':>8} {'tok out':>8} {'MB':>7} {'cost':>8}"]
+
+        def row(service, operation, model, stats):
+            cost = f"{stats['cost']:.4f}" if stats['cost'] is not None else "-"
+            megabytes = (stats['bytes_sent'] + stats['bytes_received']) / 1e6
+            return (f"{service:<10} {operation[:22]:<22} {(model or '-')[:22]:<22} {stats['calls']:>5} "
+                    f"{stats['retries']:>5} {stats['latency_p50']:>7.2f} {stats['latency_p95']:>7.2f} "
+                    f"{stats['latency_p99']:>7.2f} {stats['prompt_tokens']:>8} "
+                    f"{stats['completion_tokens']:>8} {megabytes:>7.2f} {cost:>8}")
+
+        for stats in summary['operations']:
+            lines.append(row(stats['service'], stats['operation'], stats['model'], stats))
+        lines.append(row('total', '', '', summary['run']))
+
+        seconds = [stats['seconds'] for stats in summary['articles'].values() if stats['seconds'] is not None]
+        if seconds:
+            lines.append(f"{len(seconds)} articles: p50 {percentile(seconds, 50):.1f}s, "
+                         f"p95 {percentile(seconds, 95):.1f}s, p99 {percentile(seconds, 99):.1f}s per article")
+        return "\n".join(lines)
+
+    def write_summary(self, config: Dict, name: str, since: int = 0) -> Optional[Path]:
+        """Write summary() as JSON to <accounting.dir>/<name>-<timestamp>.json"""
+        summary = self.summary(since)
+        if not summary['operations']:
+            return None
+        folder = Path(config.get('accounting', {}).get('dir', 'accounting'))
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"{name}-{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(path, 'w') as f:
+            json.dump(summary, f, indent=2, default=str)
+        return path
+
+
+ledger = Ledger()
+
+
+def finish_run(config: Dict, name: str, since: int) -> None:
+    """Print the accounting table for calls after since and write the JSON summary"""
+    report = ledger.report(since)
+    if not report:
+        return
+    print(report)
+    try:
+        path = ledger.write_summary(config, name, since)
+        logger.info(f"Accounting summary written to {path}")
+    except OSError as e:
+        logger.error(f"Failed to write accounting summary: {e}")
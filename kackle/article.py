@@ -1,15 +1,23 @@
 import re
+import queue
+import hashlib
 import logging
-from dataclasses import dataclass, field
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import List, Optional, Dict
+from typing import Iterable, Iterator, List, Optional, Dict, Tuple, Union
 import yaml
 from pathlib import Path
+from urllib.parse import urlparse
 
-from .prompt import generate_content, generate_image, generate_art_prompt, create_flux_pro_image
-from .utils import get_clean_path
-from .code_blocks import convert_markdown_to_wp
-from .wordpress_client import WordPressAPIClient
+from .prompt import generate_content, generate_image, generate_art_prompt, create_flux_pro_image, stream_content
+from .utils import get_clean_path, atomic_write, atomic_dump_yaml, load_yaml, CONTENT_FILE_NAME
+from .lease import Lease
+from .schema_validator import SchemaValidator, StreamValidationError
+from .render_cache import render_cached
+from .tracing import span
+from .accounting import ledger, bound, finish_run
+from .wordpress_client import WordPressAPIClient, create_wordpress_clients
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -27,25 +35,77 @@ class ArticleValidationError(ArticleError):
     """Raised when article validation fails"""
     pass
 
-@dataclass
+class ArticleLeaseError(ArticleError):
+    """Raised when another worker holds the lease on an article"""
+    pass
+
+def content_digest(content: str) -> str:
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
 class Article:
-    title: str
-    content: str
-    date: str
-    tags: List[str]
-    categories: List[str] = field(default_factory=list)  
-    company: str = ""
-    key_details: str = ""
-    image_path: Optional[str] = None
-    image_prompt: str = ""
-    wordpress_data: Optional[Dict] = None
-    _file_path: Optional[Path] = None
+    """An article stored as article.yaml metadata plus a content.md body.
+
+    Loading reads only the metadata; the body is read from content.md the
+    first time `content` is accessed, so listing or resyncing an archive
+    never touches the bodies. article.yaml records the body's content_hash
+    so saving an unchanged body skips rewriting it. Older article.yaml
+    files with the body inline still load and are split on their next save.
+    """
+
+    __slots__ = ('title', '_content', 'date', 'tags', 'categories', 'company', 'key_details',
+                 'image_path', 'image_prompt', 'wordpress_data', 'content_hash', '_file_path')
+
+    def __init__(self, title: str, content: Optional[str], date: str, tags: List[str],
+                 categories: Optional[List[str]] = None, company: str = "", key_details: str = "",
+                 image_path: Optional[str] = None, image_prompt: str = "",
+                 wordpress_data: Optional[Dict] = None, content_hash: Optional[str] = None,
+                 _file_path: Optional[Path] = None):
+        self.title = title
+        self._content = content
+        self.date = date
+        self.tags = tags
+        self.categories = categories if categories is not None else []
+        self.company = company
+        self.key_details = key_details
+        self.image_path = image_path
+        self.image_prompt = image_prompt
+        self.wordpress_data = wordpress_data
+        self.content_hash = content_hash
+        self._file_path = _file_path
+
+    def __repr__(self) -> str:
+        return f"Article(title={self.title!r}, date={self.date!r}, file={str(self._file_path)!r})"
+
+    @property
+    def content(self) -> str:
+        if self._content is None:
+            self._content = self._read_content()
+        return self._content
+
+    @content.setter
+    def content(self, value: str) -> None:
+        self._content = value
+
+    @property
+    def content_path(self) -> Optional[Path]:
+        return Path(self._file_path).parent / CONTENT_FILE_NAME if self._file_path else None
+
+    def _read_content(self) -> str:
+        if not self._file_path:
+            raise ArticleError(f"No content loaded for article: {self.title}")
+        try:
+            with open(self.content_path, encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            raise ArticleNotFoundError(f"Article body not found: {self.content_path}")
 
     @classmethod
     def load(cls, file_path: Path) -> 'Article':
+        """Load the metadata in file_path; the body is read on first access"""
         try:
             with open(file_path) as f:
-                yaml_data = yaml.safe_load(f)
+                yaml_data = load_yaml(f)
             article = cls.from_yaml(yaml_data)
             article._file_path = file_path
             return article
@@ -55,34 +115,44 @@ class Article:
             raise ArticleValidationError(f"Invalid YAML in article file: {e}")
 
     def save(self, file_path=None) -> None:
+        """Write content.md when the body changed, then article.yaml"""
         save_path = file_path or self._file_path
         if not save_path:
             raise ArticleError("No file path associated with this article")
         
         try:
-            yaml_content = self.to_yaml()
+            content_path = Path(save_path).parent / CONTENT_FILE_NAME
+            moved = self.content_path != content_path
+            if self._content is not None or moved:
+                digest = content_digest(self.content)
+                if moved or digest != self.content_hash or not content_path.exists():
+                    atomic_write(content_path, self.content)
+                self.content_hash = digest
 
-            with open(save_path, 'w') as f:
-                yaml.safe_dump(yaml_content, f)
+            # The body is on disk before the metadata that points at it
+            atomic_dump_yaml(save_path, self.metadata())
+            self._file_path = Path(save_path)
                 
         except Exception as e:
             raise ArticleError(f"Failed to save article: {e}")
         
     @classmethod
     def from_yaml(cls, yaml_data: Dict) -> 'Article':
+        """Build from article.yaml metadata, with or without the body inline"""
         if yaml_data==None:
             raise ArticleValidationError(f"Empty file")
 
-        required_fields = {'title', 'content', 'date', 'tags'}
+        required_fields = {'title', 'date', 'tags'}
         missing_fields = required_fields - set(yaml_data.keys())
         if missing_fields:
             raise ArticleValidationError(f"Missing required fields: {missing_fields}")
-        return cls(**yaml_data)
+        data = dict(yaml_data)
+        return cls(content=data.pop('content', None), **data)
 
-    def to_yaml(self) -> Dict:
+    def metadata(self) -> Dict:
+        """Everything stored in article.yaml: all fields but the body"""
         return {
             'title': self.title,
-            'content': self.content,
             'date': self.date,
             'tags': self.tags,
             'categories': self.categories, 
@@ -90,12 +160,51 @@ class Article:
             'key_details': self.key_details,
             'image_path': self.image_path,
             'image_prompt': self.image_prompt,
-            'wordpress_data': self.wordpress_data
+            'wordpress_data': self.wordpress_data,
+            'content_hash': self.content_hash
         }
 
-    def upload_to_wordpress(self, wp_client: WordPressAPIClient) -> bool:
+    def to_yaml(self) -> Dict:
+        """All fields including the body, loading it if needed"""
+        data = self.metadata()
+        data['content'] = self.content
+        return data
+
+    def render_html(self) -> str:
+        """Render content to WordPress HTML, cached next to article.yaml"""
+        folder = Path(self._file_path).parent if self._file_path else None
+        return render_cached(self.content, folder)
+
+    def site_posts(self, wp_clients: Dict[str, WordPressAPIClient]) -> Dict[str, Dict]:
+        """Post data per site name.
+
+        A single-site record (top-level post_id, saved before several sites
+        were configured) is assigned to the site whose host matches its
+        site URL or link; without either it is taken to belong to the first
+        configured site. A record for a site no longer configured is kept
+        under its host.
+        """
+        data = self.wordpress_data or {}
+        if 'sites' in data or not data.get('post_id'):
+            return dict(data.get('sites') or {})
+        host = urlparse(data.get('site') or data.get('link') or '').netloc
+        for name, client in wp_clients.items():
+            if not host or urlparse(client.base_url).netloc == host:
+                return {name: data}
+        return {host: data}
+
+    def is_published(self, wp_clients: Optional[Dict[str, WordPressAPIClient]] = None) -> bool:
+        """True once the post exists, on every site when wp_clients is given"""
+        if wp_clients is None:
+            return bool((self.wordpress_data or {}).get('post_id'))
+        published = self.site_posts(wp_clients)
+        return all((published.get(name) or {}).get('post_id') for name in wp_clients)
+
+    def upload_to_wordpress(self, wp_client: Union[WordPressAPIClient, Dict[str, WordPressAPIClient]]) -> bool:
+        if isinstance(wp_client, dict):
+            return self._upload_to_sites(wp_client)
         try:
-            wp_content = convert_markdown_to_wp(self.content)
+            wp_content = self.render_html()
             post_data = wp_client.create_post(
                 postdate=self.date,
                 title=self.title,
@@ -113,19 +222,96 @@ class Article:
         except Exception as e:
             raise ArticleError(f"Failed to upload to WordPress: {e}")
 
+    def _upload_to_sites(self, wp_clients: Dict[str, WordPressAPIClient]) -> bool:
+        """Publish to every site concurrently from one render and one image read.
+
+        Results are kept per site under wordpress_data['sites']; sites that
+        already have a post, including one recorded by a single-site run,
+        are skipped, so a retry only fills the gaps.
+        """
+        sites = self.site_posts(wp_clients)
+        pending = {name: client for name, client in wp_clients.items()
+                   if not (sites.get(name) or {}).get('post_id')}
+        if pending:
+            wp_content = self.render_html()
+            image_data = None
+            if self.image_path and Path(self.image_path).exists():
+                image_data = Path(self.image_path).read_bytes()
+
+            def publish(client: WordPressAPIClient) -> Dict:
+                with span('wp.site_publish', site=client.name):
+                    return client.create_post(
+                        postdate=self.date,
+                        title=self.title,
+                        content=wp_content,
+                        image_path=self.image_path,
+                        image_data=image_data,
+                        tags=self.tags,
+                        categories=self.categories
+                    )
+
+            with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="wp-site") as pool:
+                futures = {name: pool.submit(bound(publish), client) for name, client in pending.items()}
+                for name, future in futures.items():
+                    try:
+                        post_data = future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to publish '{self.title}' to {name}: {e}")
+                        continue
+                    if post_data:
+                        # The rendered body is the same for every site, no need to store it per site
+                        post_data.pop('content', None)
+                        sites[name] = post_data
+
+        self.wordpress_data = {'sites': sites}
+        return self.is_published(wp_clients)
+
+    def resync_from_wordpress(self, wp_client: Union[WordPressAPIClient, Dict[str, WordPressAPIClient]]) -> bool:
+        """Refresh wordpress_data from the live post"""
+        if isinstance(wp_client, dict):
+            sites = self.site_posts(wp_client)
+            synced = [_resync(sites[name], client) for name, client in wp_client.items() if name in sites]
+            return bool(synced) and all(synced)
+        return _resync(self.wordpress_data, wp_client)
+
+def _resync(wordpress_data: Optional[Dict], wp_client: WordPressAPIClient) -> bool:
+    """Update one post's stored data from the live post"""
+    post_id = (wordpress_data or {}).get('post_id')
+    if not post_id:
+        return False
+    post = wp_client.get_post(post_id)
+    if not post:
+        return False
+    wordpress_data.update({
+        'status': post.get('status'),
+        'link': post.get('link'),
+        'modified': post.get('modified'),
+        'featured_media': post.get('featured_media'),
+        'tags': post.get('tags', []),
+        'categories': post.get('categories', [])
+    })
+    return True
+
+OUTLINE_SCHEMA = "article_outline.system.txt"
+COMBINED_SCHEMA = "article_combined.system.txt"
+HEADING_PATTERN = re.compile(r'^\s*#{1,6}\s+[^\n]*\n+')
+
 class ArticleGenerator:
     def __init__(self, config: Dict):
         self.config = config
+        article_config = config.get('article', {})
+        self.mode = article_config.get('mode', 'single')
+        # None runs every section at once and leaves the cap to the openai limiter
+        self.section_workers = article_config.get('section_workers')
+        self.buffer = article_config.get('buffer', 2)
+        self.workers = article_config.get('workers', 4)
+        self.lease_ttl = config.get('lease', {}).get('ttl', 120)
+        self.max_tries = config.get('validator', {}).get('attempts', 3)
+        self.validator = SchemaValidator()
         self.articles_dir = Path(config['folders']['articles'])
         self.articles_dir.mkdir(parents=True, exist_ok=True)
-        if 'wordpress' in config:
-            self.wp_client = WordPressAPIClient(
-                config['wordpress']['url'],
-                config['wordpress']['username'],
-                config['wordpress']['password']
-            )
-        else:
-            self.wp_client = None
+        # A single client, or {site name: client} when publishing to several sites
+        self.wp_client = create_wordpress_clients(config)
 
     def _get_article_path(self, title: str) -> Path:
         """Generate filesystem path for article"""
@@ -133,47 +319,201 @@ class ArticleGenerator:
         Path(article_dir).mkdir(parents=True, exist_ok=True)
         return Path(article_file)
 
-    def create(self, topic_data: Dict) -> Article:
-        try:
-            content = generate_content('article', topic_data)
-            title = topic_data.get('topic', '')
-            
-            if not title or not content:
-                raise ArticleValidationError("Missing title or content")
-
-            # Strip HTML from content
-            content = re.sub(r'<[^>]+>', '', content)
-
-            article = Article(
-                title=title,
-                content=content,
-                date=topic_data.get('date', datetime.now().strftime('%Y-%m-%d')),
-                tags=topic_data.get('tags', []),
-                categories=['Tech Blog'],
-                company=topic_data.get('company', ''),
-                key_details=topic_data.get('key_details', '')
-            )
-            
+    def _prompt_data(self, topic_data: Dict) -> Dict:
+        """Topic fields with defaults for the optional ones the prompts reference"""
+        data = {'company': '', 'key_details': '', 'date': datetime.now().strftime('%Y-%m-%d')}
+        data.update(topic_data)
+        return data
+
+    def _generate_section(self, data: Dict, section: Dict) -> str:
+        """Generate one section body, retrying just this section on failure"""
+        section_data = dict(data, heading=section['heading'], summary=section['summary'])
+        for attempt in range(self.max_tries):
+            body = generate_content('article_section', section_data)
+            if body:
+                # Drop a repeated heading; the outline heading is added on assembly
+                return HEADING_PATTERN.sub('', body, count=1).strip()
+            logger.warning(f"Section '{section['heading']}' attempt {attempt + 1}/{self.max_tries} failed")
+        raise ArticleError(f"Failed to generate section: {section['heading']}")
+
+    def _generate_sectioned(self, topic_data: Dict) -> Optional[str]:
+        """Outline first, then generate every section concurrently and assemble in order"""
+        data = self._prompt_data(topic_data)
+        outline = None
+        for attempt in range(self.max_tries):
+            outline_content = generate_content('article_outline', data)
+            if not outline_content:
+                continue
+            is_valid, issues, outline = self.validator.validate(OUTLINE_SCHEMA, outline_content, repair=True)
+            if is_valid and outline:
+                break
+            logger.warning(f"Outline attempt {attempt + 1}/{self.max_tries} failed validation: {issues}")
+            outline = None
+        if not outline:
+            raise ArticleValidationError("Failed to generate a valid outline")
+
+        data['outline'] = "\n".join(f"- {section['heading']}" for section in outline)
+        with ThreadPoolExecutor(max_workers=self.section_workers or len(outline)) as pool:
+            bodies = list(pool.map(bound(lambda section: self._generate_section(data, section)), outline))
+
+        return "\n\n".join(
+            f"### {section['heading']}\n\n{body}" for section, body in zip(outline, bodies)
+        )
 
+    def _generate_body(self, topic_data: Dict) -> Optional[str]:
+        if self.mode == 'sections':
+            return self._generate_sectioned(topic_data)
+        return generate_content('article', topic_data)
+
+    def _create_image(self, title: str, prompt: str, cancel: Optional[threading.Event] = None) -> str:
+        replicate=self.config['replicate']
+        folder,file_name=get_clean_path(title)
+        with span('image', title=title):
+            return create_flux_pro_image(file_name,  folder, prompt,
+                        file_type="webp", 
+                        target_width=replicate['width'], 
+                        target_height=replicate['height'], 
+                        crop=True, 
+                        resize=True,
+                        cancel=cancel)
+
+    def _generate_combined(self, topic_data: Dict, image_pool: ThreadPoolExecutor,
+                           image_cancel: threading.Event) -> Tuple[Optional[str], str, Optional[Future]]:
+        """Body and image prompt from one structured completion.
+
+        The image is started in image_pool as soon as image_prompt has
+        streamed in, while the body is still being generated; setting
+        image_cancel cancels its prediction if the body fails after all.
+        """
+        data = self._prompt_data(topic_data)
+        title = topic_data.get('topic', '')
+        response_format = None
+        if self.config.get('openai', {}).get('structured_output', False):
+            response_format = self.validator.response_format(COMBINED_SCHEMA)
+
+        image_prompt = ""
+        image_future = None
+        for attempt in range(self.max_tries):
+            fields = {}
             try:
-                replicate=self.config['replicate']
-                prompt=generate_art_prompt(title)
-                folder,file_name=get_clean_path(title)
-                article.image_prompt=prompt 
-                article.image_path=create_flux_pro_image(file_name,  folder, prompt,
-                            file_type="webp", 
-                            target_width=replicate['width'], 
-                            target_height=replicate['height'], 
-                            crop=True, 
-                            resize=True)
+                chunks = stream_content('article_combined', data, response_format=response_format)
+                for key, value in self.validator.iter_fields(COMBINED_SCHEMA, chunks):
+                    fields[key] = value
+                    if key == 'image_prompt' and image_future is None:
+                        image_prompt = value
+                        image_future = image_pool.submit(bound(self._create_image), title, value, image_cancel)
+                return fields.get('content'), image_prompt, image_future
+            except StreamValidationError as e:
+                logger.warning(f"Combined attempt {attempt + 1}/{self.max_tries} failed validation: {e.issues}")
             except Exception as e:
-                logger.warning(f"Failed to generate image for article '{title}': {e}")
+                logger.warning(f"Combined attempt {attempt + 1}/{self.max_tries} failed: {e}")
+        return None, image_prompt, image_future
 
-            file_path = self._get_article_path(article.title)
-            print ("TRYING WP")
+    def _published(self, title: str) -> Optional[Article]:
+        """The saved article for title if it has already been posted.
+
+        With several sites configured, an article that only reached some of
+        them is published to the rest here instead of being regenerated.
+        """
+        article_dir, article_file = get_clean_path(title, "article.yaml")
+        if not Path(article_file).exists():
+            return None
+        try:
+            article = Article.load(Path(article_file))
+        except ArticleError:
+            return None
+        sites = self.wp_client if isinstance(self.wp_client, dict) else None
+        if article.is_published(sites):
+            return article
+        if sites and article.site_posts(sites):
+            logger.info(f"Publishing '{title}' to remaining sites")
             article.upload_to_wordpress(self.wp_client)
-            article.save(file_path)
-            print ("DONE WITH WP")
+            article.save()
+            return article
+        return None
+
+    def create(self, topic_data: Dict, content: Optional[str] = None) -> Article:
+        """Generate, illustrate, publish and save an article for a topic.
+
+        content skips body generation, e.g. for bodies from a batch run.
+        The article directory is leased for the whole run so concurrent
+        workers never generate or publish the same article twice.
+        """
+        title = topic_data.get('topic', '')
+        if not title:
+            raise ArticleValidationError("Missing title or content")
+        try:
+            article_dir, _ = get_clean_path(title)
+            lease = Lease(Path(article_dir) / ".lease", ttl=self.lease_ttl)
+            if not lease.acquire():
+                raise ArticleLeaseError(f"Article is being generated by another worker: {title}")
+            try:
+                published = self._published(title)
+                if published:
+                    logger.info(f"Article already published, skipping: {title}")
+                    return published
+                with span('article', title=title, mode=self.mode), ledger.article(title):
+                    return self._create(topic_data, content, lease)
+            finally:
+                lease.release()
+        except ArticleError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to create article '{title}': {e}")
+            raise ArticleError(f"Failed to create article: {e}")
+
+    def _create(self, topic_data: Dict, content: Optional[str], lease: Lease) -> Article:
+        try:
+            title = topic_data.get('topic', '')
+            with ThreadPoolExecutor(max_workers=1) as image_pool:
+                image_prompt, image_future = "", None
+                image_cancel = threading.Event()
+                with span('article.body'):
+                    if content is None and self.mode == 'combined':
+                        content, image_prompt, image_future = self._generate_combined(topic_data, image_pool,
+                                                                                      image_cancel)
+                    elif content is None:
+                        content = self._generate_body(topic_data)
+
+                if not title or not content:
+                    # Leaving the pool waits for the image; cancel it so a discarded article is not illustrated
+                    if image_future is not None:
+                        image_future.cancel()
+                        image_cancel.set()
+                    raise ArticleValidationError("Missing title or content")
+
+                # Strip HTML from content
+                content = re.sub(r'<[^>]+>', '', content)
+
+                article = Article(
+                    title=title,
+                    content=content,
+                    date=topic_data.get('date', datetime.now().strftime('%Y-%m-%d')),
+                    tags=topic_data.get('tags', []),
+                    categories=['Tech Blog'],
+                    company=topic_data.get('company', ''),
+                    key_details=topic_data.get('key_details', '')
+                )
+
+                try:
+                    if image_future is None:
+                        with span('art_prompt'):
+                            image_prompt=generate_art_prompt(title)
+                        image_future=image_pool.submit(bound(self._create_image), title, image_prompt)
+                    article.image_prompt=image_prompt
+                    with span('image.wait'):
+                        article.image_path=image_future.result()
+                except Exception as e:
+                    logger.warning(f"Failed to generate image for article '{title}': {e}")
+
+            file_path = self._get_article_path(article.title)
+            article._file_path = file_path
+            if lease.lost.is_set():
+                raise ArticleLeaseError(f"Lost the lease before publishing: {title}")
+            with span('wp.publish'):
+                article.upload_to_wordpress(self.wp_client)
+            with span('article.save'):
+                article.save(file_path)
             return article
 
         except Exception as e:
@@ -183,8 +523,7 @@ class ArticleGenerator:
     def save(self, article: Article) -> None:
         try:
             file_path = self._get_article_path(article.title)
-            with open(file_path, 'w') as f:
-                yaml.safe_dump(article.to_yaml(), f)
+            article.save(file_path)
             return file_path
         except Exception as e:
             logger.error(f"Failed to save article '{article.title}': {e}")
@@ -196,8 +535,7 @@ class ArticleGenerator:
             if not file_path.exists():
                 raise ArticleNotFoundError(f"Article not found: {title}")
 
-            with open(file_path) as f:
-                return Article.from_yaml(yaml.safe_load(f))
+            return Article.load(file_path)
         except ArticleNotFoundError:
             raise
         except Exception as e:
@@ -221,24 +559,67 @@ class ArticleGenerator:
             if not file_path.exists():
                 raise ArticleNotFoundError(f"Article not found: {title}")
             file_path.unlink()
+            (file_path.parent / CONTENT_FILE_NAME).unlink(missing_ok=True)
         except ArticleNotFoundError:
             raise
         except Exception as e:
             logger.error(f"Failed to delete article '{title}': {e}")
             raise ArticleError(f"Failed to delete article: {e}")
 
-    def generate_batch(self, topics: List[Dict]) -> List[Article]:
+    def _buffered(self, topics: Iterable[Dict]) -> Iterator[Dict]:
+        """Pull topics on a background thread, at most `buffer` ahead of the consumer"""
+        pending = queue.Queue(maxsize=self.buffer)
+        done = object()
+
+        def produce():
+            try:
+                for topic in topics:
+                    pending.put(topic)
+            except Exception as e:
+                logger.error(f"Topic stream failed: {e}")
+            finally:
+                pending.put(done)
+
+        threading.Thread(target=produce, name="topic-producer", daemon=True).start()
+        while True:
+            topic = pending.get()
+            if topic is done:
+                return
+            yield topic
+
+    def _create_logged(self, topic: Dict) -> Optional[Article]:
+        try:
+            article = self.create(topic)
+            logger.info(f"Generated article: {article.title}")
+            return article
+        except ArticleError as e:
+            logger.error(f"Error generating article for topic {topic.get('topic', 'unknown')}: {e}")
+            return None
+
+    def generate_batch(self, topics: Iterable[Dict]) -> List[Article]:
+        """Create an article per topic, consuming a topic stream as it is produced.
+
+        Up to article.workers articles are built at once, each taking the next
+        topic as soon as a worker frees up. How many upstream calls actually
+        run concurrently is left to the adaptive limiters (see limiter.py).
+        Articles are returned in topic order.
+        """
         # Ensure `topics` is always a list
         if isinstance(topics, dict):
             topics = [topics]  # Wrap single object in a list
+        if not isinstance(topics, (list, tuple)):
+            topics = self._buffered(topics)
             
-        articles = []
-        for topic in topics:
-            try:
-                article = self.create(topic)
-                articles.append(article)
-                logger.info(f"Generated article: {article.title}")
-            except ArticleError as e:
-                logger.error(f"Error generating article for topic {topic.get('topic', 'unknown')}: {e}")
-                continue
+        since = ledger.mark()
+        futures = []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="article") as pool:
+            running = set()
+            for topic in topics:
+                if len(running) >= self.workers:
+                    _, running = wait(running, return_when=FIRST_COMPLETED)
+                future = pool.submit(self._create_logged, topic)
+                futures.append(future)
+                running.add(future)
+        articles = [future.result() for future in futures if future.result()]
+        finish_run(self.config, 'articles', since)
         return articles
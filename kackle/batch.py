@@ -0,0 +1,278 @@
+import os
+import json
+import uuid
+import types
+import logging
+from datetime import date, datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .article import ArticleGenerator, ArticleError
+from .prompt import build_messages, get_routes, record_usage
+from .utils import load_yaml
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_PROMPT = "article"
+
+
+class BatchError(Exception):
+    """Raised when a batch cannot be submitted or collected"""
+    pass
+
+
+class OpenAIBatchBackend:
+    """Batch lifecycle on the OpenAI Batch API"""
+
+    name = "openai"
+
+    def __init__(self, client):
+        self.client = client
+
+    def submit(self, input_path: Path) -> str:
+        with open(input_path, 'rb') as f:
+            batch_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h"
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> Tuple[str, Optional[str]]:
+        batch = self.client.batches.retrieve(batch_id)
+        return batch.status, batch.output_file_id
+
+    def download(self, file_id: str) -> str:
+        return self.client.files.content(file_id).text
+
+
+def echo_responder(body: Dict) -> str:
+    """Default local response: a short article built from the request"""
+    user = next((m['content'] for m in body['messages'] if m['role'] == 'user'), '')
+    topic = next((line[len('topic: '):] for line in user.splitlines() if line.startswith('topic: ')), 'Untitled')
+    return f"### {topic}\n\nGenerated by the local batch stand-in."
+
+
+class LocalBatchBackend:
+    """Local stand-in that mimics the batch file lifecycle in a directory.
+
+    Files are stored under root/files and batch objects under root/batches.
+    Each status poll advances a batch validating -> in_progress -> completed,
+    and completion runs responder over every request line to write the
+    output file, mirroring the JSONL format of the real API.
+    """
+
+    name = "local"
+    LIFECYCLE = ["validating", "in_progress", "completed"]
+
+    def __init__(self, root: Path, responder: Callable[[Dict], str] = echo_responder):
+        self.root = Path(root)
+        self.responder = responder
+        (self.root / "files").mkdir(parents=True, exist_ok=True)
+        (self.root / "batches").mkdir(parents=True, exist_ok=True)
+
+    def _batch_path(self, batch_id: str) -> Path:
+        return self.root / "batches" / f"{batch_id}.json"
+
+    def submit(self, input_path: Path) -> str:
+        file_id = f"file-{uuid.uuid4().hex}"
+        with open(input_path) as src, open(self.root / "files" / file_id, 'w') as dst:
+            dst.write(src.read())
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        with open(self._batch_path(batch_id), 'w') as f:
+            json.dump({'id': batch_id, 'status': 'validating', 'input_file_id': file_id,
+                       'output_file_id': None}, f)
+        return batch_id
+
+    def status(self, batch_id: str) -> Tuple[str, Optional[str]]:
+        with open(self._batch_path(batch_id)) as f:
+            batch = json.load(f)
+        if batch['status'] in self.LIFECYCLE[:-1]:
+            batch['status'] = self.LIFECYCLE[self.LIFECYCLE.index(batch['status']) + 1]
+            if batch['status'] == 'completed':
+                batch['output_file_id'] = self._run(batch['input_file_id'])
+            with open(self._batch_path(batch_id), 'w') as f:
+                json.dump(batch, f)
+        return batch['status'], batch['output_file_id']
+
+    def _run(self, input_file_id: str) -> str:
+        output_file_id = f"file-{uuid.uuid4().hex}"
+        with open(self.root / "files" / input_file_id) as src, \
+                open(self.root / "files" / output_file_id, 'w') as dst:
+            for line in src:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                content = self.responder(request['body'])
+                dst.write(json.dumps({
+                    'id': f"batch_req_{uuid.uuid4().hex}",
+                    'custom_id': request['custom_id'],
+                    'response': {
+                        'status_code': 200,
+                        'body': {
+                            'model': request['body']['model'],
+                            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}}],
+                            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0}
+                        }
+                    },
+                    'error': None
+                }) + "\n")
+        return output_file_id
+
+    def download(self, file_id: str) -> str:
+        with open(self.root / "files" / file_id) as f:
+            return f.read()
+
+
+def get_backend(config: Dict):
+    batch_config = config.get('batch', {})
+    if batch_config.get('backend', 'openai') == 'local':
+        root = batch_config.get('local_dir', os.path.join(config['folders']['articles'], '.batches', 'local'))
+        return LocalBatchBackend(Path(root))
+    from .config import client
+    return OpenAIBatchBackend(client)
+
+
+class BatchManager:
+    """Render pending topics into batch files and ingest the results as articles"""
+
+    def __init__(self, config: Dict, backend=None, article_generator: Optional[ArticleGenerator] = None):
+        self.config = config
+        self.articles_dir = Path(config['folders']['articles'])
+        self.records_dir = self.articles_dir / '.batches'
+        self.records_dir.mkdir(parents=True, exist_ok=True)
+        self.backend = backend or get_backend(config)
+        self.article_generator = article_generator
+
+    def _records(self) -> List[Tuple[Path, Dict]]:
+        records = []
+        for record_path in sorted(self.records_dir.glob('*.json')):
+            with open(record_path) as f:
+                records.append((record_path, json.load(f)))
+        return records
+
+    def _in_flight(self) -> set:
+        in_flight = set()
+        for _, record in self._records():
+            if record['status'] != 'collected':
+                in_flight.update(record['requests'])
+        return in_flight
+
+    def pending_topics(self, from_date: date, to_date: Optional[date] = None) -> List[Tuple[str, Dict]]:
+        """Topics in the date range that have no article and are not already batched"""
+        to_date = to_date or from_date
+        in_flight = self._in_flight()
+        pending = []
+        for entry in sorted(os.scandir(self.articles_dir), key=lambda e: e.name):
+            if not entry.is_dir() or entry.name.startswith('.') or entry.name in in_flight:
+                continue
+            topic_file = Path(entry.path) / 'topic.yaml'
+            if not topic_file.exists() or (Path(entry.path) / 'article.yaml').exists():
+                continue
+            with open(topic_file) as f:
+                topic = load_yaml(f) or {}
+            try:
+                topic_date = datetime.strptime(str(topic.get('date')), '%Y-%m-%d').date()
+            except ValueError:
+                continue
+            if from_date <= topic_date <= to_date:
+                pending.append((entry.name, topic))
+        return pending
+
+    def submit(self, from_date: date, to_date: Optional[date] = None) -> Optional[str]:
+        pending = self.pending_topics(from_date, to_date)
+        if not pending:
+            return None
+
+        route = get_routes(BATCH_PROMPT)[0]
+        generator = self.article_generator or ArticleGenerator(self.config)
+        input_path = self.records_dir / f"input-{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        requests = {}
+        with open(input_path, 'w') as f:
+            for custom_id, topic in pending:
+                messages = build_messages(BATCH_PROMPT, generator._prompt_data(topic))
+                if messages is None:
+                    logger.warning(f"Skipping topic '{custom_id}': prompt could not be built")
+                    continue
+                body = {'model': route['model'], 'messages': messages}
+                if route['max_tokens']:
+                    body['max_tokens'] = route['max_tokens']
+                f.write(json.dumps({'custom_id': custom_id, 'method': 'POST',
+                                    'url': BATCH_ENDPOINT, 'body': body}) + "\n")
+                requests[custom_id] = route['model']
+
+        if not requests:
+            input_path.unlink()
+            return None
+
+        batch_id = self.backend.submit(input_path)
+        record = {
+            'batch_id': batch_id,
+            'backend': self.backend.name,
+            'input_file': str(input_path),
+            'submitted': datetime.now().isoformat(),
+            'status': 'submitted',
+            'requests': requests
+        }
+        with open(self.records_dir / f"{batch_id}.json", 'w') as f:
+            json.dump(record, f, indent=2)
+        logger.info(f"Submitted batch {batch_id} with {len(requests)} requests")
+        return batch_id
+
+    def collect(self) -> Dict[str, int]:
+        """Ingest every completed batch through the normal article save path"""
+        stats = {'batches': 0, 'pending': 0, 'articles': 0, 'failed': 0}
+        for record_path, record in self._records():
+            if record['status'] == 'collected':
+                continue
+            status, output_file_id = self.backend.status(record['batch_id'])
+            if status in ('failed', 'expired', 'cancelled'):
+                logger.error(f"Batch {record['batch_id']} ended with status {status}")
+                record['status'] = 'collected'
+                record['result'] = status
+                stats['failed'] += len(record['requests'])
+            elif status != 'completed' or not output_file_id:
+                stats['pending'] += 1
+                continue
+            else:
+                created, failed = self._ingest(self.backend.download(output_file_id))
+                stats['articles'] += created
+                stats['failed'] += failed
+                record['status'] = 'collected'
+                record['result'] = status
+
+            stats['batches'] += 1
+            record['collected'] = datetime.now().isoformat()
+            with open(record_path, 'w') as f:
+                json.dump(record, f, indent=2)
+        return stats
+
+    def _ingest(self, output: str) -> Tuple[int, int]:
+        generator = self.article_generator or ArticleGenerator(self.config)
+        created = failed = 0
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            custom_id = result['custom_id']
+            response = result.get('response') or {}
+            if result.get('error') or response.get('status_code') != 200:
+                logger.error(f"Batch request {custom_id} failed: {result.get('error') or response}")
+                failed += 1
+                continue
+
+            body = response['body']
+            if body.get('usage'):
+                record_usage(BATCH_PROMPT, body.get('model', ''), 0.0, types.SimpleNamespace(**body['usage']))
+            try:
+                with open(self.articles_dir / custom_id / 'topic.yaml') as f:
+                    topic = load_yaml(f)
+                content = body['choices'][0]['message']['content'].strip()
+                generator.create(topic, content=content)
+                created += 1
+            except (OSError, KeyError, ArticleError) as e:
+                logger.error(f"Failed to ingest batch result for {custom_id}: {e}")
+                failed += 1
+        return created, failed
@@ -4,26 +4,32 @@ from .config import config
 from .topic import TopicGenerator
 from .article import Article, ArticleGenerator
 from .utils import create_config_folders
-from .wordpress_client import WordPressAPIClient
+from .wordpress_client import create_wordpress_clients, WordPressError
+from .static_export import StaticExporter
+from .prompt import routing_report
+from .limiter import limits_report
+from .batch import BatchManager
+from .reservoir import TopicReservoir
+from .worker import Worker
+from .lease import Lease
+from .tracing import traced_run
+from .media_gc import gc_media, MediaGCError
 from pathlib import Path
 
 def upload_article(file_path: Path) -> None:
     article = Article.load(file_path)
-    if 'wordpress' in config:
-        wp_client = WordPressAPIClient(
-            config['wordpress']['url'],
-            config['wordpress']['username'],
-            config['wordpress']['password']
-        )
-    else:
-        wp_client = None
-
+    wp_client = create_wordpress_clients(config)
     
     if not wp_client:
         print("WordPress client not configured")
         return
         
+    lease = Lease(Path(file_path).parent / ".lease", ttl=config.get('lease', {}).get('ttl', 120))
+    if not lease.acquire():
+        print(f"Article is being processed by another worker: {article.title}")
+        return
     try:
+        article = Article.load(file_path)
         if article.upload_to_wordpress(wp_client):
             print(f"Successfully uploaded article: {article.title}")
             article.save()
@@ -31,27 +37,88 @@ def upload_article(file_path: Path) -> None:
             print(f"Failed to upload article: {article.title}")
     except Exception as e:
         print(f"Error uploading article: {e}")
+    finally:
+        lease.release()
 
 def generate_topics(from_date: datetime, to_date: datetime, count: int, rebuild: bool) -> None:
     topic_generator = TopicGenerator(config)
-    topics = topic_generator.generate_topics(from_date, to_date, count, rebuild)
-    if topics:
-        print(f"Generated {len(topics)} topics")
+    generated = sum(1 for _ in topic_generator.generate_topics(from_date, to_date, count, rebuild))
+    if generated:
+        print(f"Generated {generated} topics")
+    print(topic_generator.report_stats())
+    print(routing_report())
+    print(limits_report())
 
 def generate_articles(from_date: datetime, to_date: datetime, count: int, rebuild: bool, file_path: Path = None) -> None:
     topic_generator = TopicGenerator(config)
     article_generator = ArticleGenerator(config)
+    reservoir = None
+    if config.get('reservoir', {}).get('enabled', False):
+        reservoir = TopicReservoir(config, topic_generator)
+        reservoir.start()
     
-    if file_path:
-        article = Article.load(file_path)
-        articles = article_generator.generate_batch([article])
-    else:
-        topics = topic_generator.generate_topics(from_date, to_date, count, rebuild)
-        if topics:
+    try:
+        if file_path:
+            article = Article.load(file_path)
+            articles = article_generator.generate_batch([article])
+        else:
+            # Articles start as soon as the first topic is saved
+            topics = topic_generator.generate_topics(from_date, to_date, count, rebuild, report=False)
             articles = article_generator.generate_batch(topics)
-            
+    finally:
+        if reservoir:
+            reservoir.stop()
+
     if articles:
         print(f"Generated {len(articles)} articles")
+    print(routing_report())
+    print(limits_report())
+
+def refill_reservoir() -> None:
+    topic_generator = TopicGenerator(config)
+    added = TopicReservoir(config, topic_generator).refill()
+    print(f"Added {added} topics to the reservoir")
+    print(topic_generator.report_stats())
+
+def batch_submit(from_date: datetime, to_date: datetime) -> None:
+    batch_id = BatchManager(config).submit(from_date, to_date)
+    if batch_id:
+        print(f"Submitted batch {batch_id}")
+    else:
+        print("No pending topics to submit")
+
+def batch_collect() -> None:
+    stats = BatchManager(config).collect()
+    print(f"Collected {stats['batches']} batches: {stats['articles']} articles created, "
+          f"{stats['failed']} failed, {stats['pending']} batches still pending")
+    print(routing_report())
+
+def export_static(output_dir: Path) -> None:
+    exporter = StaticExporter(config, output_dir)
+    stats = exporter.export()
+    print(f"Exported {stats['articles']} articles to {output_dir} "
+          f"({stats['rendered']} rendered, {stats['failed']} failed, {stats['removed']} removed, "
+          f"{stats['indexes_written']} index pages written)")
+
+def collect_media_garbage(dry_run: bool) -> None:
+    wp_client = create_wordpress_clients(config)
+    if not wp_client:
+        print("WordPress client not configured")
+        return
+    gc_config = config.get('media_gc', {})
+    clients = wp_client if isinstance(wp_client, dict) else {wp_client.name: wp_client}
+    for name, client in clients.items():
+        try:
+            stats = gc_media(client, dry_run=dry_run, workers=gc_config.get('workers', 8),
+                             min_age_hours=gc_config.get('min_age_hours', 24))
+        except (MediaGCError, WordPressError) as e:
+            print(f"{name}: skipped, {e}")
+            continue
+        if dry_run:
+            print(f"{name}: {stats['orphans']} orphaned media items (dry run, nothing deleted)")
+        else:
+            print(f"{name}: {stats['orphans']} orphaned media items, {stats['deleted']} deleted, "
+                  f"{stats['failed']} failed")
 
 
 def main():
@@ -100,10 +167,62 @@ def main():
         help="YAML file path",
         default=None
     )
+    parser.add_argument(
+        "--export-static",
+        type=str,
+        metavar="DIR",
+        help="Export the archive as a static site",
+        default=None
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run as a worker processing jobs from the spool directory"
+    )
+    parser.add_argument(
+        "--refill-reservoir",
+        action="store_true",
+        help="Top up the topic reservoir for upcoming dates"
+    )
+    parser.add_argument(
+        "--batch-submit",
+        action="store_true",
+        help="Submit pending topics in the date range as a batch"
+    )
+    parser.add_argument(
+        "--batch-collect",
+        action="store_true",
+        help="Create articles from completed batches"
+    )
+    parser.add_argument(
+        "--gc-media",
+        action="store_true",
+        help="Delete WordPress media not used by any post or page"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="With --gc-media, only list what would be deleted"
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="Record per-stage spans as JSONL and Chrome trace files"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the run and write the output next to the run log"
+    )
     
     args = parser.parse_args()
     create_config_folders(config)
 
+    with traced_run(config, trace=args.trace, profile=args.profile):
+        run(parser, args)
+
+def run(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+
     from_date = datetime.strptime(args.from_date, '%Y-%m-%d').date()
     to_date = datetime.strptime(args.to_date, '%Y-%m-%d').date() if args.to_date else None
     file_path = Path(args.file) if args.file else None
@@ -113,6 +232,18 @@ def main():
             print("--file required for upload")
             return
         upload_article(file_path)
+    elif args.serve:
+        Worker(config).serve()
+    elif args.refill_reservoir:
+        refill_reservoir()
+    elif args.batch_submit:
+        batch_submit(from_date, to_date)
+    elif args.batch_collect:
+        batch_collect()
+    elif args.gc_media:
+        collect_media_garbage(args.dry_run)
+    elif args.export_static:
+        export_static(Path(args.export_static))
     elif args.topic:
         generate_topics(from_date, to_date, args.count, args.rebuild)
     elif args.article:
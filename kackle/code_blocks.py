@@ -1,34 +1,47 @@
 import re
 import json
+import threading
 import markdown
 from dataclasses import dataclass, asdict
 from typing import Optional
 from typing import List, Tuple
 
+# Bump whenever the rendered output changes so cached HTML is invalidated
+RENDERER_VERSION = "2"
+
+MARKDOWN_EXTENSIONS = [
+    'markdown.extensions.fenced_code',
+    'markdown.extensions.tables',
+    'markdown.extensions.nl2br',
+    'markdown.extensions.sane_lists'
+]
+
+CODE_BLOCK_PATTERN = re.compile(r'```(\w+)\n(.*?)```', re.DOTALL)
+
+_local = threading.local()
 
 
 def format_code(code: str, language: str) -> str:
     return f'<pre lang="{language}" line="1">{code}</pre>'
 
+def _replace_codeblock(match: re.Match) -> str:
+    language, code = match.group(1), match.group(2)
+    return format_code(code.strip(), language.upper())
+
 def convert_codeblocks(markdown: str) -> str:
-    # Handle code blocks first
-    pattern = r'```(\w+)\n(.*?)```'
-    result = markdown
-    
-    for language, code in re.findall(pattern, markdown, re.DOTALL):
-        original = f"```{language}\n{code}```"
-        formatted = format_code(code.strip(), language.upper())
-        result = result.replace(original, formatted)
-    
-    return result
+    """Transform fenced code blocks in a single pass"""
+    return CODE_BLOCK_PATTERN.sub(_replace_codeblock, markdown)
+
+def get_markdown() -> markdown.Markdown:
+    """Return this thread's Markdown instance, reset for a new document"""
+    md = getattr(_local, 'md', None)
+    if md is None:
+        md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+        _local.md = md
+    return md.reset()
 
 def convert_markdown_to_wp(markdown_text: str) -> str:
     markdown_text=convert_codeblocks(markdown_text)
-    # Convert markdown to HTML with extensions
-    html = markdown.markdown(markdown_text, extensions=[
-        'markdown.extensions.fenced_code',
-        'markdown.extensions.tables',
-        'markdown.extensions.nl2br',
-        'markdown.extensions.sane_lists'
-    ])
-    return html
\ No newline at end of file
+    # Convert markdown to HTML with the pooled per-thread renderer
+    html = get_markdown().convert(markdown_text)
+    return html
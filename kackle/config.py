@@ -12,5 +12,6 @@ config = load_configs()
 
 client = OpenAI(
     api_key=config['openai']['api_key'],
-    organization=config['openai']['orginization_id']
+    organization=config['openai']['orginization_id'],
+    base_url=config['openai'].get('base_url')
 )
\ No newline at end of file
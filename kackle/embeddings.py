@@ -0,0 +1,188 @@
+import os
+import json
+import fcntl
+import time
+import logging
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EMBED_BATCH_SIZE = 256
+
+
+def topic_text(topic: Dict) -> str:
+    return f"{topic.get('topic', '')}\n{topic.get('description', '')}".strip()
+
+
+class TopicIndex:
+    """Embedding index of every known topic for semantic dedup.
+
+    Vectors are unit-normalized float32 rows of one contiguous matrix, so a
+    candidate is checked against the whole archive with a single
+    matrix-vector product. On disk the matrix is a raw float32 file that new
+    rows are appended to, next to a JSON-lines file of their keys. Appends
+    and loads hold an flock on .lock, so processes sharing the archive never
+    interleave rows, and a row left half-written by a crash is cut from both
+    files before the next append.
+    """
+
+    def __init__(self, config: Dict, embed: Optional[Callable[[List[str]], np.ndarray]] = None):
+        dedup_config = config.get('dedup', {})
+        self.threshold = dedup_config.get('semantic_threshold', 0.85)
+        self.model = config['openai'].get('embedding-model', 'text-embedding-3-small')
+        self.folder = Path(config['folders']['articles']) / '.embeddings'
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.folder / 'vectors.f32'
+        self.keys_path = self.folder / 'keys.jsonl'
+        self.meta_path = self.folder / 'meta.json'
+        self.lock_path = self.folder / '.lock'
+        self._embed_fn = embed or self._embed_openai
+        self._lock = threading.Lock()
+
+        self.keys = []
+        self.dim = None
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self.size = 0
+        self._load()
+
+    # Storage -------------------------------------------------------------
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock on the on-disk index across processes"""
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _truncate_to_rows(self) -> int:
+        """Cut both files back to the rows they each hold in full; caller holds the file lock"""
+        try:
+            with open(self.keys_path, 'rb') as f:
+                lines = f.read().splitlines(keepends=True)
+        except FileNotFoundError:
+            lines = []
+        if lines and not lines[-1].endswith(b"\n"):
+            lines.pop()
+        row_bytes = self.dim * np.dtype(np.float32).itemsize
+        vectors_size = self.vectors_path.stat().st_size if self.vectors_path.exists() else 0
+        rows = min(len(lines), vectors_size // row_bytes)
+        keys_size = sum(len(line) for line in lines[:rows])
+        for path, size in ((self.vectors_path, rows * row_bytes), (self.keys_path, keys_size)):
+            if path.exists() and path.stat().st_size != size:
+                logger.warning(f"Truncating {path.name} to {rows} complete rows")
+                os.truncate(path, size)
+        return rows
+
+    def _load(self) -> None:
+        with self._file_lock():
+            try:
+                with open(self.meta_path) as f:
+                    meta = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                return
+            if meta.get('model') != self.model:
+                logger.info(f"Embedding model changed to {self.model}, rebuilding topic index")
+                for path in (self.vectors_path, self.keys_path, self.meta_path):
+                    path.unlink(missing_ok=True)
+                return
+
+            self.dim = meta['dim']
+            rows = self._truncate_to_rows()
+            with open(self.keys_path) as f:
+                keys = [json.loads(line) for line in f if line.strip()]
+            vectors = np.fromfile(self.vectors_path, dtype=np.float32)
+        self.keys = keys[:rows]
+        self._matrix = np.ascontiguousarray(vectors[:rows * self.dim].reshape(rows, self.dim))
+        self.size = rows
+
+    def _append_rows(self, keys: List[str], vectors: np.ndarray) -> None:
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+            with self._file_lock():
+                if not self.meta_path.exists():
+                    with open(self.meta_path, 'w') as f:
+                        json.dump({'model': self.model, 'dim': self.dim}, f)
+            self._matrix = np.zeros((max(64, len(keys)), self.dim), dtype=np.float32)
+
+        needed = self.size + len(keys)
+        if needed > self._matrix.shape[0]:
+            grown = np.zeros((max(needed, self._matrix.shape[0] * 2), self.dim), dtype=np.float32)
+            grown[:self.size] = self._matrix[:self.size]
+            self._matrix = grown
+        self._matrix[self.size:needed] = vectors
+        self.size = needed
+        self.keys.extend(keys)
+
+        with self._file_lock():
+            self._truncate_to_rows()
+            with open(self.vectors_path, 'ab') as f:
+                f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+            with open(self.keys_path, 'a', encoding='utf-8') as f:
+                f.write("".join(json.dumps(key) + "\n" for key in keys))
+
+    # Embedding -----------------------------------------------------------
+
+    def _embed_openai(self, texts: List[str]) -> np.ndarray:
+        from .config import client
+        from .prompt import record_usage
+        from .limiter import get_limiter
+        with get_limiter('openai').slot('embeddings'):
+            started = time.monotonic()
+            response = client.embeddings.create(model=self.model, input=texts)
+        record_usage('embeddings', self.model, time.monotonic() - started, response.usage)
+        return np.array([item.embedding for item in response.data], dtype=np.float32)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.asarray(self._embed_fn(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    # Queries -------------------------------------------------------------
+
+    def sync(self, topics: Iterable[Dict]) -> int:
+        """Embed and append every topic that is not indexed yet"""
+        with self._lock:
+            known = set(self.keys)
+            missing = []
+            for topic in topics:
+                key = topic.get('topic')
+                if key and key not in known:
+                    known.add(key)
+                    missing.append(topic)
+            for start in range(0, len(missing), EMBED_BATCH_SIZE):
+                batch = missing[start:start + EMBED_BATCH_SIZE]
+                vectors = self.embed([topic_text(topic) for topic in batch])
+                self._append_rows([topic['topic'] for topic in batch], vectors)
+        if missing:
+            logger.info(f"Indexed {len(missing)} topics for semantic dedup")
+        return len(missing)
+
+    def nearest(self, vector: np.ndarray) -> Tuple[float, Optional[str]]:
+        """Highest cosine similarity against the archive and the matching key"""
+        with self._lock:
+            if self.size == 0:
+                return 0.0, None
+            scores = self._matrix[:self.size] @ vector
+            index = int(np.argmax(scores))
+            return float(scores[index]), self.keys[index]
+
+    def check(self, topic: Dict) -> Tuple[bool, float, Optional[str], np.ndarray]:
+        """Return (is_duplicate, score, closest_key, vector) for a candidate topic"""
+        vector = self.embed([topic_text(topic)])[0]
+        score, key = self.nearest(vector)
+        return score >= self.threshold, score, key, vector
+
+    def add(self, topic: Dict, vector: Optional[np.ndarray] = None) -> None:
+        if vector is None:
+            vector = self.embed([topic_text(topic)])[0]
+        with self._lock:
+            self._append_rows([topic['topic']], vector.reshape(1, -1))
@@ -0,0 +1,191 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_MB = 64
+
+
+class HTTPCache:
+    """On-disk cache of GET responses revalidated with conditional requests.
+
+    Responses that carry an ETag or Last-Modified header are stored as
+    <key>.body plus a <key>.json sidecar of their validators. The next GET of
+    the same URL sends If-None-Match/If-Modified-Since; on a 304 the stored
+    body is served instead, so an unchanged resource costs headers only.
+    Every request is still revalidated, so nothing is served stale.
+
+    Total body size is bounded: least recently used entries are evicted,
+    with use order restored from sidecar mtimes on startup.
+    """
+
+    def __init__(self, folder: str, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        sidecars = sorted(self.folder.glob('*.json'), key=lambda path: path.stat().st_mtime)
+        for sidecar in sidecars:
+            try:
+                with open(sidecar) as f:
+                    meta = json.load(f)
+                self.entries[sidecar.stem] = meta['size']
+                self.size += meta['size']
+            except (OSError, ValueError, KeyError):
+                self._remove(sidecar.stem)
+        self._evict()
+
+    def _paths(self, key: str):
+        return self.folder / f"{key}.json", self.folder / f"{key}.body"
+
+    def _remove(self, key: str) -> None:
+        for path in self._paths(key):
+            path.unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        while self.size > self.max_bytes and self.entries:
+            key, size = self.entries.popitem(last=False)
+            self.size -= size
+            self._remove(key)
+
+    @staticmethod
+    def key(url: str, scope: str = '') -> str:
+        """Cache key for a fully encoded URL; scope separates credentials"""
+        return hashlib.sha256(f"{scope}\0{url}".encode('utf-8')).hexdigest()
+
+    def _meta(self, key: str) -> Optional[Dict]:
+        sidecar, _ = self._paths(key)
+        try:
+            with open(sidecar) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def conditional_headers(self, key: str) -> Dict[str, str]:
+        """Validator headers to send for key, empty when nothing is cached"""
+        with self._lock:
+            if key not in self.entries:
+                return {}
+        meta = self._meta(key)
+        if meta is None:
+            return {}
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def store(self, key: str, response: requests.Response) -> None:
+        """Keep a 200 response that has validators"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        body = response.content
+        if response.status_code != 200 or not (etag or last_modified) or len(body) > self.max_bytes:
+            return
+        meta = {
+            'url': response.url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'content_type': response.headers.get('Content-Type'),
+            'encoding': response.encoding,
+            'size': len(body)
+        }
+        sidecar, body_path = self._paths(key)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(f"{body_path}{suffix}", 'wb') as f:
+                f.write(body)
+            os.replace(f"{body_path}{suffix}", body_path)
+            with open(f"{sidecar}{suffix}", 'w') as f:
+                json.dump(meta, f)
+            os.replace(f"{sidecar}{suffix}", sidecar)
+        except OSError as e:
+            logger.warning(f"Failed to write HTTP cache entry for {response.url}: {e}")
+            return
+        with self._lock:
+            self.size += len(body) - self.entries.pop(key, 0)
+            self.entries[key] = len(body)
+            self._evict()
+
+    def revalidated(self, key: str, response: requests.Response) -> Optional[requests.Response]:
+        """Stored response for a 304, or None when the entry has gone missing"""
+        meta = self._meta(key)
+        sidecar, body_path = self._paths(key)
+        try:
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except OSError:
+            body = None
+        if meta is None or body is None:
+            with self._lock:
+                self.size -= self.entries.pop(key, 0)
+            self._remove(key)
+            return None
+
+        # A 304 may carry updated validators
+        updated = {'etag': response.headers.get('ETag') or meta['etag'],
+                   'last_modified': response.headers.get('Last-Modified') or meta['last_modified']}
+        try:
+            if updated != {'etag': meta['etag'], 'last_modified': meta['last_modified']}:
+                meta.update(updated)
+                with open(sidecar, 'w') as f:
+                    json.dump(meta, f)
+            else:
+                os.utime(sidecar)
+        except OSError:
+            pass
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+
+        cached = requests.Response()
+        cached.status_code = 200
+        cached._content = body
+        cached.headers = CaseInsensitiveDict(response.headers)
+        if meta.get('content_type'):
+            cached.headers['Content-Type'] = meta['content_type']
+        cached.headers['Content-Length'] = str(len(body))
+        cached.encoding = meta.get('encoding')
+        cached.url = response.url
+        cached.request = response.request
+        cached.elapsed = response.elapsed
+        cached.from_cache = True
+        return cached
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self.entries):
+                self._remove(key)
+            self.entries.clear()
+            self.size = 0
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def http_cache_from_config(config: Dict) -> Optional[HTTPCache]:
+    """Shared cache for config's http_cache section, None when disabled"""
+    cache_config = config.get('http_cache', {})
+    if not cache_config.get('enabled', True):
+        return None
+    folder = cache_config.get('dir', '.http_cache')
+    with _caches_lock:
+        if folder not in _caches:
+            _caches[folder] = HTTPCache(folder, int(cache_config.get('max_mb', DEFAULT_MAX_MB) * 1024 * 1024))
+        return _caches[folder]
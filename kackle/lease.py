@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import uuid
+import socket
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 120
+
+
+class LeaseError(Exception):
+    """Raised when a lease is held by another worker"""
+    pass
+
+
+def new_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def read_lease(path: Path) -> Optional[Dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError):
+        # A half-written lease is treated as expired once its file is old enough
+        try:
+            return {'owner': None, 'expires': os.stat(path).st_mtime + DEFAULT_TTL}
+        except FileNotFoundError:
+            return None
+
+
+class Lease:
+    """Expiring, heartbeated lock file shared between workers and hosts.
+
+    Acquiring creates the file with O_EXCL. While held, a heartbeat thread
+    pushes the expiry forward every ttl/3 seconds. A lease whose expiry has
+    passed is stale: it is reclaimed by renaming it aside (only one claimer's
+    rename can succeed) before a fresh exclusive create. Expiry uses wall
+    clock time, so hosts sharing a mount need reasonably synced clocks.
+    """
+
+    def __init__(self, path: Union[str, Path], ttl: float = DEFAULT_TTL, owner: Optional[str] = None):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.owner = owner or new_owner()
+        self.held = False
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _payload(self) -> str:
+        return json.dumps({'owner': self.owner, 'expires': time.time() + self.ttl,
+                           'host': socket.gethostname(), 'pid': os.getpid()})
+
+    def _create(self) -> bool:
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w') as f:
+            f.write(self._payload())
+        return True
+
+    def _reclaim_stale(self) -> bool:
+        current = read_lease(self.path)
+        if current is None:
+            return True
+        if current.get('expires', 0) > time.time():
+            return False
+
+        stale_path = self.path.with_name(f"{self.path.name}.stale.{uuid.uuid4().hex[:8]}")
+        try:
+            os.rename(self.path, stale_path)
+        except FileNotFoundError:
+            # Someone else reclaimed or released it first
+            return True
+        moved = read_lease(stale_path)
+        if moved and moved.get('expires', 0) > time.time():
+            # The holder renewed between our read and rename: put it back
+            try:
+                os.link(stale_path, self.path)
+            except FileExistsError:
+                pass
+            stale_path.unlink(missing_ok=True)
+            return False
+        logger.warning(f"Reclaimed stale lease {self.path} from {current.get('owner')}")
+        stale_path.unlink(missing_ok=True)
+        return True
+
+    def acquire(self) -> bool:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if not self._create():
+            if not self._reclaim_stale() or not self._create():
+                return False
+        self.held = True
+        self.lost.clear()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._heartbeat, name=f"lease-{self.path.name}", daemon=True)
+        self._thread.start()
+        return True
+
+    def owned(self) -> bool:
+        current = read_lease(self.path)
+        return bool(current) and current.get('owner') == self.owner
+
+    def renew(self) -> bool:
+        if not self.owned():
+            self.lost.set()
+            return False
+        tmp_path = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        with open(tmp_path, 'w') as f:
+            f.write(self._payload())
+        os.replace(tmp_path, self.path)
+        return True
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(self.ttl / 3):
+            try:
+                if not self.renew():
+                    logger.error(f"Lost lease {self.path}")
+                    return
+            except OSError as e:
+                logger.warning(f"Lease heartbeat failed for {self.path}: {e}")
+
+    def release(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if self.held and self.owned():
+            self.path.unlink(missing_ok=True)
+        self.held = False
+
+    def __enter__(self) -> 'Lease':
+        if not self.acquire():
+            raise LeaseError(f"Lease held by another worker: {self.path}")
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
@@ -0,0 +1,183 @@
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Settings per upstream kind; limits.<kind> in config.yaml overrides them
+DEFAULTS = {
+    'openai': {'initial': 8, 'max': 64},
+    'replicate': {'initial': 4, 'max': 16},
+    'wordpress': {'initial': 4, 'max': 16},
+}
+
+
+def overload_reason(error: BaseException) -> Optional[str]:
+    """Why error means the upstream is overloaded, or None for other failures"""
+    status = getattr(error, 'status_code', None) or getattr(error, 'status', None)
+    if isinstance(status, int) and (status == 429 or status >= 500):
+        return f"HTTP {status}"
+    name = type(error).__name__
+    if isinstance(error, (TimeoutError, ConnectionError)) or 'Timeout' in name or 'Connection' in name:
+        return name
+    return None
+
+
+class Slot:
+    """One in-flight request; call fail() when the response signals overload"""
+
+    __slots__ = ('operation', 'started', 'reason')
+
+    def __init__(self, operation: str, started: float):
+        self.operation = operation
+        self.started = started
+        self.reason = None
+
+    def fail(self, reason: str) -> None:
+        self.reason = reason
+
+
+class AdaptiveLimiter:
+    """AIMD limit on concurrent requests to one upstream.
+
+    Every healthy response while the limit is in use raises it by 1/limit,
+    about one more slot per round of requests. A 429, 5xx, timeout or a
+    latency spike (latency_spike times the operation's usual latency)
+    multiplies it by backoff, once per congestion event: responses to
+    requests sent before the last cut do not cut again. Changes of the
+    whole-number limit are logged.
+    """
+
+    def __init__(self, name: str, initial: int = 4, minimum: int = 1, maximum: int = 64,
+                 backoff: float = 0.5, latency_spike: float = 3.0, min_spike: float = 1.0,
+                 smoothing: float = 0.1, adaptive: bool = True):
+        self.name = name
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.backoff = backoff
+        self.latency_spike = latency_spike
+        self.min_spike = min_spike
+        self.smoothing = smoothing
+        self.adaptive = adaptive
+        self.in_flight = 0
+        self.peak = self.limit
+        self.stats = {'requests': 0, 'increases': 0, 'decreases': 0, 'waits': 0, 'wait_seconds': 0.0}
+        # Usual latency per operation, an exponentially weighted mean of healthy calls
+        self.baselines: Dict[str, float] = {}
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, operation: str = '') -> Slot:
+        with self._cond:
+            if self.in_flight >= int(self.limit):
+                waited = time.monotonic()
+                self.stats['waits'] += 1
+                while self.in_flight >= int(self.limit):
+                    self._cond.wait()
+                self.stats['wait_seconds'] += time.monotonic() - waited
+            self.in_flight += 1
+            self.stats['requests'] += 1
+        return Slot(operation, time.monotonic())
+
+    def release(self, slot: Slot) -> None:
+        latency = time.monotonic() - slot.started
+        with self._cond:
+            # Whether this request was using the whole limit when it finished
+            saturated = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+            if self.adaptive:
+                baseline = self.baselines.get(slot.operation)
+                reason = slot.reason
+                if reason is None and baseline and latency > max(self.latency_spike * baseline, self.min_spike):
+                    reason = f"latency {latency:.1f}s vs usual {baseline:.1f}s for {slot.operation}"
+                if reason:
+                    self._decrease(reason, slot.started)
+                else:
+                    self.baselines[slot.operation] = latency if baseline is None else \
+                        baseline + self.smoothing * (latency - baseline)
+                    if saturated:
+                        self._increase()
+            self._cond.notify_all()
+
+    def _increase(self) -> None:
+        previous = self.limit
+        self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        self.peak = max(self.peak, self.limit)
+        if int(self.limit) > int(previous):
+            self.stats['increases'] += 1
+            logger.info(f"Limiter {self.name}: {int(previous)} -> {int(self.limit)} in flight (healthy)")
+
+    def _decrease(self, reason: str, started: float) -> None:
+        if started < self._last_decrease:
+            return
+        previous = self.limit
+        self.limit = max(self.minimum, self.limit * self.backoff)
+        self._last_decrease = time.monotonic()
+        self.stats['decreases'] += 1
+        logger.warning(f"Limiter {self.name}: {int(previous)} -> {int(self.limit)} in flight ({reason})")
+
+    @contextmanager
+    def slot(self, operation: str = '') -> Iterator[Slot]:
+        """Hold one slot for the block; overload errors raised inside cut the limit"""
+        slot = self.acquire(operation)
+        try:
+            yield slot
+        except BaseException as e:
+            slot.reason = slot.reason or overload_reason(e)
+            raise
+        finally:
+            self.release(slot)
+
+    def snapshot(self) -> Dict:
+        with self._cond:
+            return dict(self.stats, name=self.name, limit=int(self.limit), peak=int(self.peak),
+                        in_flight=self.in_flight)
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str, kind: Optional[str] = None, maximum: Optional[int] = None) -> AdaptiveLimiter:
+    """Process-wide limiter for an upstream, built from config['limits'] on first use.
+
+    kind selects the settings when several limiters share them, e.g. one
+    per WordPress site; maximum caps the configured max.
+    """
+    with _limiters_lock:
+        if name not in _limiters:
+            from .config import config
+            limits_config = config.get('limits', {})
+            kind = kind or name
+            settings = dict(DEFAULTS.get(kind, {}), **(limits_config.get(kind) or {}))
+            if maximum:
+                settings['max'] = min(settings.get('max', maximum), maximum)
+            _limiters[name] = AdaptiveLimiter(
+                name,
+                initial=settings.get('initial', 4),
+                minimum=settings.get('min', 1),
+                maximum=settings.get('max', 64),
+                backoff=limits_config.get('backoff', 0.5),
+                latency_spike=limits_config.get('latency_spike', 3.0),
+                adaptive=limits_config.get('adaptive', True)
+            )
+        return _limiters[name]
+
+
+def limits_report() -> str:
+    """Current and peak limit per upstream with the decisions taken"""
+    with _limiters_lock:
+        limiters = sorted(_limiters.values(), key=lambda limiter: limiter.name)
+    rows = [limiter.snapshot() for limiter in limiters]
+    rows = [row for row in rows if row['requests']]
+    if not rows:
+        return ""
+    lines = [f"{'upstream':<28} {'limit':>5} {'peak':>5} {'requests':>8} {'up':>4} {'down':>4} "
+             f"{'waits':>6} {'wait s':>8}"]
+    for row in rows:
+        lines.append(f"{row['name'][:28]:<28} {row['limit']:>5} {row['peak']:>5} {row['requests']:>8} "
+                     f"{row['increases']:>4} {row['decreases']:>4} {row['waits']:>6} {row['wait_seconds']:>8.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,121 @@
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, Set, Tuple
+
+import requests
+
+from .wordpress_client import WordPressAPIClient, WordPressError
+
+logger = logging.getLogger(__name__)
+
+# Statuses a post or page can reference media from
+POST_STATUSES = 'publish,future,draft,pending,private'
+# Oldest first by ID, so posts created during a scan land on later pages
+STABLE_ORDER = {'orderby': 'id', 'order': 'asc'}
+IMAGE_CLASS = re.compile(r'wp-image-(\d+)')
+UPLOAD_PATH = re.compile(r'/wp-content/uploads/[^"\'\s)?#]+')
+# Resized copies (-300x200) and big-image scaling (-scaled) of one upload
+SIZE_SUFFIX = re.compile(r'-(?:\d+x\d+|scaled)(?=\.[A-Za-z0-9]+$)')
+
+
+class MediaGCError(Exception):
+    """Raised when references cannot be collected completely, so nothing may be deleted"""
+    pass
+
+
+def upload_key(url: str) -> str:
+    """Upload path of url with any size suffix removed"""
+    match = UPLOAD_PATH.search(url or '')
+    return SIZE_SUFFIX.sub('', match.group(0)) if match else ''
+
+
+def collect_references(wp_client: WordPressAPIClient) -> Tuple[Set[int], Set[str]]:
+    """Media IDs and upload paths referenced by any post or page.
+
+    Posts are streamed a page at a time with only id, featured_media and
+    content requested. Memory grows with the number of references, not with
+    post content. The edit context returns the stored content (content.raw),
+    which is also there for password-protected posts whose rendered content
+    is empty.
+
+    A reference missed here gets its media deleted, so any scan that may be
+    incomplete raises MediaGCError: API errors, a protected post whose
+    content cannot be read, and posts added or removed while paging.
+    """
+    try:
+        return _collect_references(wp_client)
+    except (WordPressError, requests.RequestException) as e:
+        raise MediaGCError(f"Incomplete reference scan of {wp_client.name}: {e}") from e
+
+
+def _collect_references(wp_client: WordPressAPIClient) -> Tuple[Set[int], Set[str]]:
+    media_ids, paths = set(), set()
+    for collection in ('/posts', '/pages'):
+        params = dict(STABLE_ORDER, status=POST_STATUSES, context='edit')
+        for post in wp_client.iter_collection(collection, params=params,
+                                              fields=['id', 'featured_media', 'content'], strict=True):
+            if post.get('featured_media'):
+                media_ids.add(post['featured_media'])
+            post_content = post.get('content') or {}
+            content = post_content.get('raw')
+            if content is None:
+                if post_content.get('protected'):
+                    raise MediaGCError(f"Cannot read protected {collection[1:-1]} {post['id']} on {wp_client.name}")
+                content = post_content.get('rendered') or ''
+            media_ids.update(int(media_id) for media_id in IMAGE_CLASS.findall(content))
+            paths.update(SIZE_SUFFIX.sub('', path) for path in UPLOAD_PATH.findall(content))
+    return media_ids, paths
+
+
+def find_orphans(wp_client: WordPressAPIClient, min_age_hours: float = 24) -> Iterator[Dict]:
+    """Yield unattached media that no post or page references.
+
+    Media younger than min_age_hours is skipped so uploads from posts that
+    are still being created are never treated as orphans.
+    """
+    media_ids, paths = collect_references(wp_client)
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=min_age_hours)
+    for media in wp_client.iter_collection('/media', params=STABLE_ORDER,
+                                           fields=['id', 'date_gmt', 'post', 'source_url']):
+        if media.get('post') or media['id'] in media_ids:
+            continue
+        if upload_key(media.get('source_url')) in paths:
+            continue
+        if media.get('date_gmt'):
+            uploaded = datetime.fromisoformat(media['date_gmt']).replace(tzinfo=timezone.utc)
+            if uploaded > cutoff:
+                continue
+        yield media
+
+
+def gc_media(wp_client: WordPressAPIClient, dry_run: bool = True, workers: int = 8,
+             min_age_hours: float = 24) -> Dict:
+    """Delete orphaned media, or only report it when dry_run.
+
+    Orphan IDs are collected before anything is deleted, since deleting
+    while paging would shift later pages and skip items. Memory therefore
+    grows with the referenced media and the orphans found; it is not
+    constant in the size of the library.
+    """
+    stats = {'orphans': 0, 'deleted': 0, 'failed': 0}
+    orphan_ids = []
+    for media in find_orphans(wp_client, min_age_hours):
+        stats['orphans'] += 1
+        if dry_run:
+            print(f"[{wp_client.name}] orphan {media['id']} {media.get('date_gmt', '')} {media.get('source_url', '')}")
+        else:
+            orphan_ids.append(media['id'])
+
+    if orphan_ids:
+        logger.info(f"Deleting {len(orphan_ids)} orphaned media items from {wp_client.name}")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for media_id, deleted in zip(orphan_ids, pool.map(
+                    lambda media_id: wp_client.delete_media(media_id, force=True), orphan_ids)):
+                if deleted:
+                    stats['deleted'] += 1
+                else:
+                    stats['failed'] += 1
+                    logger.warning(f"Failed to delete media {media_id} from {wp_client.name}")
+    return stats
@@ -1,7 +1,10 @@
 import re
 import os
 import io
+import time
 import replicate
+from replicate.exceptions import ModelError
+from replicate.helpers import transform_output
 import requests
 from datetime import datetime
 from PIL import Image
@@ -9,6 +12,9 @@ import openai
 import logging
 
 from .utils import clean_title, compress_image
+from .tracing import span, start_span
+from .accounting import ledger
+from .limiter import get_limiter, overload_reason
 from .config import client, config
 
 
@@ -39,59 +45,168 @@ def get_prompts():
 
 prompts=get_prompts()
 
-def generate_content(prompt_name, data={}):
+class StreamCancelled(Exception):
+    """Raised inside a streamed completion once its cancel event is set"""
+    pass
+
+class StreamTimeout(TimeoutError):
+    """Raised when a streamed completion runs past its route's timeout"""
+    pass
+
+class ImageCancelled(Exception):
+    """Raised when an image prediction is cancelled before it finishes"""
+    pass
+
+def get_routes(prompt_name):
+    """Routing chain for a prompt: the primary route followed by its fallbacks.
+
+    config['routing'][prompt_name] may set model, max_tokens and timeout plus a
+    fallback list of routes with the same keys. Unrouted prompts use llm-model.
+    """
+    route = config.get('routing', {}).get(prompt_name, {})
+    chain = [route] + list(route.get('fallback', []))
+    return [{
+        'model': entry.get('model', config['openai']['llm-model']),
+        'max_tokens': entry.get('max_tokens'),
+        'timeout': entry.get('timeout')
+    } for entry in chain]
+
+def record_usage(prompt_name, model, latency, usage=None, timed_out=False, retries=0):
+    ledger.record('openai', prompt_name, latency, model=model,
+                  prompt_tokens=getattr(usage, 'prompt_tokens', 0),
+                  completion_tokens=getattr(usage, 'completion_tokens', 0),
+                  retries=retries, status='timeout' if timed_out else 'ok')
+
+def routing_report(since=0):
+    """Per prompt/model table of observed latency and token usage, from the ledger"""
+    rows = [stats for stats in ledger.summary(since)['operations'] if stats['service'] == 'openai']
+    if not rows:
+        return ""
+    lines = [f"{'prompt':<20} {'model':<24} {'calls':>5} {'timeouts':>8} "
+             f"{'p50 s':>7} {'p95 s':>7} {'avg in':>7} {'avg out':>7}"]
+    for stats in rows:
+        calls = stats['calls']
+        lines.append(
+            f"{stats['operation']:<20} {stats['model'] or '-':<24} {calls:>5} {stats['timeouts']:>8} "
+            f"{stats['latency_p50']:>7.2f} {stats['latency_p95']:>7.2f} "
+            f"{stats['prompt_tokens'] / calls:>7.0f} {stats['completion_tokens'] / calls:>7.0f}"
+        )
+    return "\n".join(lines)
+
+def _create_completion(prompt_name, messages, stream=False, limiter=None, **options):
+    """Call the chat API along the prompt's routing chain.
+
+    A route that exceeds its timeout falls through to the next one; the last
+    route keeps the client's normal retry behaviour. Returns the response,
+    the model that answered, its start time, how many routes failed first
+    and, for a stream, the limiter slot it still holds. Each call holds a
+    slot of limiter (the shared openai one by default); a stream keeps its
+    slot until the caller releases it once the stream is done.
+    """
+    limiter = limiter or get_limiter('openai')
+    routes = get_routes(prompt_name)
+    for index, route in enumerate(routes):
+        request_options = {}
+        if route['timeout']:
+            request_options['timeout'] = route['timeout']
+        if index < len(routes) - 1:
+            request_options['max_retries'] = 0
+        kwargs = dict(options)
+        if route['max_tokens']:
+            kwargs['max_tokens'] = route['max_tokens']
+        if stream:
+            kwargs['stream'] = True
+            kwargs['stream_options'] = {'include_usage': True}
+
+        routed_client = client.with_options(**request_options) if request_options else client
+        slot = limiter.acquire(f"{prompt_name}:stream" if stream else prompt_name)
+        started = time.monotonic()
+        try:
+            response = routed_client.chat.completions.create(
+                model=route['model'],
+                messages=messages,
+                **kwargs
+            )
+        except BaseException as e:
+            slot.reason = overload_reason(e)
+            limiter.release(slot)
+            if not isinstance(e, openai.APITimeoutError):
+                raise
+            record_usage(prompt_name, route['model'], time.monotonic() - started, timed_out=True, retries=index)
+            if index == len(routes) - 1:
+                raise
+            logging.warning(f"'{prompt_name}' exceeded {route['timeout']}s on {route['model']}, "
+                            f"falling back to {routes[index + 1]['model']}")
+            continue
+        if not stream:
+            limiter.release(slot)
+            slot = None
+        return response, route['model'], started, index, slot
+
+def build_messages(prompt_name, data={}):
+    """Render the chat messages for a prompt, or None if it cannot be built"""
     messages = []
-    print (prompt_name)
-    try:
-        logging.info(f"Generating content with data: {data}")
 
-        # Validate prompt existence
-        if prompt_name not in prompts:
-            logging.error(f"Prompt '{prompt_name}' not found in available prompts.")
-            return None
+    # Validate prompt existence
+    if prompt_name not in prompts:
+        logging.error(f"Prompt '{prompt_name}' not found in available prompts.")
+        return None
 
-        prompt = prompts[prompt_name]
+    prompt = prompts[prompt_name]
 
-        # Extract placeholders from the prompt
-        def extract_placeholders(prompt_text):
-            return re.findall(r'{(.*?)}', prompt_text)
+    # Extract placeholders from the prompt
+    def extract_placeholders(prompt_text):
+        return re.findall(r'{(.*?)}', prompt_text)
 
-        required_keys = set()
-        if isinstance(prompt, dict):
-            if 'user' in prompt:
-                required_keys.update(extract_placeholders(prompt['user']))
-        else:
-            required_keys.update(extract_placeholders(prompt))
+    required_keys = set()
+    if isinstance(prompt, dict):
+        if 'user' in prompt:
+            required_keys.update(extract_placeholders(prompt['user']))
+    else:
+        required_keys.update(extract_placeholders(prompt))
 
-        # Check if all required keys are present in the data
-        missing_keys = required_keys - set(data.keys())
-        if missing_keys:
-            logging.error(f"Missing required data keys for formatting: {missing_keys}")
-            return None
+    # Check if all required keys are present in the data
+    missing_keys = required_keys - set(data.keys())
+    if missing_keys:
+        logging.error(f"Missing required data keys for formatting: {missing_keys}")
+        return None
 
-        # Build messages based on prompt structure
-        if isinstance(prompt, dict):
-            if 'system' in prompt:
-                messages.append({
-                    "role": "system",
-                    "content": prompt['system']
-                })
-            if 'user' in prompt:
-                messages.append({
-                    "role": "user",
-                    "content": prompt['user'].format(**data)
-                })
-        else:
+    # Build messages based on prompt structure
+    if isinstance(prompt, dict):
+        if 'system' in prompt:
+            messages.append({
+                "role": "system",
+                "content": prompt['system']
+            })
+        if 'user' in prompt:
             messages.append({
                 "role": "user",
-                "content": prompt.format(**data)
+                "content": prompt['user'].format(**data)
             })
+    else:
+        messages.append({
+            "role": "user",
+            "content": prompt.format(**data)
+        })
+    return messages
 
-        # Send request to the OpenAI client
-        response = client.chat.completions.create(
-            model=config['openai']['llm-model'],
-            messages=messages
-        )
+def generate_content(prompt_name, data={}, response_format=None):
+    print (prompt_name)
+    try:
+        logging.info(f"Generating content with data: {data}")
+
+        messages = build_messages(prompt_name, data)
+        if messages is None:
+            return None
+
+        # Send request to the OpenAI client along the prompt's route
+        options = {'response_format': response_format} if response_format else {}
+        with span('llm', prompt=prompt_name) as llm_span:
+            response, model, started, retries, _ = _create_completion(prompt_name, messages, **options)
+            usage = response.usage
+            llm_span.set(model=model, prompt_tokens=getattr(usage, 'prompt_tokens', None),
+                         completion_tokens=getattr(usage, 'completion_tokens', None))
+        record_usage(prompt_name, model, time.monotonic() - started, usage, retries=retries)
 
         result = response.choices[0].message.content.strip()
         logging.info("Content generation successful.")
@@ -104,6 +219,69 @@ def generate_content(prompt_name, data={}):
 
     return None
 
+def stream_content(prompt_name, data={}, response_format=None, cancel=None, limiter=None):
+    """Yield the completion text as it streams in.
+
+    Closing the generator cancels the underlying HTTP stream, which is how
+    callers abort a completion that can no longer validate. Setting the
+    cancel event does the same from another thread: the next chunk raises
+    StreamCancelled.
+
+    A route's timeout is a wall-clock deadline for the whole stream, time
+    the consumer keeps it suspended included, checked at every chunk; the
+    read timeout covers a stream that stops sending.
+    Fallback to the next route only happens before the stream starts: once
+    text has been yielded a late stream raises StreamTimeout instead.
+
+    The stream holds a slot of limiter until it is done. A consumer that
+    keeps the stream suspended while it waits on other openai calls, like
+    the topic producer of generate_batch, must pass a limiter of its own so
+    it can never starve those calls of slots.
+    """
+    logging.info(f"Streaming content with data: {data}")
+    messages = build_messages(prompt_name, data)
+    if messages is None:
+        raise ValueError(f"Could not build messages for prompt '{prompt_name}'")
+
+    options = {'response_format': response_format} if response_format else {}
+    llm_span = start_span('llm', prompt=prompt_name, stream=True)
+    try:
+        stream, model, started, retries, slot = _create_completion(prompt_name, messages, stream=True,
+                                                                   limiter=limiter, **options)
+    except Exception as e:
+        llm_span.set(error=str(e))
+        llm_span.end()
+        raise
+    llm_span.set(model=model)
+    timeout = get_routes(prompt_name)[retries]['timeout']
+    deadline = started + timeout if timeout else None
+    usage = None
+    timed_out = False
+    try:
+        for chunk in stream:
+            if cancel is not None and cancel.is_set():
+                raise StreamCancelled(f"Stream for {prompt_name} cancelled")
+            if deadline is not None and time.monotonic() > deadline:
+                timed_out = True
+                raise StreamTimeout(f"'{prompt_name}' exceeded {timeout}s on {model} while streaming")
+            if getattr(chunk, 'usage', None):
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    except BaseException as e:
+        slot.reason = slot.reason or overload_reason(e)
+        raise
+    finally:
+        stream.close()
+        (limiter or get_limiter('openai')).release(slot)
+        record_usage(prompt_name, model, time.monotonic() - started, usage, timed_out=timed_out, retries=retries)
+        llm_span.set(prompt_tokens=getattr(usage, 'prompt_tokens', None),
+                     completion_tokens=getattr(usage, 'completion_tokens', None))
+        llm_span.end()
+
 def generate_art_prompt(title):
     if config['img_src']=="flux":
         return generate_content('flux',{'title':title})
@@ -132,17 +310,21 @@ def generate_image(title):
 def create_dalle_image(image_desc, title):
     print('\nImage Prompt:',image_desc,'\nTitle:',title)
     
-    response = client.images.generate(
-        model="dall-e-3",
-        prompt=image_desc,
-        size="1024x1024",
-        quality="standard",
-        n=1,
-        )
+    started = time.monotonic()
+    with get_limiter('openai').slot('images'):
+        response = client.images.generate(
+            model="dall-e-3",
+            prompt=image_desc,
+            size="1024x1024",
+            quality="standard",
+            n=1,
+            )
 
     image_url = response.data[0].url
 
     image_data = requests.get(image_url).content
+    ledger.record('openai', 'images', time.monotonic() - started, model="dall-e-3",
+                  bytes_received=len(image_data))
 
     # Clean and sanitize the title
     cleaned_title = clean_title(title)
@@ -158,8 +340,38 @@ def create_dalle_image(image_desc, title):
 
 
 
+_replicate_client = None
+
+def get_replicate_client():
+    """Shared Replicate client so long-running processes keep their connections warm"""
+    global _replicate_client
+    if _replicate_client is None:
+        _replicate_client = replicate.Client(api_token=config['replicate']['api_key'],
+                                             base_url=config['replicate'].get('base_url'))
+    return _replicate_client
+
+def _run_prediction(replicate_client, model, model_input, cancel=None):
+    """replicate.run that cancels the prediction once cancel is set, so it stops being billed"""
+    if cancel is None:
+        return replicate_client.run(model, input=model_input)
+    if cancel.is_set():
+        raise ImageCancelled(f"Image for {model} cancelled before it started")
+    if ':' in model:
+        prediction = replicate_client.predictions.create(version=model.split(':', 1)[1], input=model_input)
+    else:
+        prediction = replicate_client.models.predictions.create(model=model, input=model_input)
+    while prediction.status not in ('succeeded', 'failed', 'canceled'):
+        if cancel.wait(replicate_client.poll_interval):
+            prediction.cancel()
+            raise ImageCancelled(f"Prediction {prediction.id} cancelled")
+        prediction.reload()
+    if prediction.status != 'succeeded':
+        raise ModelError(prediction)
+    return transform_output(prediction.output, replicate_client)
+
 # Function to create an image using FLUX PRO
-def create_flux_pro_image(file_name,  folder, prompt,file_type="webp", target_width=512, target_height=512, crop=False, resize=False):
+def create_flux_pro_image(file_name,  folder, prompt,file_type="webp", target_width=512, target_height=512, crop=False, resize=False,
+                          cancel=None):
     print("Creating image with FLUX PRO...")
 
     ASPECT_RATIOS = {
@@ -194,16 +406,23 @@ def create_flux_pro_image(file_name,  folder, prompt,file_type="webp", target_wi
         "num_inference_steps": replicate_config.get('num_inference_steps', 50),
         "guidance_scale": replicate_config.get('guidance_scale', 7.5),
     }
-    replicate_client=replicate.Client(api_token=replicate_config['api_key'])
-    
-    output = replicate_client.run(
-        replicate_config['image-model'],
-        input=flux_config
-    )
+    replicate_client=get_replicate_client()
     
-    image_data = output.read()
+    with span('image.generate', model=replicate_config['image-model']) as image_span:
+        with get_limiter('replicate').slot('prediction'):
+            started = time.monotonic()
+            output = _run_prediction(replicate_client, replicate_config['image-model'], flux_config, cancel)
+            image_data = output.read()
+        ledger.record('replicate', 'prediction', time.monotonic() - started,
+                      model=replicate_config['image-model'], bytes_received=len(image_data))
+        image_span.set(bytes=len(image_data))
     image = Image.open(io.BytesIO(image_data))
 
+    with span('image.resize', width=target_width, height=target_height):
+        return _finish_image(image, file_name, file_type, target_width, target_height, crop, resize)
+
+def _finish_image(image, file_name, file_type, target_width, target_height, crop, resize):
+    """Resize, crop and save a generated image"""
     # Resize if flag is enabled
     if resize:
         current_ratio = image.width / image.height
@@ -0,0 +1,69 @@
+import os
+import uuid
+import hashlib
+import logging
+from pathlib import Path
+from typing import Optional, Union
+
+from .code_blocks import convert_markdown_to_wp, RENDERER_VERSION
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE_NAME = "article.html"
+HEADER_PREFIX = "<!-- kackle-render:"
+HEADER_SUFFIX = " -->\n"
+
+
+def render_key(content: str) -> str:
+    """Hash of the markdown content and the renderer version"""
+    digest = hashlib.sha256()
+    digest.update(RENDERER_VERSION.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(content.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def read_cached(cache_file: Union[str, Path], key: str) -> Optional[str]:
+    """Return cached HTML if the file was rendered for this key"""
+    try:
+        with open(cache_file, encoding='utf-8') as f:
+            header = f.readline()
+            if header != f"{HEADER_PREFIX}{key}{HEADER_SUFFIX}":
+                return None
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def write_cached(cache_file: Union[str, Path], key: str, html: str) -> None:
+    """Write rendered HTML atomically with its key header"""
+    # Unique per writer: threads of one process may render the same article
+    tmp_file = f"{cache_file}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(f"{HEADER_PREFIX}{key}{HEADER_SUFFIX}")
+            f.write(html)
+        os.replace(tmp_file, cache_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.unlink(tmp_file)
+
+
+def render_cached(content: str, folder: Optional[Union[str, Path]] = None) -> str:
+    """Render markdown to WordPress HTML, memoized in folder when given"""
+    if folder is None:
+        return convert_markdown_to_wp(content)
+
+    key = render_key(content)
+    cache_file = Path(folder) / CACHE_FILE_NAME
+    html = read_cached(cache_file, key)
+    if html is not None:
+        logger.debug(f"Render cache hit: {cache_file}")
+        return html
+
+    html = convert_markdown_to_wp(content)
+    try:
+        write_cached(cache_file, key, html)
+    except OSError as e:
+        logger.warning(f"Failed to write render cache {cache_file}: {e}")
+    return html
@@ -0,0 +1,117 @@
+import re
+import json
+from typing import Any, Dict, Optional, Tuple
+
+FENCE_PATTERN = re.compile(r'```(?:json|JSON)?\s*\n(.*?)\n?```', re.DOTALL)
+TRAILING_COMMA_PATTERN = re.compile(r',(\s*[\]}])')
+SMART_QUOTES = str.maketrans({'“': '"', '”': '"', '‘': "'", '’': "'"})
+
+
+def strip_fences(text: str) -> str:
+    """Return the body of the first markdown code fence, or the text unchanged"""
+    match = FENCE_PATTERN.search(text)
+    return match.group(1) if match else text
+
+
+def extract_json_text(text: str) -> str:
+    """Trim prose around the outermost JSON array or object"""
+    starts = [i for i in (text.find('['), text.find('{')) if i >= 0]
+    if not starts:
+        return text
+    start = min(starts)
+    closer = ']' if text[start] == '[' else '}'
+    end = text.rfind(closer)
+    return text[start:end + 1] if end > start else text[start:]
+
+
+def fix_syntax(text: str) -> str:
+    """Fix the trivial syntax slips models make: smart quotes and trailing commas"""
+    text = text.translate(SMART_QUOTES)
+    return TRAILING_COMMA_PATTERN.sub(r'\1', text)
+
+
+def parse_lenient(text: str) -> Optional[Any]:
+    """Parse JSON after stripping fences, surrounding prose and trivial syntax errors"""
+    for candidate in (text, strip_fences(text)):
+        candidate = extract_json_text(candidate.strip())
+        for attempt in (candidate, fix_syntax(candidate)):
+            try:
+                return json.loads(attempt)
+            except json.JSONDecodeError:
+                continue
+    return None
+
+
+def coerce(value: Any, schema: Dict) -> Any:
+    """Coerce a value towards its schema, dropping fields the schema does not allow"""
+    expected = schema.get("type")
+
+    if expected == "object" and isinstance(value, dict):
+        properties = schema.get("properties", {})
+        allow_extra = schema.get("additionalProperties", False) is not False
+        result = {}
+        for key, field_value in value.items():
+            if key in properties:
+                result[key] = coerce(field_value, properties[key])
+            elif allow_extra:
+                result[key] = field_value
+        return result
+
+    if expected == "array":
+        if isinstance(value, str):
+            value = [part.strip() for part in value.split(',') if part.strip()]
+        elif isinstance(value, dict):
+            value = [value]
+        if isinstance(value, list) and "items" in schema:
+            return [coerce(item, schema["items"]) for item in value]
+        return value
+
+    if expected == "string":
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        if isinstance(value, list) and all(isinstance(v, str) for v in value):
+            return ", ".join(value)
+        return value
+
+    if expected in ("number", "integer") and isinstance(value, str):
+        try:
+            number = float(value.strip())
+            return int(number) if expected == "integer" and number.is_integer() else number
+        except ValueError:
+            return value
+
+    if expected == "boolean" and isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ("true", "false"):
+            return lowered == "true"
+
+    return value
+
+
+def unwrap(data: Any, schema: Dict) -> Any:
+    """Unwrap {"items": [...]} style envelopes around an expected array"""
+    if schema.get("type", "array") == "array" and isinstance(data, dict):
+        lists = [v for v in data.values() if isinstance(v, list)]
+        if len(lists) == 1:
+            return lists[0]
+        return [data]
+    return data
+
+
+def repair(content: Any, schema: Dict) -> Tuple[Optional[Any], bool]:
+    """Locally repair a completion. Returns (data, changed) or (None, False)"""
+    if isinstance(content, str):
+        try:
+            data = json.loads(content)
+            changed = False
+        except json.JSONDecodeError:
+            data = parse_lenient(content)
+            if data is None:
+                return None, False
+            changed = True
+    else:
+        data = content
+        changed = False
+
+    repaired = coerce(unwrap(data, schema), schema)
+    return repaired, changed or repaired != data
@@ -0,0 +1,130 @@
+import os
+import uuid
+import logging
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .utils import atomic_dump_yaml, load_yaml
+
+logger = logging.getLogger(__name__)
+
+
+class TopicReservoir:
+    """Pool of validated, dedup-checked topics per upcoming date.
+
+    Topics live in <articles>/.reservoir/<YYYY-MM-DD>/<id>.yaml until claimed.
+    Claiming renames one file out of the date's folder, which is atomic, so
+    concurrent claimers never receive the same topic.
+    """
+
+    def __init__(self, config: Dict, topic_generator):
+        reservoir_config = config.get('reservoir', {})
+        self.depth = reservoir_config.get('depth', 2)
+        self.days = reservoir_config.get('days', 14)
+        self.interval = reservoir_config.get('interval', 300)
+        self.root = Path(config['folders']['articles']) / '.reservoir'
+        self.claimed_dir = self.root / '.claimed'
+        self.claimed_dir.mkdir(parents=True, exist_ok=True)
+
+        self.topic_generator = topic_generator
+        topic_generator.reservoir = self
+        # Pooled topics count as existing for dedup of anything generated later
+        pooled = self.load_all()
+        topic_generator.all_topics.extend(pooled)
+        if topic_generator.topic_index:
+            topic_generator.topic_index.sync(pooled)
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _date_dir(self, target_date: date) -> Path:
+        return self.root / target_date.isoformat()
+
+    def load_all(self) -> List[Dict]:
+        topics = []
+        for topic_file in self.root.glob('[0-9]*/*.yaml'):
+            with open(topic_file) as f:
+                topic = load_yaml(f)
+            if topic:
+                topics.append(topic)
+        return topics
+
+    def count(self, target_date: date) -> int:
+        date_dir = self._date_dir(target_date)
+        if not date_dir.exists():
+            return 0
+        return sum(1 for entry in os.scandir(date_dir) if entry.name.endswith('.yaml'))
+
+    def put(self, topic: Dict, target_date: date) -> Path:
+        date_dir = self._date_dir(target_date)
+        date_dir.mkdir(parents=True, exist_ok=True)
+        topic_file = date_dir / f"{uuid.uuid4().hex}.yaml"
+        atomic_dump_yaml(topic_file, topic)
+        return topic_file
+
+    def claim(self, target_date: date) -> Optional[Dict]:
+        """Take one topic for target_date and save it as a real topic, or None if empty"""
+        date_dir = self._date_dir(target_date)
+        if not date_dir.exists():
+            return None
+
+        for entry in os.scandir(date_dir):
+            if not entry.name.endswith('.yaml') or entry.name.startswith('.'):
+                continue
+            claimed_file = self.claimed_dir / f"{os.getpid()}-{entry.name}"
+            try:
+                os.rename(entry.path, claimed_file)
+            except FileNotFoundError:
+                # Another worker claimed it first
+                continue
+
+            with open(claimed_file) as f:
+                topic = load_yaml(f)
+            self.topic_generator.save_topic(topic, target_date)
+            claimed_file.unlink()
+            logger.info(f"Claimed reservoir topic for {target_date}: {topic['topic']}")
+            return topic
+        return None
+
+    def refill(self, start: Optional[date] = None) -> int:
+        """Top up every date in the window to the configured depth"""
+        start = start or date.today()
+        added = 0
+        for offset in range(self.days):
+            if self._stop.is_set():
+                break
+            target_date = start + timedelta(days=offset)
+            missing = self.depth - self.count(target_date)
+            if missing <= 0:
+                continue
+            for topic in self.topic_generator.iter_topic(target_date, missing, save=False, cancel=self._stop):
+                topic['date'] = target_date.isoformat()
+                self.put(topic, target_date)
+                added += 1
+        if added:
+            logger.info(f"Reservoir refilled with {added} topics")
+        return added
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refill()
+            except Exception as e:
+                logger.error(f"Reservoir refill failed: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        """Keep the reservoir topped up on a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="reservoir-refill", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop refilling; an in-flight topic completion is cancelled at its next chunk"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
@@ -1,94 +1,389 @@
+import re
 import json
 import yaml
 import os
-from typing import Dict, List, Any, Tuple
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, List, Any, NamedTuple, Optional, Tuple
+
+from .repair import coerce, repair as repair_content
+from .stream_json import IncrementalJSON, StreamAbort
+
+# A compiled validator appends problems for one value to an issues dict
+Validator = Callable[[Any, str, Dict[str, List[str]]], None]
+
+TYPE_CHECKS = {
+    "string": lambda x: isinstance(x, str),
+    "array": lambda x: isinstance(x, list),
+    "number": lambda x: isinstance(x, (int, float)) and not isinstance(x, bool),
+    "integer": lambda x: isinstance(x, int) and not isinstance(x, bool),
+    "object": lambda x: isinstance(x, dict),
+    "boolean": lambda x: isinstance(x, bool)
+}
+
+
+DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
+def is_date(value: Any) -> bool:
+    if not isinstance(value, str) or not DATE_PATTERN.fullmatch(value):
+        return False
+    try:
+        date.fromisoformat(value)
+        return True
+    except ValueError:
+        return False
+
+
+FORMAT_CHECKS = {
+    "date": is_date
+}
+
+
+def _new_issues() -> Dict[str, List[str]]:
+    return {
+        "missing_fields": [],
+        "extra_fields": [],
+        "invalid_types": [],
+        "validation_errors": []
+    }
+
+
+def compile_schema(schema: Dict) -> Validator:
+    """Compile a schema into a closure so per-item work is just the checks"""
+    checks = []
+
+    expected_type = schema.get("type")
+    if expected_type in TYPE_CHECKS:
+        type_check = TYPE_CHECKS[expected_type]
+
+        def check_type(value, path, issues):
+            if not type_check(value):
+                issues["invalid_types"].append(f"{path}: expected {expected_type}")
+                return False
+            return True
+    else:
+        def check_type(value, path, issues):
+            return True
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+
+        def check_enum(value, path, issues):
+            if value not in allowed:
+                issues["validation_errors"].append(f"{path}: must be one of {allowed}")
+        checks.append(check_enum)
+
+    if "format" in schema and schema["format"] in FORMAT_CHECKS:
+        format_name = schema["format"]
+        format_check = FORMAT_CHECKS[format_name]
+
+        def check_format(value, path, issues):
+            if not format_check(value):
+                issues["validation_errors"].append(f"{path}: expected {format_name} format")
+        checks.append(check_format)
+
+    if expected_type == "object" or "properties" in schema:
+        properties = {name: compile_schema(sub) for name, sub in schema.get("properties", {}).items()}
+        required = list(schema.get("required", []))
+        allow_extra = schema.get("additionalProperties", False) is not False
+
+        def check_object(value, path, issues):
+            prefix = f"{path}." if path else ""
+            for field in required:
+                if field not in value:
+                    issues["missing_fields"].append(f"{prefix}{field}")
+            for field, field_value in value.items():
+                field_validator = properties.get(field)
+                if field_validator is None:
+                    if not allow_extra:
+                        issues["extra_fields"].append(f"{prefix}{field}")
+                    continue
+                field_validator(field_value, f"{prefix}{field}", issues)
+        checks.append(check_object)
+
+    if "items" in schema:
+        item_validator = compile_schema(schema["items"])
+
+        def check_items(value, path, issues):
+            for index, item in enumerate(value):
+                item_validator(item, f"{path}[{index}]", issues)
+        checks.append(check_items)
+
+    def validator(value, path, issues):
+        if not check_type(value, path, issues):
+            return
+        for check in checks:
+            check(value, path, issues)
+
+    return validator
+
+
+def _canonical(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def _drain(source: Iterator[str]) -> None:
+    """Read a chunk source to its end, discarding whatever follows the root"""
+    for _ in source:
+        pass
+
+
+class StreamValidationError(Exception):
+    """Raised when a streamed completion can no longer satisfy its schema"""
+    def __init__(self, issues: Dict[str, List[str]]):
+        super().__init__(f"Streamed content failed validation: {issues}")
+        self.issues = issues
+
+
+class CompiledSchema(NamedTuple):
+    path: str
+    mtime: int
+    schema: Dict
+    validator: Validator
+    item_validator: Validator
+    field_validators: Dict[str, Validator]
+
 
 class SchemaValidator:
     def __init__(self, prompts_dir: str = 'prompts', schema_dir: str = 'prompt_validator'):
         self.prompts_dir = prompts_dir
         self.schema_dir = schema_dir
-        
-    def load_schema(self, prompt_name: str) -> Dict:
+        self._compiled = {}
+
+    def _schema_path(self, prompt_name: str) -> str:
         base_name = os.path.splitext(prompt_name)[0]
-        
-        # Try JSON schema
-        json_path = os.path.join(self.schema_dir, f"{base_name}.schema.json")
-        if os.path.exists(json_path):
-            with open(json_path) as f:
-                return json.load(f)
-                
-        # Try YAML schema
-        yaml_path = os.path.join(self.schema_dir, f"{base_name}.schema.yaml")
-        if os.path.exists(yaml_path):
-            with open(yaml_path) as f:
-                return yaml.safe_load(f)
-                
+        for ext in ("json", "yaml"):
+            path = os.path.join(self.schema_dir, f"{base_name}.schema.{ext}")
+            if os.path.exists(path):
+                return path
         raise FileNotFoundError(f"No schema found for {prompt_name}")
 
-    def _validate_types(self, item: Dict, properties: Dict, issues: Dict):
-        for field, value in item.items():
-            if field in properties:
-                field_schema = properties[field]
-                if not self._validate_field(value, field_schema):
-                    issues["invalid_types"].append(f"{field}: expected {field_schema['type']}")
-        try:
-            parts = date_str.split("-")
-            return (len(parts) == 3 and 
-                   len(parts[0]) == 4 and 
-                   len(parts[1]) == 2 and 
-                   len(parts[2]) == 2)
-        except:
-             return False
-             
-    def _validate_field(self, value: Any, schema: Dict) -> bool:
-        expected_type = schema["type"]
-        
-        type_checks = {
-            "string": lambda x: isinstance(x, str),
-            "array": lambda x: isinstance(x, list),
-            "number": lambda x: isinstance(x, (int, float)),
-            "integer": lambda x: isinstance(x, int),
-            "object": lambda x: isinstance(x, dict),
-            "boolean": lambda x: isinstance(x, bool)
-        }
-        
-        return type_checks.get(expected_type, lambda x: True)(value)
+    def load_schema(self, prompt_name: str) -> Dict:
+        path = self._schema_path(prompt_name)
+        with open(path) as f:
+            if path.endswith(".json"):
+                return json.load(f)
+            return yaml.safe_load(f)
+
+    def compiled(self, prompt_name: str) -> CompiledSchema:
+        """Return the compiled schema for a prompt, recompiling when the file changes"""
+        cached = self._compiled.get(prompt_name)
+        if cached:
+            try:
+                if os.stat(cached.path).st_mtime_ns == cached.mtime:
+                    return cached
+            except FileNotFoundError:
+                pass
 
-    def validate(self, prompt_name: str, content: str) -> Tuple[bool, Dict[str, List[str]], Any]:
+        path = self._schema_path(prompt_name)
+        mtime = os.stat(path).st_mtime_ns
         schema = self.load_schema(prompt_name)
+        compiled = CompiledSchema(
+            path=path,
+            mtime=mtime,
+            schema=schema,
+            validator=compile_schema(schema),
+            item_validator=compile_schema(schema.get("items", {})),
+            field_validators={name: compile_schema(sub) for name, sub in schema.get("properties", {}).items()}
+        )
+        self._compiled[prompt_name] = compiled
+        return compiled
+
+    def validate_item(self, prompt_name: str, item: Any) -> Dict[str, List[str]]:
+        """Validate a single array item, returning only the non-empty issue lists"""
+        issues = _new_issues()
+        self.compiled(prompt_name).item_validator(item, "", issues)
+        return {k: v for k, v in issues.items() if v}
+
+    def _check(self, compiled: CompiledSchema, data: Any) -> Tuple[bool, Dict[str, List[str]]]:
+        root_type = compiled.schema.get("type", "array")
+        if root_type == "array" and not isinstance(data, list):
+            return False, {"validation_errors": ["Root must be an array"]}
+        if root_type == "object" and not isinstance(data, dict):
+            return False, {"validation_errors": ["Root must be an object"]}
+
+        issues = _new_issues()
+        compiled.validator(data, "", issues)
+
+        is_valid = all(len(v) == 0 for v in issues.values())
+        return is_valid, {k: v for k, v in issues.items() if v}
+
+    def validate(self, prompt_name: str, content: str, repair: bool = False) -> Tuple[bool, Dict[str, List[str]], Any]:
+        """Validate content against the prompt's schema.
+
+        With repair=True a failing document is locally repaired (fences,
+        trivial syntax, extra fields, type coercion) and checked again.
+        """
+        compiled = self.compiled(prompt_name)
         try:
             data = json.loads(content) if isinstance(content, str) else content
-            if not isinstance(data, list):
-                return False, {"validation_errors": ["Root must be an array"]}, None
-
-            issues = {
-                "missing_fields": [],
-                "extra_fields": [],
-                "invalid_types": [],
-                "validation_errors": []
+        except json.JSONDecodeError:
+            data = None
+            is_valid, issues = False, {"errors": ["Invalid JSON content"]}
+        else:
+            is_valid, issues = self._check(compiled, data)
+
+        if is_valid or not repair:
+            return is_valid, issues, data
+
+        repaired, _ = repair_content(content, compiled.schema)
+        if repaired is None:
+            return is_valid, issues, data
+        repaired_valid, repaired_issues = self._check(compiled, repaired)
+        if repaired_valid:
+            return True, {}, repaired
+        return False, repaired_issues, repaired
+
+    def response_format(self, prompt_name: str, wrapper_key: str = "items") -> Dict:
+        """Structured-output response_format for the prompt's schema.
+
+        Structured output requires an object root, so array schemas are
+        wrapped in a single-key envelope that iter_validated unwraps.
+        """
+        schema = self.compiled(prompt_name).schema
+        if schema.get("type", "array") == "array":
+            schema = {
+                "type": "object",
+                "properties": {wrapper_key: schema},
+                "required": [wrapper_key],
+                "additionalProperties": False
             }
-            
-            item_schema = schema["items"]
-            properties = item_schema.get("properties", {})
-            required = item_schema.get("required", [])
-            
-            for item in data:
-                if not isinstance(item, dict):
-                    issues["validation_errors"].append("Array items must be objects")
-                    continue
-                    
-                for field in required:
-                    if field not in item:
-                        issues["missing_fields"].append(field)
+        name = re.sub(r'[^a-zA-Z0-9_-]', '_', os.path.splitext(prompt_name)[0])
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": name, "schema": schema, "strict": False}
+        }
 
-                for field in item:
-                    if field not in properties:
-                        issues["extra_fields"].append(field)
+    def iter_validated(self, prompt_name: str, chunks: Iterable[str], repair: bool = False,
+                       stats: Optional[Dict[str, int]] = None,
+                       wrapper_key: Optional[str] = None) -> Iterator[Any]:
+        """Yield each array item of a streamed completion as soon as it validates.
 
-                self._validate_types(item, properties, issues)
+        Raises StreamValidationError at the first sign the output cannot be
+        valid and closes the chunk source so the completion is cancelled.
+        Once the root closes the rest of the source is read to its end, so
+        the usage chunk that follows the text is still recorded.
+        With repair=True items are repaired locally instead, and an item that
+        still fails only loses its own slot (counted in stats["failed"]). A
+        document the stream parser gives up on is then read to its end and
+        repaired as a whole; items of the repair that were not already
+        parsed from the stream are yielded and counted in stats["repaired"].
+        """
+        compiled = self.compiled(prompt_name)
+        item_schema = compiled.schema.get("items", {})
+        properties = item_schema.get("properties")
+        key_check = None
+        if not repair and properties is not None and item_schema.get("additionalProperties", False) is False:
+            key_check = properties.__contains__
+        parser = IncrementalJSON("array", item_type=item_schema.get("type"), key_check=key_check,
+                                 wrapper_key=wrapper_key, lenient=repair)
+        if stats is None:
+            stats = {}
 
-            is_valid = all(len(v) == 0 for v in issues.values())
-            return is_valid, {k: v for k, v in issues.items() if v}, data
+        def item_issues(item):
+            issues = _new_issues()
+            compiled.item_validator(item, "", issues)
+            return {k: v for k, v in issues.items() if v}
 
-        except json.JSONDecodeError:
-            return False, {"errors": ["Invalid JSON content"]}, None
\ No newline at end of file
+        def checked(item, repaired=False):
+            """The item, its repair, or None when its slot is lost"""
+            stats["items"] = stats.get("items", 0) + 1
+            issues = item_issues(item)
+            if issues and not repair:
+                raise StreamValidationError(issues)
+            if issues:
+                item = coerce(item, item_schema)
+                if item_issues(item):
+                    stats["failed"] = stats.get("failed", 0) + 1
+                    return None
+                repaired = True
+            if repaired:
+                stats["repaired"] = stats.get("repaired", 0) + 1
+            return item
+
+        received = []
+        # Canonical forms of every item parsed from the stream, so the
+        # document repair below skips them whatever positions they end up at
+        parsed = []
+        try:
+            source = iter(chunks)
+            for chunk in source:
+                received.append(chunk)
+                for item in parser.feed(chunk):
+                    parsed.append({_canonical(item)})
+                    item = checked(item)
+                    if item is not None:
+                        parsed[-1].add(_canonical(item))
+                        yield item
+                if parser.finished:
+                    _drain(source)
+                    break
+            parser.close()
+            return
+        except StreamAbort as e:
+            if not repair:
+                raise StreamValidationError({"validation_errors": [str(e)]})
+            aborted = e
+            # The whole document is needed for a document-level repair
+            received.extend(source)
+        finally:
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
+
+        # Prose, an unexpected envelope or a truncated root stop the stream
+        # parser but are often repairable locally, which beats a retry
+        data, _ = repair_content("".join(received), compiled.schema)
+        if not isinstance(data, list):
+            raise StreamValidationError({"validation_errors": [str(aborted)]})
+        for item in data:
+            key = _canonical(item)
+            seen = next((keys for keys in parsed if key in keys), None)
+            if seen is not None:
+                parsed.remove(seen)
+                continue
+            item = checked(item, repaired=True)
+            if item is not None:
+                yield item
+
+    def iter_fields(self, prompt_name: str, chunks: Iterable[str]) -> Iterator[Tuple[str, Any]]:
+        """Yield (field, value) for each root field of a streamed object as it validates.
+
+        Lets callers act on an early field while later ones are still
+        streaming. The completed object is checked for required fields once
+        the stream ends.
+        """
+        compiled = self.compiled(prompt_name)
+        key_check = None
+        if compiled.schema.get("additionalProperties", False) is False:
+            key_check = compiled.field_validators.__contains__
+        parser = IncrementalJSON("object", key_check=key_check, lenient=True)
+        collected = {}
+
+        try:
+            source = iter(chunks)
+            for chunk in source:
+                for key, value in parser.feed(chunk):
+                    field_validator = compiled.field_validators.get(key)
+                    if field_validator:
+                        issues = _new_issues()
+                        field_validator(value, key, issues)
+                        issues = {k: v for k, v in issues.items() if v}
+                        if issues:
+                            raise StreamValidationError(issues)
+                    collected[key] = value
+                    yield key, value
+                if parser.finished:
+                    _drain(source)
+                    break
+            parser.close()
+        except StreamAbort as e:
+            raise StreamValidationError({"validation_errors": [str(e)]})
+        finally:
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
+
+        is_valid, issues = self._check(compiled, collected)
+        if not is_valid:
+            raise StreamValidationError(issues)
@@ -0,0 +1,229 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+from html import escape
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .code_blocks import RENDERER_VERSION
+from .render_cache import render_cached
+from .utils import sanitize_folder_name, load_yaml, CONTENT_FILE_NAME
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the page templates change so every page is rebuilt
+TEMPLATE_VERSION = "1"
+MANIFEST_NAME = ".kackle-export.json"
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+
+def _page(title: str, body: str) -> str:
+    return PAGE_TEMPLATE.format(title=escape(title), body=body)
+
+
+def _write_text(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _article_files(article_file: Path) -> List[Path]:
+    """article.yaml plus its content.md body when stored separately"""
+    body = article_file.parent / CONTENT_FILE_NAME
+    return [article_file, body] if body.exists() else [article_file]
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{RENDERER_VERSION}:{TEMPLATE_VERSION}\0".encode('utf-8'))
+    for file_path in _article_files(path):
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                digest.update(chunk)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def render_article_page(article_file: str, page_dir: str) -> Dict:
+    """Render one article.yaml into page_dir and return its index metadata.
+
+    Runs inside the export process pool, so it only takes plain paths.
+    """
+    article_file = Path(article_file)
+    page_dir = Path(page_dir)
+    with open(article_file) as f:
+        data = load_yaml(f) or {}
+    content = data.get('content')
+    if content is None and (article_file.parent / CONTENT_FILE_NAME).exists():
+        with open(article_file.parent / CONTENT_FILE_NAME, encoding='utf-8') as f:
+            content = f.read()
+
+    html = render_cached(content or '', article_file.parent)
+    title = data.get('title', '')
+    date = str(data.get('date', ''))
+    tags = data.get('tags') or []
+
+    image_name = None
+    image_path = data.get('image_path')
+    if image_path and Path(image_path).exists():
+        image_name = Path(image_path).name
+        target = page_dir / image_name
+        page_dir.mkdir(parents=True, exist_ok=True)
+        source_stat = os.stat(image_path)
+        if not target.exists() or target.stat().st_size != source_stat.st_size:
+            shutil.copy2(image_path, target)
+
+    parts = [f"<h1>{escape(title)}</h1>", f"<p><time>{escape(date)}</time></p>"]
+    if image_name:
+        parts.append(f'<img src="{escape(image_name)}" alt="{escape(title)}">')
+    parts.append(html)
+    if tags:
+        links = ", ".join(
+            f'<a href="../tags/{sanitize_folder_name(tag)}.html">{escape(tag)}</a>' for tag in tags
+        )
+        parts.append(f"<p>Tags: {links}</p>")
+    _write_text(page_dir / "index.html", _page(title, "\n".join(parts)))
+
+    return {'title': title, 'date': date, 'tags': list(tags)}
+
+
+class StaticExporter:
+    """Incremental static-site build of the articles folder"""
+
+    def __init__(self, config: Dict, output_dir: str, workers: Optional[int] = None):
+        self.articles_dir = Path(config['folders']['articles'])
+        self.output_dir = Path(output_dir)
+        self.workers = workers or config.get('export', {}).get('workers') or os.cpu_count()
+        self.manifest_path = self.output_dir / MANIFEST_NAME
+
+    def _load_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get('version') == f"{RENDERER_VERSION}:{TEMPLATE_VERSION}":
+                return manifest
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        return {'articles': {}, 'indexes': {}}
+
+    def _save_manifest(self, manifest: Dict) -> None:
+        manifest['version'] = f"{RENDERER_VERSION}:{TEMPLATE_VERSION}"
+        _write_text(self.manifest_path, json.dumps(manifest, indent=2, sort_keys=True))
+
+    def _scan(self, previous: Dict) -> Tuple[Dict, List[Tuple[str, Path]]]:
+        """Compare the archive against the manifest, returning entries and work"""
+        entries = {}
+        changed = []
+        if not self.articles_dir.exists():
+            return entries, changed
+
+        for entry in os.scandir(self.articles_dir):
+            article_file = Path(entry.path) / "article.yaml"
+            if not entry.is_dir() or not article_file.exists():
+                continue
+            slug = entry.name
+            stats = [path.stat() for path in _article_files(article_file)]
+            mtime_ns = max(stat.st_mtime_ns for stat in stats)
+            size = sum(stat.st_size for stat in stats)
+            # A failed render keeps the previous page and is retried until it succeeds
+            known = previous.get(slug)
+            if known and known.get('failed'):
+                known = None
+            if known and known['mtime_ns'] == mtime_ns and known['size'] == size:
+                entries[slug] = known
+                continue
+
+            digest = _file_digest(article_file)
+            if known and known['hash'] == digest:
+                entries[slug] = dict(known, mtime_ns=mtime_ns, size=size)
+                continue
+
+            entries[slug] = {'mtime_ns': mtime_ns, 'size': size, 'hash': digest}
+            changed.append((slug, article_file))
+        return entries, changed
+
+    def _build_indexes(self, entries: Dict) -> Dict[str, str]:
+        """Return the HTML for every index page keyed by its relative path"""
+        ordered = sorted(entries.items(), key=lambda item: item[1]['meta']['date'], reverse=True)
+        groups = {'index.html': ("All articles", "", ordered)}
+        for slug, entry in ordered:
+            meta = entry['meta']
+            for tag in meta['tags']:
+                path = f"tags/{sanitize_folder_name(tag)}.html"
+                groups.setdefault(path, (f"Tag: {tag}", "../", []))[2].append((slug, entry))
+            month = meta['date'][:7]
+            if month:
+                path = f"archive/{month}.html"
+                groups.setdefault(path, (f"Archive: {month}", "../", []))[2].append((slug, entry))
+
+        pages = {}
+        for path, (title, prefix, items) in groups.items():
+            rows = "\n".join(
+                f'<li><a href="{prefix}{slug}/index.html">{escape(entry["meta"]["title"])}</a> '
+                f'<time>{escape(entry["meta"]["date"])}</time></li>'
+                for slug, entry in items
+            )
+            pages[path] = _page(title, f"<h1>{escape(title)}</h1>\n<ul>\n{rows}\n</ul>")
+        return pages
+
+    def export(self) -> Dict[str, int]:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        manifest = self._load_manifest()
+        entries, changed = self._scan(manifest['articles'])
+        stats = {'articles': len(entries), 'rendered': 0, 'failed': 0, 'removed': 0,
+                 'indexes_written': 0, 'indexes_removed': 0}
+
+        if changed:
+            logger.info(f"Rendering {len(changed)} changed articles with {self.workers} workers")
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = {
+                    slug: pool.submit(render_article_page, str(article_file), str(self.output_dir / slug))
+                    for slug, article_file in changed
+                }
+                for slug, future in futures.items():
+                    try:
+                        entries[slug]['meta'] = future.result()
+                        stats['rendered'] += 1
+                    except Exception as e:
+                        logger.error(f"Failed to export article '{slug}': {e}")
+                        stats['failed'] += 1
+                        last_good = manifest['articles'].get(slug)
+                        if last_good and 'meta' in last_good:
+                            entries[slug] = dict(last_good, failed=True)
+                        else:
+                            del entries[slug]
+
+        for slug in set(manifest['articles']) - set(entries):
+            shutil.rmtree(self.output_dir / slug, ignore_errors=True)
+            stats['removed'] += 1
+
+        index_hashes = {}
+        for path, html in self._build_indexes(entries).items():
+            digest = hashlib.sha256(html.encode('utf-8')).hexdigest()
+            index_hashes[path] = digest
+            if manifest['indexes'].get(path) != digest or not (self.output_dir / path).exists():
+                _write_text(self.output_dir / path, html)
+                stats['indexes_written'] += 1
+
+        for path in set(manifest['indexes']) - set(index_hashes):
+            (self.output_dir / path).unlink(missing_ok=True)
+            stats['indexes_removed'] += 1
+
+        self._save_manifest({'articles': entries, 'indexes': index_hashes})
+        return stats
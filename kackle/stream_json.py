@@ -0,0 +1,269 @@
+import re
+import json
+from typing import Any, Callable, List, Optional
+
+from .repair import fix_syntax
+
+WHITESPACE = " \t\r\n"
+
+
+class StreamAbort(Exception):
+    """Raised when streamed output can no longer become valid JSON of the expected shape"""
+    pass
+
+
+class IncrementalJSON:
+    """Incremental parser for a streamed JSON document.
+
+    In "array" mode every element of the root array is returned as soon as it
+    is complete. In "object" mode every root field is returned as a
+    (key, value) pair as soon as its value is complete. Callers feed text
+    chunks and get back whatever finished in that chunk; StreamAbort is raised
+    as soon as the text cannot be the expected document.
+
+    wrapper_key accepts a root array delivered inside a single-key envelope
+    such as {"items": [...]}, which is what structured output modes return.
+    lenient fixes trivial syntax slips (trailing commas, smart quotes) in an
+    element before giving up on it.
+    """
+
+    def __init__(self, mode: str = "array", item_type: Optional[str] = None,
+                 key_check: Optional[Callable[[str], bool]] = None,
+                 wrapper_key: Optional[str] = None, lenient: bool = False):
+        if mode not in ("array", "object"):
+            raise ValueError(f"Unsupported mode: {mode}")
+        self.mode = mode
+        self.item_type = item_type
+        self.key_check = key_check
+        self.wrapper = None
+        if wrapper_key and mode == "array":
+            self.wrapper = re.compile(r'\{\s*' + re.escape(json.dumps(wrapper_key)) + r'\s*:\s*\[')
+            self.wrapper_compact = '{' + json.dumps(wrapper_key) + ':['
+        self.lenient = lenient
+
+        self.prefix = ""
+        self.started = False
+        self.finished = False
+        self.stack = []
+        self.expect_key = []
+        self.in_string = False
+        self.escape = False
+        self.string_chars = []
+        self.element = []
+        self.element_active = False
+        self.element_scalar = False
+        self.current_key = None
+        self.awaiting_value = False
+
+    # Root handling -------------------------------------------------------
+
+    def _start(self, chunk: str) -> str:
+        """Skip whitespace and an optional markdown fence before the root"""
+        self.prefix += chunk
+        stripped = self.prefix.lstrip(WHITESPACE)
+        if not stripped:
+            return ""
+        if stripped.startswith("`"):
+            if "\n" not in stripped:
+                if not (stripped.startswith("```") or "```".startswith(stripped)):
+                    raise StreamAbort("Unexpected text before JSON")
+                return ""
+            fence, rest = stripped.split("\n", 1)
+            if fence.strip().lower() not in ("```", "```json"):
+                raise StreamAbort("Unexpected text before JSON")
+            self.prefix = rest
+            stripped = rest.lstrip(WHITESPACE)
+            if not stripped:
+                return ""
+
+        if self.wrapper and stripped[0] == "{":
+            match = self.wrapper.match(stripped)
+            if not match:
+                compact = re.sub(r'\s+', '', stripped)
+                if not self.wrapper_compact.startswith(compact):
+                    raise StreamAbort("Unexpected envelope around the array")
+                return ""
+            # Continue as if the envelope's array were the root
+            stripped = stripped[match.end() - 1:]
+
+        opener = "[" if self.mode == "array" else "{"
+        if stripped[0] != opener:
+            kind = "an array" if self.mode == "array" else "an object"
+            raise StreamAbort(f"Root must be {kind}")
+        self.started = True
+        self.prefix = ""
+        return stripped
+
+    def feed(self, chunk: str) -> List[Any]:
+        results = []
+        if self.finished or not chunk:
+            return results
+        if not self.started:
+            chunk = self._start(chunk)
+            if not self.started:
+                return results
+
+        for char in chunk:
+            if self.finished:
+                break
+            self._step(char, results)
+        return results
+
+    def close(self) -> None:
+        """Signal end of input; raises if the document never completed"""
+        if not self.finished:
+            raise StreamAbort("Stream ended before the JSON document was complete")
+
+    # Character handling -------------------------------------------------
+
+    def _depth(self) -> int:
+        return len(self.stack)
+
+    def _step(self, char: str, results: List[Any]) -> None:
+        if self.in_string:
+            self._append(char)
+            if self.escape:
+                self.escape = False
+                self.string_chars.append(char)
+            elif char == "\\":
+                self.escape = True
+                self.string_chars.append(char)
+            elif char == '"':
+                self.in_string = False
+                self._string_done()
+            else:
+                self.string_chars.append(char)
+            return
+
+        depth = self._depth()
+        if depth == 0:
+            if char == self._root_opener():
+                self._push(char)
+            elif char not in WHITESPACE:
+                raise StreamAbort("Unexpected text before JSON")
+            return
+
+        if depth == 1:
+            if self.element_active and self.element_scalar:
+                if char != "," and char != self._root_closer():
+                    self._append(char)
+                    return
+                self._element_done(results)
+            if not self.element_active:
+                self._root_level(char, results)
+                return
+
+        # Inside a container element
+        self._append(char)
+        if char == '"':
+            self._start_string()
+        elif char in "[{":
+            self._push(char)
+        elif char in "]}":
+            self._pop()
+            if self._depth() == 1:
+                self._element_done(results)
+        elif char == "," and self.stack[-1] == "{":
+            self.expect_key[-1] = True
+
+    def _push(self, char: str) -> None:
+        self.stack.append(char)
+        self.expect_key.append(char == "{")
+
+    def _pop(self) -> None:
+        self.stack.pop()
+        self.expect_key.pop()
+
+    def _start_string(self) -> None:
+        self.in_string = True
+        self.string_chars = []
+
+    def _root_opener(self) -> str:
+        return "[" if self.mode == "array" else "{"
+
+    def _root_closer(self) -> str:
+        return "]" if self.mode == "array" else "}"
+
+    def _root_level(self, char: str, results: List[Any]) -> None:
+        """Handle a character directly inside the root container"""
+        if char in WHITESPACE:
+            return
+        if char == self._root_closer():
+            self._pop()
+            self.finished = True
+            return
+        if char == ",":
+            if self.mode == "object":
+                self.expect_key[0] = True
+            return
+
+        if self.mode == "object":
+            if self.expect_key[0]:
+                if char != '"':
+                    raise StreamAbort("Expected an object key")
+                self._start_string()
+                return
+            if char == ":":
+                self.awaiting_value = True
+                return
+            if not self.awaiting_value:
+                raise StreamAbort("Expected ':' after object key")
+            self.awaiting_value = False
+        elif self.item_type == "object" and char != "{":
+            raise StreamAbort("Array items must be objects")
+
+        self.element = []
+        self.element_active = True
+        self.element_scalar = char not in "[{"
+        self._append(char)
+        if char == '"':
+            self._start_string()
+        elif char in "[{":
+            self._push(char)
+
+    def _append(self, char: str) -> None:
+        if self.element_active:
+            self.element.append(char)
+
+    def _string_done(self) -> None:
+        depth = self._depth()
+        if depth == 1 and not self.element_active:
+            # Root object key (object mode only)
+            key = json.loads('"' + "".join(self.string_chars) + '"')
+            self.expect_key[0] = False
+            if self.key_check and not self.key_check(key):
+                raise StreamAbort(f"Unexpected field: {key}")
+            self.current_key = key
+            return
+
+        if depth == 1 and self.element_active:
+            # Scalar string element/value: wait for the separator
+            return
+
+        if self.stack[-1] == "{" and self.expect_key[-1]:
+            self.expect_key[-1] = False
+            if self.mode == "array" and depth == 2 and self.key_check:
+                key = json.loads('"' + "".join(self.string_chars) + '"')
+                if not self.key_check(key):
+                    raise StreamAbort(f"Unexpected field: {key}")
+
+    def _element_done(self, results: List[Any]) -> None:
+        text = "".join(self.element).strip()
+        self.element = []
+        self.element_active = False
+        if not text:
+            return
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError as e:
+            if not self.lenient:
+                raise StreamAbort(f"Invalid JSON element: {e}")
+            try:
+                value = json.loads(fix_syntax(text))
+            except json.JSONDecodeError:
+                raise StreamAbort(f"Invalid JSON element: {e}")
+        if self.mode == "object":
+            results.append((self.current_key, value))
+            self.current_key = None
+        else:
+            results.append(value)
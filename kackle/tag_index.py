@@ -0,0 +1,131 @@
+import re
+import logging
+import threading
+import unicodedata
+from difflib import get_close_matches
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_tag(name: str) -> str:
+    """Key used to compare tags: ASCII, lowercase, punctuation and plurals folded"""
+    text = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii').lower()
+    # + and # are kept so C++ and C# stay distinct from C
+    words = re.sub(r'[^a-z0-9+#]+', ' ', text).split()
+    return " ".join(word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word
+                    for word in words)
+
+
+class TagIndex:
+    """Canonical tags of one WordPress site, used to resolve article tags to term IDs.
+
+    Seeded once from the site's existing tags. Each incoming tag is matched,
+    in order, by normalized name, by configured alias and by fuzzy
+    similarity; only tags that match nothing become new terms, at most
+    max_new_per_post per post. Past the cap a tag falls back to a known
+    term it contains ("kubernetes security" -> Kubernetes) or is dropped.
+    """
+
+    def __init__(self, wp_client, config: Optional[Dict] = None):
+        config = config or {}
+        self.wp_client = wp_client
+        self.max_new_per_post = config.get('max_new_per_post', 2)
+        self.fuzzy_threshold = config.get('fuzzy_threshold', 0.88)
+        self.aliases = {normalize_tag(alias): canonical
+                        for alias, canonical in (config.get('aliases') or {}).items()}
+        self.terms = {}
+        self.names = {}
+        self.stats = {'matched': 0, 'aliased': 0, 'fuzzy': 0, 'contained': 0, 'created': 0, 'dropped': 0}
+        self._seeded = False
+        self._lock = threading.Lock()
+        # One lock per normalized name being created, so concurrent posts create it once
+        self._creating: Dict[str, threading.Lock] = {}
+
+    def _add(self, name: str, term_id: int) -> None:
+        key = normalize_tag(name)
+        if key and key not in self.terms:
+            self.terms[key] = term_id
+            self.names[key] = name
+
+    def seed(self) -> None:
+        """Load every existing tag from the site, once; a failed seed is retried on the next post"""
+        with self._lock:
+            if self._seeded:
+                return
+            try:
+                for term in self.wp_client.iter_collection('/tags', fields=['id', 'name']):
+                    self._add(term['name'], term['id'])
+            except Exception as e:
+                logger.error(f"Failed to seed tag index for {self.wp_client.name}: {e}")
+                return
+            self._seeded = True
+        logger.info(f"Tag index for {self.wp_client.name} seeded with {len(self.terms)} terms")
+
+    def match(self, name: str) -> Optional[int]:
+        """Existing term ID for name, without creating anything"""
+        key = normalize_tag(name)
+        if not key:
+            return None
+        if key in self.terms:
+            self.stats['matched'] += 1
+            return self.terms[key]
+        alias = self.aliases.get(key)
+        if alias and normalize_tag(alias) in self.terms:
+            self.stats['aliased'] += 1
+            return self.terms[normalize_tag(alias)]
+        close = get_close_matches(key, list(self.terms), n=1, cutoff=self.fuzzy_threshold)
+        if close:
+            logger.debug(f"Tag '{name}' matched '{self.names[close[0]]}'")
+            self.stats['fuzzy'] += 1
+            return self.terms[close[0]]
+        return None
+
+    def _contained(self, name: str) -> Optional[int]:
+        """Longest known term made of consecutive words of name"""
+        words = normalize_tag(name).split()
+        for size in range(len(words) - 1, 0, -1):
+            for start in range(len(words) - size + 1):
+                term_id = self.terms.get(" ".join(words[start:start + size]))
+                if term_id:
+                    return term_id
+        return None
+
+    def _create(self, name: str) -> Tuple[Optional[int], bool]:
+        """Term ID for a new tag and whether this call created it"""
+        key = normalize_tag(name)
+        with self._lock:
+            key_lock = self._creating.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                term_id = self.terms.get(key)
+            if term_id:
+                return term_id, False
+            term_id = self.wp_client.create_tag(name)
+            with self._lock:
+                if term_id:
+                    self.stats['created'] += 1
+                    self._add(name, term_id)
+                self._creating.pop(key, None)
+            return term_id, bool(term_id)
+
+    def resolve(self, tags: List[str]) -> List[int]:
+        """Term IDs for a post's tags, creating at most max_new_per_post terms"""
+        self.seed()
+        term_ids = []
+        created = 0
+        for name in tags or []:
+            with self._lock:
+                term_id = self.match(name)
+                if term_id is None and created >= self.max_new_per_post:
+                    term_id = self._contained(name)
+                    self.stats['contained' if term_id else 'dropped'] += 1
+                    if term_id is None:
+                        logger.info(f"Dropped tag '{name}': new term cap of {self.max_new_per_post} reached")
+                        continue
+            if term_id is None:
+                term_id, is_new = self._create(name)
+                created += is_new
+            if term_id and term_id not in term_ids:
+                term_ids.append(term_id)
+        return term_ids
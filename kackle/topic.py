@@ -2,20 +2,41 @@ import re
 import os
 import yaml
 import calendar
+import threading
 from datetime import datetime, timedelta, date
 from difflib import SequenceMatcher
-from typing import List, Optional, Dict, Union, Tuple
+from typing import Iterator, List, Optional, Dict, Union, Tuple
 
-from .prompt import generate_content, get_prompts
-from .schema_validator import SchemaValidator
-from .utils import get_clean_path
+from .prompt import generate_content, get_prompts, stream_content, StreamCancelled
+from .tracing import span
+from .accounting import ledger, finish_run
+from .schema_validator import SchemaValidator, StreamValidationError
+from .utils import get_clean_path, atomic_dump_yaml, load_yaml
+from .embeddings import TopicIndex, topic_text
+from .limiter import get_limiter
+
+TOPIC_SCHEMA = "article_topics.system.txt"
 
 class TopicGenerator:
     def __init__(self, config):
         self.config = config
         self.validator = SchemaValidator()
         self.max_tries = self.config.get('validator', {}).get('attempts', 3)
+        self.repair = self.config.get('validator', {}).get('repair', True)
+        self.structured_output = self.config.get('openai', {}).get('structured_output', False)
+        self.stats = {'completions': 0, 'items': 0, 'repaired': 0, 'failed': 0, 'retries': 0}
         self.all_topics = self.load_topics()
+        self.reservoir = None
+        # Dedup and the shared topic list are updated under this lock, so the
+        # reservoir thread and inline generation can run iter_topic at once
+        self._lock = threading.Lock()
+        # Topic streams stay suspended while consumers build articles, so they
+        # get their own slots instead of holding the shared openai ones
+        self.limiter = get_limiter('openai:topics', 'openai')
+        self.topic_index = None
+        if self.config.get('dedup', {}).get('semantic', False):
+            self.topic_index = TopicIndex(self.config)
+            self.topic_index.sync(self.all_topics)
 
 
     def save_topic(self, topic: Dict, target_date: date) -> None:
@@ -23,8 +44,7 @@ class TopicGenerator:
         topic_dir, topic_file = get_clean_path(topic['topic'],'topic.yaml')
         os.makedirs(topic_dir, exist_ok=True)
         
-        with open(topic_file, 'w') as f:
-            yaml.safe_dump(topic, f)
+        atomic_dump_yaml(topic_file, topic)
             
         print(f"Generated topic saved to {topic_file}")
 
@@ -32,7 +52,7 @@ class TopicGenerator:
     def load(self,topic_file):
         try:
             with open(topic_file, 'r') as file:
-                data = yaml.safe_load(file)
+                data = load_yaml(file)
             return data
         except FileNotFoundError:
             print(f"Error: The file {topic_file} was not found.")
@@ -59,7 +79,7 @@ class TopicGenerator:
             topic_file = os.path.join(articles_folder, folder_name, 'topic.yaml')
             if os.path.exists(topic_file):
                 with open(topic_file) as f:
-                    topic = yaml.safe_load(f)
+                    topic = load_yaml(f)
                     all_topics.append(topic)
                     
         return all_topics
@@ -83,50 +103,116 @@ class TopicGenerator:
         return best_score
 
     def generate_topic(self, target_date: date, num_topics: int = 1, rebuild: bool = False) -> Optional[List[Dict]]:
-        existing_topics = [topic['topic'] for topic in self.all_topics]
-        neg_prompt = ""
-        if existing_topics:
-            neg_prompt = "that is not like " + "\n- ".join(existing_topics)
-        
-    
+        return list(self.iter_topic(target_date, num_topics, rebuild)) or None
+
+    def _accept(self, topic: Dict, target_date: date, save: bool, vector=None) -> bool:
+        """Dedup-check a topic and record it as existing; caller holds the lock.
+
+        vector is the topic's embedding when semantic dedup is on, computed
+        by the caller so the API call stays outside the lock.
+        """
+        score = self.score_topic_match(topic['topic'], [known['topic'] for known in self.all_topics])
+        if score > 0.8:
+            print(f"Topic too similar to existing ones: {topic['topic']}")
+            return False
+
+        if self.topic_index:
+            similarity, closest = self.topic_index.nearest(vector)
+            if similarity >= self.topic_index.threshold:
+                print(f"Topic semantically similar ({similarity:.2f}) to '{closest}': {topic['topic']}")
+                return False
+
+        if save:
+            with span('topic.save'):
+                self.save_topic(topic, target_date)
+        self.all_topics.append(topic)
+        if self.topic_index:
+            self.topic_index.add(topic, vector)
+        return True
+
+    def iter_topic(self, target_date: date, num_topics: int = 1, rebuild: bool = False,
+                   save: bool = True, cancel: Optional[threading.Event] = None) -> Iterator[Dict]:
+        """Yield each new topic for target_date as soon as it is validated and saved.
+
+        With save=False topics are only dedup-checked and yielded, which is
+        how the reservoir stocks topics without creating article folders.
+        Setting cancel aborts the in-flight completion and ends the iterator.
+        """
+        valid_topics = []
+
         for attempt in range(self.max_tries):
+            remaining = num_topics - len(valid_topics)
+            if remaining <= 0 or (cancel is not None and cancel.is_set()):
+                break
+            with self._lock:
+                existing_topics = [topic['topic'] for topic in self.all_topics]
+            neg_prompt = ""
+            if existing_topics:
+                neg_prompt = "that is not like " + "\n- ".join(existing_topics)
+
+            stats = {'completions': 1, 'retries': 1 if attempt > 0 else 0}
             try:
-                data = {'neg_prompt': neg_prompt, 'num_topics': num_topics, 'date_str': target_date}
-                
-                content=generate_content("article_topics",data)
-                
-                is_valid, issues, topics = self.validator.validate("article_topics.system.txt", content)
-                
-                if is_valid:
-                    valid_topics = []
-                    for topic in topics:
-                        score = self.score_topic_match(topic['topic'], existing_topics)
-                        if score > 0.8:
-                            print(f"Topic too similar to existing ones: {topic['topic']}")
-                            continue
-                        
-                        self.save_topic(topic, target_date)
+                data = {'neg_prompt': neg_prompt, 'num_topics': remaining, 'date_str': target_date}
+
+                # Topics are saved as they stream in, so item 1 is on disk
+                # while later items are still being generated. Items that
+                # fail are repaired locally; only slots that stay broken are
+                # asked for again on the next attempt.
+                response_format = None
+                wrapper_key = None
+                if self.structured_output:
+                    response_format = self.validator.response_format(TOPIC_SCHEMA)
+                    wrapper_key = "items"
+                chunks = stream_content("article_topics", data, response_format=response_format,
+                                        cancel=cancel, limiter=self.limiter)
+                topics = self.validator.iter_validated(TOPIC_SCHEMA, chunks, repair=self.repair,
+                                                       stats=stats, wrapper_key=wrapper_key)
+                for topic in topics:
+                    vector = None
+                    if self.topic_index:
+                        with span('topic.dedup'):
+                            vector = self.topic_index.embed([topic_text(topic)])[0]
+                    with self._lock:
+                        accepted = self._accept(topic, target_date, save, vector)
+                    if accepted:
                         valid_topics.append(topic)
-                        
-                    if valid_topics:
-                        self.all_topics.extend(valid_topics)
-                        return valid_topics
-                
-                print(f"Attempt {attempt + 1}/{self.max_tries} failed validation:", issues)
-                
+                        yield topic
+
+                failed_slots = stats.get('failed', 0)
+                if valid_topics and not failed_slots:
+                    return
+
+                if failed_slots:
+                    print(f"Attempt {attempt + 1}/{self.max_tries}: {failed_slots} topics failed after repair")
+                else:
+                    print(f"Attempt {attempt + 1}/{self.max_tries} produced no new topics")
+
+            except StreamCancelled:
+                return
+            except StreamValidationError as e:
+                print(f"Attempt {attempt + 1}/{self.max_tries} failed validation:", e.issues)
             except Exception as e:
                 print(f"Attempt {attempt + 1}/{self.max_tries} failed with error:", str(e))
-        
-        return None
+            finally:
+                with self._lock:
+                    for key, value in stats.items():
+                        self.stats[key] = self.stats.get(key, 0) + value
 
-    def generate_topics(self, 
-                        from_date: date, 
-                        to_date: Optional[date] = None, 
-                        total_topics: int = 1,
-                        rebuild: bool = False) -> List[Dict]:
+    def report_stats(self) -> str:
+        """Summarize completion, repair and retry counts for this generator"""
+        items = self.stats['items'] or 1
+        completions = self.stats['completions'] or 1
+        return (f"Topic validation: {self.stats['completions']} completions, "
+                f"{self.stats['items']} items, "
+                f"{self.stats['repaired']} repaired ({self.stats['repaired'] / items:.0%}), "
+                f"{self.stats['failed']} failed, "
+                f"{self.stats['retries']} retries ({self.stats['retries'] / completions:.0%})")
 
+    def schedule(self, from_date: date, to_date: Optional[date] = None,
+                 total_topics: int = 1) -> List[Tuple[date, int]]:
+        """Dates in the range with the number of topics due on each"""
         if to_date is None or to_date == from_date:
-            return self.generate_topic(from_date, total_topics) or []
+            return [(from_date, total_topics)]
 
         # Calculate the total number of days in the range
         day_count = (to_date - from_date).days + 1
@@ -137,14 +223,11 @@ class TopicGenerator:
         interval = day_count // total_topics
         remaining_days = day_count % total_topics
 
-        generated_topics = []
+        slots = []
         current_date = from_date
 
         for _ in range(total_topics):
-            # Generate a single topic for the current date
-            topics = self.generate_topic(current_date, 1, rebuild)
-            if topics:
-                generated_topics.extend(topics)
+            slots.append((current_date, 1))
 
             # Increment the date by the interval, add an extra day if needed
             increment = interval + (1 if remaining_days > 0 else 0)
@@ -152,9 +235,33 @@ class TopicGenerator:
                 remaining_days -= 1
             current_date += timedelta(days=increment)
 
-        return generated_topics
+        return slots
 
+    def generate_topics(self, 
+                        from_date: date, 
+                        to_date: Optional[date] = None, 
+                        total_topics: int = 1,
+                        rebuild: bool = False,
+                        report: bool = True) -> Iterator[Dict]:
+        """Yield topics across the date range as each one is saved.
 
+        Topics are claimed from the reservoir when one is attached; inline
+        generation only covers what the reservoir could not supply. With
+        report the accounting table is printed once the range is done.
+        """
+        since = ledger.mark()
+        for target_date, count in self.schedule(from_date, to_date, total_topics):
+            if self.reservoir and not rebuild:
+                while count > 0:
+                    topic = self.reservoir.claim(target_date)
+                    if topic is None:
+                        break
+                    count -= 1
+                    yield topic
+            if count > 0:
+                yield from self.iter_topic(target_date, count, rebuild)
+        if report:
+            finish_run(self.config, 'topics', since)
 
     def _get_first_monday(self, year: int, month: int) -> date:
         c = calendar.monthcalendar(year, month)
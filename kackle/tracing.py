@@ -0,0 +1,285 @@
+import os
+import sys
+import json
+import time
+import pstats
+import logging
+import cProfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_SPANS = 100000
+
+
+class Span:
+    """One timed stage; attributes can be added until it ends"""
+
+    __slots__ = ('name', 'attrs', 'span_id', 'parent_id', 'tid', 'thread', 'start', 'wall', 'duration')
+
+    def __init__(self, name: str, attrs: Dict, span_id: int, parent_id: Optional[int]):
+        self.name = name
+        self.attrs = attrs
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.tid = threading.get_ident()
+        self.thread = threading.current_thread().name
+        self.wall = time.time()
+        self.start = time.perf_counter()
+        self.duration = None
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def end(self) -> None:
+        if self.duration is None:
+            self.duration = time.perf_counter() - self.start
+            tracer.finish(self)
+
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'id': self.span_id,
+            'parent': self.parent_id,
+            'thread': self.thread,
+            'start': self.wall,
+            'duration': round(self.duration or 0.0, 6),
+            'attrs': self.attrs
+        }
+
+
+class _NoopSpan:
+    """Returned while tracing is off so instrumented code needs no checks"""
+
+    __slots__ = ()
+
+    def set(self, **attrs) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Collects finished spans in memory and streams them to a JSONL file.
+
+    Spans nest per thread: a span started while another is open on the same
+    thread records it as its parent. Work handed to a pool thread starts a
+    new root there, which the Chrome view still lines up by time.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.spans: List[Span] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._jsonl = None
+        self._origin = time.perf_counter()
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def start(self, name: str, **attrs):
+        if not self.enabled:
+            return NOOP_SPAN
+        stack = self._stack()
+        with self._lock:
+            self._next_id += 1
+            span_id = self._next_id
+        span = Span(name, attrs, span_id, stack[-1].span_id if stack else None)
+        stack.append(span)
+        return span
+
+    def finish(self, span: Span) -> None:
+        stack = self._stack()
+        if span in stack:
+            stack.remove(span)
+        with self._lock:
+            if len(self.spans) < MAX_SPANS:
+                self.spans.append(span)
+            if self._jsonl:
+                self._jsonl.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def open(self, jsonl_path: Optional[Path] = None) -> None:
+        with self._lock:
+            self.spans = []
+            self._origin = time.perf_counter()
+            if jsonl_path:
+                self._jsonl = open(jsonl_path, 'a', buffering=1)
+        self.enabled = True
+
+    def close(self) -> None:
+        self.enabled = False
+        with self._lock:
+            if self._jsonl:
+                self._jsonl.close()
+                self._jsonl = None
+
+    def chrome_trace(self) -> Dict:
+        """Spans as complete ("X") events for chrome://tracing or Perfetto"""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        events = [{
+            'name': span.name,
+            'cat': span.name.split('.')[0],
+            'ph': 'X',
+            'ts': round((span.start - self._origin) * 1e6, 1),
+            'dur': round((span.duration or 0.0) * 1e6, 1),
+            'pid': pid,
+            'tid': span.tid,
+            'args': span.attrs
+        } for span in spans]
+        threads = {span.tid: span.thread for span in spans}
+        events.extend({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                      for tid, name in threads.items())
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome(self, path: Path) -> None:
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f, default=str)
+
+    def summary(self) -> str:
+        """Total and mean time per stage name"""
+        totals = {}
+        with self._lock:
+            for span in self.spans:
+                entry = totals.setdefault(span.name, [0, 0.0])
+                entry[0] += 1
+                entry[1] += span.duration or 0.0
+        if not totals:
+            return ""
+        lines = [f"{'stage':<24} {'count':>6} {'total s':>9} {'avg s':>8}"]
+        for name, (count, total) in sorted(totals.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<24} {count:>6} {total:>9.2f} {total / count:>8.3f}")
+        return "\n".join(lines)
+
+
+tracer = Tracer()
+
+
+class Sampler:
+    """Sampling profiler over every thread, written as collapsed stacks.
+
+    cProfile only sees the thread that enabled it, while most pipeline work
+    runs on pool threads. The output feeds flamegraph.pl or speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.counts: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            key = ";".join([names.get(ident, str(ident))] + stack[::-1])
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def enable(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="sampler", daemon=True)
+        self._thread.start()
+
+    def disable(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def dump(self, path: Path) -> None:
+        with open(path, 'w') as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator:
+    """Time the enclosed block as a named stage"""
+    current = tracer.start(name, **attrs)
+    try:
+        yield current
+    except Exception as e:
+        current.set(error=str(e))
+        raise
+    finally:
+        current.end()
+
+
+def start_span(name: str, **attrs):
+    """Open a span that the caller ends explicitly, e.g. across a generator"""
+    return tracer.start(name, **attrs)
+
+
+@contextmanager
+def traced_run(config: Dict, trace: bool = False, profile: bool = False) -> Iterator[Optional[Path]]:
+    """Trace and/or profile everything inside the block.
+
+    Output goes to <tracing.dir>/run-<timestamp>/: run.log with the run's log
+    records, trace.jsonl (streamed as spans end), trace.chrome.json and, when
+    profiling, either profile.prof plus a cumulative-time profile.txt
+    (tracing.profiler: cprofile) or profile.folded (tracing.profiler: sample).
+    """
+    tracing_config = config.get('tracing', {})
+    trace = trace or tracing_config.get('enabled', False)
+    if not trace and not profile:
+        yield None
+        return
+
+    run_dir = Path(tracing_config.get('dir', 'traces')) / f"run-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    log_handler = logging.FileHandler(run_dir / 'run.log')
+    log_handler.setFormatter(logging.Formatter('%(asctime)s - %(threadName)s - %(name)s - %(levelname)s - %(message)s'))
+    logging.getLogger().addHandler(log_handler)
+
+    if trace:
+        tracer.open(run_dir / 'trace.jsonl')
+    profiler = None
+    if profile and tracing_config.get('profiler', 'cprofile') == 'sample':
+        profiler = Sampler(tracing_config.get('sample_interval', 0.005))
+    elif profile:
+        profiler = cProfile.Profile()
+    if profiler:
+        profiler.enable()
+    try:
+        yield run_dir
+    finally:
+        if isinstance(profiler, Sampler):
+            profiler.disable()
+            profiler.dump(run_dir / 'profile.folded')
+        elif profiler:
+            profiler.disable()
+            profiler.dump_stats(run_dir / 'profile.prof')
+            with open(run_dir / 'profile.txt', 'w') as f:
+                pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(60)
+        if trace:
+            tracer.close()
+            tracer.export_chrome(run_dir / 'trace.chrome.json')
+            summary = tracer.summary()
+            if summary:
+                print(summary)
+        logging.getLogger().removeHandler(log_handler)
+        log_handler.close()
+        print(f"Run trace written to {run_dir}")
@@ -1,12 +1,20 @@
 import os
 import re
 import uuid
+import yaml
 import unicodedata
 import string
 from pathlib import Path
 from PIL import Image
 from .config import config 
 
+# Article body, stored beside the article.yaml metadata
+CONTENT_FILE_NAME = "content.md"
+
+# libyaml bindings when PyYAML was built with them, same output as the pure-Python classes
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
 def clean_title(title):
     cleaned_title = title.strip()
     cleaned_title = ''.join(ch for ch in cleaned_title if ch in string.printable)
@@ -40,6 +48,34 @@ def get_clean_path(path: str, file_name: str = None) -> str:
     return base_dir, os.path.join(base_dir, file_name)
 
 
+def atomic_write(path, text: str) -> None:
+    """Write text to a temp file beside path and rename it into place"""
+    path = str(path)
+    tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def load_yaml(stream):
+    """yaml.safe_load using libyaml when available"""
+    return yaml.load(stream, Loader=YamlLoader)
+
+
+def dump_yaml(data) -> str:
+    """yaml.safe_dump using libyaml when available"""
+    return yaml.dump(data, Dumper=YamlDumper)
+
+
+def atomic_dump_yaml(path, data) -> None:
+    """Dump data as YAML to path with write-then-rename so readers never see a partial file"""
+    atomic_write(path, dump_yaml(data))
+
+
 def compress_image(input_path, output_path, quality=85,img_type="webp"):
     """
     Compress an image and save it to a new file.
@@ -1,9 +1,19 @@
+import re
+import time
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import logging
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Dict, Any, Iterator, Union
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import urlparse
+
+from .tracing import span
+from .accounting import ledger
+from .http_cache import HTTPCache, http_cache_from_config
+from .tag_index import TagIndex
+from .limiter import get_limiter
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -28,11 +38,103 @@ class WordPressError(Exception):
     pass
 
 class WordPressAPIClient:
-    def __init__(self, base_url: str, username: str, password: str):
+    def __init__(self, base_url: str, username: str, password: str, name: Optional[str] = None,
+                 concurrency: Optional[int] = None, cache: Optional[HTTPCache] = None,
+                 tag_index: Optional[Dict] = None):
         self.base_url = base_url.rstrip('/')
+        self.name = name or urlparse(self.base_url).netloc or self.base_url
         self.auth = (username, password)
         self.api_base = f"{self.base_url}/wp-json/wp/v2"
+        # Resolved term IDs keyed by (taxonomy, lowercased name)
+        self.term_cache = {}
+        # Adaptive cap on requests in flight to this site; concurrency is its ceiling
+        self.limiter = get_limiter(f"wordpress:{self.name}", 'wordpress', maximum=concurrency)
+        # One session per site so connections are reused, pooled for every slot the limiter can grant
+        self.session = requests.Session()
+        self.session.auth = self.auth
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.limiter.maximum)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Conditional-request cache for GETs, shared between clients
+        self.cache = cache
+        # Canonical tags of this site, None to create every tag as given
+        self.tag_index = TagIndex(self, tag_index) if tag_index is not None else None
         
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Send one REST API request under the site's limiter, recording it in the ledger"""
+        with self.limiter.slot(f"{method} {re.sub(r'/[0-9]+', '/{id}', path)}") as slot:
+            response = self._send(method, path, **kwargs)
+            if response.status_code == 429 or response.status_code >= 500:
+                slot.fail(f"HTTP {response.status_code}")
+            return response
+
+    def _send(self, method: str, path: str, **kwargs) -> requests.Response:
+        cache_key = None
+        request_kwargs = kwargs
+        if self.cache and method == 'GET':
+            url = requests.Request(method, f"{self.api_base}{path}", params=kwargs.get('params')).prepare().url
+            cache_key = self.cache.key(url, self.auth[0])
+            validators = self.cache.conditional_headers(cache_key)
+            if validators:
+                request_kwargs = dict(kwargs, headers=dict(kwargs.get('headers') or {}, **validators))
+
+        started = time.monotonic()
+        response = self.session.request(method, f"{self.api_base}{path}", **request_kwargs)
+        body = response.request.body
+        ledger.record(
+            'wordpress',
+            f"{method} {re.sub(r'/[0-9]+', '/{id}', path)}",
+            time.monotonic() - started,
+            bytes_sent=len(body) if body else 0,
+            bytes_received=len(response.content),
+            status=str(response.status_code)
+        )
+
+        if cache_key:
+            if response.status_code == 304:
+                cached = self.cache.revalidated(cache_key, response)
+                if cached is None:
+                    # The stored body went missing; fetch it unconditionally
+                    return self._send(method, path, **kwargs)
+                return cached
+            self.cache.store(cache_key, response)
+        return response
+
+    def iter_collection(self, path: str, params: Optional[Dict[str, Any]] = None,
+                        fields: Optional[List[str]] = None, per_page: int = 100,
+                        strict: bool = False) -> Iterator[Dict[str, Any]]:
+        """Yield every item of a paginated collection, one page in memory at a time.
+
+        fields trims each item server-side with _fields. Errors raise
+        WordPressError. Paging is by offset, so a collection that shrinks
+        while it is read can shift items past the pages already read; by
+        default the iteration then just ends early. With strict, for callers
+        that must see every item, a change of X-WP-Total between pages or a
+        page past the end raises WordPressError instead.
+        """
+        query = dict(params or {}, per_page=per_page)
+        if fields:
+            query['_fields'] = ','.join(fields)
+        page = 1
+        total = None
+        while True:
+            response = self._request('GET', path, params=dict(query, page=page))
+            if page > 1 and response.status_code == 400:
+                # rest_post_invalid_page_number: the collection shrank while paging
+                if strict:
+                    raise WordPressError(f"{path} shrank while paging at page {page}")
+                return
+            items = self._handle_response(response, f"list {path}")
+            if strict and response.headers.get('X-WP-Total') is not None:
+                if total is not None and response.headers['X-WP-Total'] != total:
+                    raise WordPressError(f"{path} changed while paging at page {page}")
+                total = response.headers['X-WP-Total']
+            yield from items
+            total_pages = int(response.headers.get('X-WP-TotalPages') or 0)
+            if len(items) < per_page or (total_pages and page >= total_pages):
+                return
+            page += 1
+
     def _handle_response(self, response: requests.Response, operation: str) -> Dict:
         """Handle API response and log details"""
         try:
@@ -53,6 +155,19 @@ class WordPressAPIClient:
             logger.error(f"Failed to decode response: {str(e)}")
             raise WordPressError(f"Invalid JSON response: {str(e)}")
 
+    @staticmethod
+    def _existing_term_id(response: requests.Response) -> Optional[int]:
+        """Term ID from a term_exists error, which a concurrent create of the same name causes"""
+        if response.status_code != 400:
+            return None
+        try:
+            body = response.json()
+        except ValueError:
+            return None
+        if isinstance(body, dict) and body.get('code') == 'term_exists':
+            return (body.get('data') or {}).get('term_id')
+        return None
+
     def _save_error_log(self, error_details: Dict):
         """Save detailed error information to file"""
         try:
@@ -82,38 +197,43 @@ class WordPressAPIClient:
 
     def create_post(self,postdate:str, title: str, content: str, image_path: Optional[str] = None,
                    tags: Optional[List[str]] = None, categories: Optional[List[str]] = None,
-                   status: str = 'publish') -> Dict[str, Any]:
+                   status: str = 'publish', image_data: Optional[bytes] = None) -> Dict[str, Any]:
         logger.info(f"Creating post: {title}")
         try:
             # Handle media upload
             featured_media_id = None
             if image_path:
                 logger.debug(f"Uploading media from {image_path}")
-                featured_media_id = self.upload_media(image_path)
+                with span('wp.media_upload', site=self.name):
+                    featured_media_id = self.upload_media(image_path, data=image_data)
                 if not featured_media_id:
                     logger.warning("Failed to upload featured image")
 
-            # Handle tags
-            tag_ids = []
-            if tags:
-                logger.debug(f"Processing tags: {tags}")
-                for tag in tags:
-                    tag_id = self.create_tag(tag)
-                    if tag_id:
-                        tag_ids.append(tag_id)
-                    else:
-                        logger.warning(f"Failed to create/get tag: {tag}")
-
-            # Handle categories
-            category_ids = []
-            if categories:
-                logger.debug(f"Processing categories: {categories}")
-                for category in categories:
-                    cat_id = self.create_category(category)
-                    if cat_id:
-                        category_ids.append(cat_id)
-                    else:
-                        logger.warning(f"Failed to create/get category: {category}")
+            with span('wp.terms', tags=len(tags or []), categories=len(categories or [])):
+                # Handle tags
+                tag_ids = []
+                if tags and self.tag_index:
+                    tag_ids = self.tag_index.resolve(tags)
+                    logger.debug(f"Resolved tags {tags} to {tag_ids}")
+                elif tags:
+                    logger.debug(f"Processing tags: {tags}")
+                    for tag in tags:
+                        tag_id = self.create_tag(tag)
+                        if tag_id:
+                            tag_ids.append(tag_id)
+                        else:
+                            logger.warning(f"Failed to create/get tag: {tag}")
+
+                # Handle categories
+                category_ids = []
+                if categories:
+                    logger.debug(f"Processing categories: {categories}")
+                    for category in categories:
+                        cat_id = self.create_category(category)
+                        if cat_id:
+                            category_ids.append(cat_id)
+                        else:
+                            logger.warning(f"Failed to create/get category: {category}")
 
             post_data = {
                 'title': title,
@@ -133,11 +253,14 @@ class WordPressAPIClient:
                 post_data['categories'] = category_ids
 
             logger.debug(f"Sending post data: {json.dumps(post_data, indent=2)}")
-            response = requests.post(f"{self.api_base}/posts", auth=self.auth, json=post_data)
+            with span('wp.post_create') as post_span:
+                response = self._request('POST', "/posts", json=post_data)
+                post_span.set(status=response.status_code)
             print("POST RESPONSE")
             print( response.json())
             #return self._handle_response(response, "create_post")
             post_data['post_id'] = response.json().get('id') if response.status_code == 201 else None
+            post_data['site'] = self.base_url
             return post_data
 
         except Exception as e:
@@ -155,11 +278,13 @@ class WordPressAPIClient:
 
     def create_tag(self, name: str, description: Optional[str] = None) -> Optional[int]:
         logger.debug(f"Creating/getting tag: {name}")
+        cache_key = ('tags', name.lower())
+        if cache_key in self.term_cache:
+            return self.term_cache[cache_key]
         try:
             # First try to find existing tag
-            existing_tags = requests.get(
-                f"{self.api_base}/tags",
-                auth=self.auth,
+            existing_tags = self._request(
+                'GET', "/tags",
                 params={'search': name, 'per_page': 100}
             )
             
@@ -169,6 +294,7 @@ class WordPressAPIClient:
             for tag in response_data:
                 if tag['name'].lower() == name.lower():
                     logger.debug(f"Found existing tag: {name} (ID: {tag['id']})")
+                    self.term_cache[cache_key] = tag['id']
                     return tag['id']
 
             # Create new tag if not found
@@ -177,8 +303,11 @@ class WordPressAPIClient:
             if description:
                 data['description'] = description
                 
-            response = requests.post(f"{self.api_base}/tags", auth=self.auth, json=data)
-            result = self._handle_response(response, "create_tag")
+            response = self._request('POST', "/tags", json=data)
+            term_id = self._existing_term_id(response)
+            result = {'id': term_id} if term_id else self._handle_response(response, "create_tag")
+            if result.get('id'):
+                self.term_cache[cache_key] = result['id']
             return result.get('id')
 
         except Exception as e:
@@ -195,11 +324,13 @@ class WordPressAPIClient:
     def create_category(self, name: str, description: Optional[str] = None,
                        parent: Optional[int] = None) -> Optional[int]:
         logger.debug(f"Creating/getting category: {name}")
+        cache_key = ('categories', name.lower())
+        if cache_key in self.term_cache:
+            return self.term_cache[cache_key]
         try:
             # First try to find existing category
-            existing_categories = requests.get(
-                f"{self.api_base}/categories",
-                auth=self.auth,
+            existing_categories = self._request(
+                'GET', "/categories",
                 params={'search': name, 'per_page': 100}
             )
             
@@ -209,6 +340,7 @@ class WordPressAPIClient:
             for category in response_data:
                 if category['name'].lower() == name.lower():
                     logger.debug(f"Found existing category: {name} (ID: {category['id']})")
+                    self.term_cache[cache_key] = category['id']
                     return category['id']
 
             # Create new category if not found
@@ -219,8 +351,11 @@ class WordPressAPIClient:
             if parent:
                 data['parent'] = parent
 
-            response = requests.post(f"{self.api_base}/categories", auth=self.auth, json=data)
-            result = self._handle_response(response, "create_category")
+            response = self._request('POST', "/categories", json=data)
+            term_id = self._existing_term_id(response)
+            result = {'id': term_id} if term_id else self._handle_response(response, "create_category")
+            if result.get('id'):
+                self.term_cache[cache_key] = result['id']
             return result.get('id')
 
         except Exception as e:
@@ -236,7 +371,7 @@ class WordPressAPIClient:
 
     def get_post(self, post_id: int) -> Optional[Dict[str, Any]]:
         try:
-            response = requests.get(f"{self.api_base}/posts/{post_id}", auth=self.auth)
+            response = self._request('GET', f"/posts/{post_id}")
             return self._handle_response(response, "get_post")
         except Exception as e:
             logger.error(f"Failed to get post {post_id}: {str(e)}")
@@ -244,7 +379,7 @@ class WordPressAPIClient:
 
     def get_posts(self, params: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
         try:
-            response = requests.get(f"{self.api_base}/posts", auth=self.auth, params=params)
+            response = self._request('GET', "/posts", params=params)
             return self._handle_response(response, "get_posts")
         except Exception as e:
             logger.error(f"Failed to get posts with params {params}: {str(e)}")
@@ -252,7 +387,7 @@ class WordPressAPIClient:
 
     def update_post(self, post_id: int, data: Dict[str, Any]) -> bool:
         try:
-            response = requests.put(f"{self.api_base}/posts/{post_id}", auth=self.auth, json=data)
+            response = self._request('PUT', f"/posts/{post_id}", json=data)
             self._handle_response(response, "update_post")
             return True
         except Exception as e:
@@ -262,23 +397,30 @@ class WordPressAPIClient:
     def delete_post(self, post_id: int, force: bool = False) -> bool:
         try:
             params = {'force': force}
-            response = requests.delete(f"{self.api_base}/posts/{post_id}", auth=self.auth, params=params)
+            response = self._request('DELETE', f"/posts/{post_id}", params=params)
             self._handle_response(response, "delete_post")
             return True
         except Exception as e:
             logger.error(f"Failed to delete post {post_id}: {str(e)}")
             return False
 
-    def upload_media(self, file_path: str, title: Optional[str] = None) -> Optional[int]:
+    def upload_media(self, file_path: str, title: Optional[str] = None,
+                     data: Optional[bytes] = None) -> Optional[int]:
+        """Upload file_path, or data under file_path's name when the bytes are already in memory"""
         try:
+            form = {'title': title} if title else {}
+            if data is not None:
+                files = {'file': (Path(file_path).name, data)}
+                response = self._request('POST', "/media", files=files, data=form)
+                return self._handle_response(response, "upload_media").get('id')
+
             if not Path(file_path).exists():
                 logger.error(f"Media file not found: {file_path}")
                 return None
 
             with open(file_path, 'rb') as file:
                 files = {'file': file}
-                data = {'title': title} if title else {}
-                response = requests.post(f"{self.api_base}/media", auth=self.auth, files=files, data=data)
+                response = self._request('POST', "/media", files=files, data=form)
                 result = self._handle_response(response, "upload_media")
                 return result.get('id')
         except Exception as e:
@@ -287,7 +429,7 @@ class WordPressAPIClient:
 
     def get_media(self, media_id: int) -> Optional[Dict[str, Any]]:
         try:
-            response = requests.get(f"{self.api_base}/media/{media_id}", auth=self.auth)
+            response = self._request('GET', f"/media/{media_id}")
             return self._handle_response(response, "get_media")
         except Exception as e:
             logger.error(f"Failed to get media {media_id}: {str(e)}")
@@ -295,7 +437,7 @@ class WordPressAPIClient:
 
     def get_all_media(self, params: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
         try:
-            response = requests.get(f"{self.api_base}/media", auth=self.auth, params=params)
+            response = self._request('GET', "/media", params=params)
             return self._handle_response(response, "get_all_media")
         except Exception as e:
             logger.error(f"Failed to get media list with params {params}: {str(e)}")
@@ -303,7 +445,7 @@ class WordPressAPIClient:
 
     def update_media(self, media_id: int, data: Dict[str, Any]) -> bool:
         try:
-            response = requests.post(f"{self.api_base}/media/{media_id}", auth=self.auth, json=data)
+            response = self._request('POST', f"/media/{media_id}", json=data)
             self._handle_response(response, "update_media")
             return True
         except Exception as e:
@@ -313,7 +455,7 @@ class WordPressAPIClient:
     def delete_media(self, media_id: int, force: bool = False) -> bool:
         try:
             params = {'force': force}
-            response = requests.delete(f"{self.api_base}/media/{media_id}", auth=self.auth, params=params)
+            response = self._request('DELETE', f"/media/{media_id}", params=params)
             self._handle_response(response, "delete_media")
             return True
         except Exception as e:
@@ -335,7 +477,7 @@ class WordPressAPIClient:
 
     def get_tag(self, tag_id: int) -> Optional[Dict[str, Any]]:
         try:
-            response = requests.get(f"{self.api_base}/tags/{tag_id}", auth=self.auth)
+            response = self._request('GET', f"/tags/{tag_id}")
             return self._handle_response(response, "get_tag")
         except Exception as e:
             logger.error(f"Failed to get tag {tag_id}: {str(e)}")
@@ -343,7 +485,7 @@ class WordPressAPIClient:
 
     def get_tags(self, params: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
         try:
-            response = requests.get(f"{self.api_base}/tags", auth=self.auth, params=params)
+            response = self._request('GET', "/tags", params=params)
             return self._handle_response(response, "get_tags")
         except Exception as e:
             logger.error(f"Failed to get tags with params {params}: {str(e)}")
@@ -351,7 +493,7 @@ class WordPressAPIClient:
 
     def update_tag(self, tag_id: int, data: Dict[str, Any]) -> bool:
         try:
-            response = requests.put(f"{self.api_base}/tags/{tag_id}", auth=self.auth, json=data)
+            response = self._request('PUT', f"/tags/{tag_id}", json=data)
             self._handle_response(response, "update_tag")
             return True
         except Exception as e:
@@ -361,7 +503,7 @@ class WordPressAPIClient:
     def delete_tag(self, tag_id: int, force: bool = False) -> bool:
         try:
             params = {'force': force}
-            response = requests.delete(f"{self.api_base}/tags/{tag_id}", auth=self.auth, params=params)
+            response = self._request('DELETE', f"/tags/{tag_id}", params=params)
             self._handle_response(response, "delete_tag")
             return True
         except Exception as e:
@@ -370,7 +512,7 @@ class WordPressAPIClient:
 
     def get_category(self, category_id: int) -> Optional[Dict[str, Any]]:
         try:
-            response = requests.get(f"{self.api_base}/categories/{category_id}", auth=self.auth)
+            response = self._request('GET', f"/categories/{category_id}")
             return self._handle_response(response, "get_category")
         except Exception as e:
             logger.error(f"Failed to get category {category_id}: {str(e)}")
@@ -378,7 +520,7 @@ class WordPressAPIClient:
 
     def get_categories(self, params: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
         try:
-            response = requests.get(f"{self.api_base}/categories", auth=self.auth, params=params)
+            response = self._request('GET', "/categories", params=params)
             return self._handle_response(response, "get_categories")
         except Exception as e:
             logger.error(f"Failed to get categories with params {params}: {str(e)}")
@@ -386,7 +528,7 @@ class WordPressAPIClient:
 
     def update_category(self, category_id: int, data: Dict[str, Any]) -> bool:
         try:
-            response = requests.put(f"{self.api_base}/categories/{category_id}", auth=self.auth, json=data)
+            response = self._request('PUT', f"/categories/{category_id}", json=data)
             self._handle_response(response, "update_category")
             return True
         except Exception as e:
@@ -396,9 +538,37 @@ class WordPressAPIClient:
     def delete_category(self, category_id: int, force: bool = False) -> bool:
         try:
             params = {'force': force}
-            response = requests.delete(f"{self.api_base}/categories/{category_id}", auth=self.auth, params=params)
+            response = self._request('DELETE', f"/categories/{category_id}", params=params)
             self._handle_response(response, "delete_category")
             return True
         except Exception as e:
             logger.error(f"Failed to delete category {category_id}: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+
+def create_wordpress_clients(config: Dict) -> Union[None, WordPressAPIClient, Dict[str, WordPressAPIClient]]:
+    """Client for config['wordpress'], or {site name: client} when it is a list of sites.
+
+    Each site takes url, username and password, plus an optional name
+    (defaults to the host) and concurrency cap on in-flight requests. All
+    clients share the http_cache for their GETs, and each gets its own
+    canonical tag index unless tags.canonical is false.
+    """
+    sites = config.get('wordpress')
+    if not sites:
+        return None
+    cache = http_cache_from_config(config)
+    tag_config = config.get('tags', {})
+    tag_index = tag_config if tag_config.get('canonical', True) else None
+    if isinstance(sites, dict):
+        return WordPressAPIClient(sites['url'], sites['username'], sites['password'],
+                                  concurrency=sites.get('concurrency'), cache=cache, tag_index=tag_index)
+    clients = {}
+    for site in sites:
+        client = WordPressAPIClient(site['url'], site['username'], site['password'],
+                                    name=site.get('name'), concurrency=site.get('concurrency'), cache=cache,
+                                    tag_index=tag_index)
+        if client.name in clients:
+            raise ValueError(f"Duplicate WordPress site name: {client.name}")
+        clients[client.name] = client
+    return clients
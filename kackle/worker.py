@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import signal
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import yaml
+
+from .article import Article, ArticleGenerator
+from .topic import TopicGenerator
+from .lease import Lease, read_lease
+
+logger = logging.getLogger(__name__)
+
+JOB_TYPES = ('topic', 'article', 'upload', 'resync')
+
+
+class JobError(Exception):
+    """Raised when a spooled job is malformed or fails"""
+    pass
+
+
+def parse_date(value: Optional[str]):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+class Worker:
+    """Long-running job processor fed by a spool directory.
+
+    Job files (JSON) dropped in <spool>/incoming are claimed by taking a lease
+    on the job and renaming it into <spool>/processing, which is atomic, and
+    end up in done/ or failed/ with a result record. Several workers, on
+    several hosts sharing the spool, can serve the same queue: jobs whose
+    lease has expired because their worker died are put back in incoming.
+    Clients, prompts, term and render caches stay warm for the life of the
+    process. SIGTERM/SIGINT stop claiming new jobs and
+    wait for in-flight ones to finish.
+
+    Job formats:
+        {"type": "topic", "from_date": "2024-01-01", "to_date": null, "count": 1}
+        {"type": "article", "topic_file": "path/to/topic.yaml"}
+        {"type": "article", "from_date": "2024-01-01", "to_date": null, "count": 1}
+        {"type": "upload", "file": "path/to/article.yaml"}
+        {"type": "resync", "file": "path/to/article.yaml"}
+    """
+
+    def __init__(self, config: Dict):
+        worker_config = config.get('worker', {})
+        self.config = config
+        self.spool = Path(worker_config.get('spool', 'spool'))
+        self.concurrency = worker_config.get('concurrency', 2)
+        self.poll_interval = worker_config.get('poll_interval', 2)
+        self.lease_ttl = config.get('lease', {}).get('ttl', 120)
+        for name in ('incoming', 'processing', 'done', 'failed'):
+            (self.spool / name).mkdir(parents=True, exist_ok=True)
+
+        self.topic_generator = TopicGenerator(config)
+        self.article_generator = ArticleGenerator(config)
+        self.wp_client = self.article_generator.wp_client
+        # Topic generation shares dedup state, so topic jobs run one at a time
+        self.topic_lock = threading.Lock()
+
+        self.stopping = threading.Event()
+        self.slots = threading.Semaphore(self.concurrency)
+        self.processed = 0
+        self._processed_lock = threading.Lock()
+
+    # Job handlers --------------------------------------------------------
+
+    def _topics(self, job: Dict):
+        return self.topic_generator.generate_topics(
+            parse_date(job.get('from_date')) or datetime.today().date(),
+            parse_date(job.get('to_date')),
+            job.get('count', 1),
+            job.get('rebuild', False)
+        )
+
+    def handle_topic(self, job: Dict) -> Dict:
+        with self.topic_lock:
+            topics = list(self._topics(job))
+        return {'topics': [topic['topic'] for topic in topics]}
+
+    def handle_article(self, job: Dict) -> Dict:
+        if job.get('topic_file'):
+            with open(job['topic_file']) as f:
+                topics = [yaml.safe_load(f)]
+        else:
+            with self.topic_lock:
+                topics = list(self._topics(job))
+        articles = self.article_generator.generate_batch(topics)
+        return {'articles': [article.title for article in articles]}
+
+    def handle_upload(self, job: Dict) -> Dict:
+        """Publish a saved article unless it already is.
+
+        Holds the same article-directory lease as ArticleGenerator.create and
+        re-reads the article under it, so duplicate jobs or concurrent workers
+        never create a second post.
+        """
+        if not self.wp_client:
+            raise JobError("WordPress client not configured")
+        article_file = Path(job['file'])
+        lease = Lease(article_file.parent / ".lease", ttl=self.lease_ttl)
+        if not lease.acquire():
+            raise JobError(f"Article is being processed by another worker: {article_file}")
+        try:
+            article = Article.load(article_file)
+            sites = self.wp_client if isinstance(self.wp_client, dict) else None
+            if article.is_published(sites):
+                logger.info(f"Article already published, skipping upload: {article.title}")
+                return {'wordpress_data': article.wordpress_data, 'skipped': True}
+            if not article.upload_to_wordpress(self.wp_client):
+                raise JobError(f"Failed to upload article: {article.title}")
+            article.save()
+            return {'wordpress_data': article.wordpress_data}
+        finally:
+            lease.release()
+
+    def handle_resync(self, job: Dict) -> Dict:
+        """Refresh an article's WordPress data under its article-directory lease"""
+        if not self.wp_client:
+            raise JobError("WordPress client not configured")
+        article_file = Path(job['file'])
+        lease = Lease(article_file.parent / ".lease", ttl=self.lease_ttl)
+        if not lease.acquire():
+            raise JobError(f"Article is being processed by another worker: {article_file}")
+        try:
+            article = Article.load(article_file)
+            if not article.resync_from_wordpress(self.wp_client):
+                raise JobError(f"Failed to resync article: {article.title}")
+            article.save()
+            return {'wordpress_data': article.wordpress_data}
+        finally:
+            lease.release()
+
+    # Spool handling ------------------------------------------------------
+
+    def _lease(self, job_name: str) -> Lease:
+        return Lease(self.spool / 'processing' / f"{job_name}.lease", ttl=self.lease_ttl)
+
+    def claim(self) -> Optional[Tuple[Path, Lease]]:
+        """Lease the oldest incoming job and move it into processing"""
+        incoming = []
+        for job_file in self.spool.glob('incoming/*.json'):
+            try:
+                incoming.append((job_file.stat().st_mtime, job_file))
+            except FileNotFoundError:
+                continue
+        for _, job_file in sorted(incoming):
+            lease = self._lease(job_file.name)
+            if not lease.acquire():
+                continue
+            target = self.spool / 'processing' / job_file.name
+            try:
+                os.rename(job_file, target)
+                return target, lease
+            except FileNotFoundError:
+                # Finished by another worker between our listing and lease
+                lease.release()
+        return None
+
+    def reclaim_stale(self) -> int:
+        """Requeue processing jobs whose worker stopped heartbeating"""
+        requeued = 0
+        for job_file in self.spool.glob('processing/*.json'):
+            current = read_lease(self.spool / 'processing' / f"{job_file.name}.lease")
+            if current and current.get('expires', 0) > time.time():
+                continue
+            lease = self._lease(job_file.name)
+            if not lease.acquire():
+                continue
+            try:
+                os.rename(job_file, self.spool / 'incoming' / job_file.name)
+                logger.warning(f"Requeued stale job {job_file.name}")
+                requeued += 1
+            except FileNotFoundError:
+                pass
+            finally:
+                lease.release()
+        return requeued
+
+    def run_job(self, job_file: Path, lease: Lease) -> None:
+        started = time.monotonic()
+        record = {'job_file': job_file.name, 'started': datetime.now().isoformat()}
+        try:
+            with open(job_file) as f:
+                job = json.load(f)
+            record['job'] = job
+            job_type = job.get('type')
+            if job_type not in JOB_TYPES:
+                raise JobError(f"Unknown job type: {job_type}")
+            record['result'] = getattr(self, f"handle_{job_type}")(job)
+            outcome = 'done'
+        except Exception as e:
+            logger.error(f"Job {job_file.name} failed: {e}")
+            record['error'] = str(e)
+            outcome = 'failed'
+        finally:
+            self.slots.release()
+
+        record['seconds'] = round(time.monotonic() - started, 3)
+        target = self.spool / outcome / job_file.name
+        with open(target.with_suffix('.result.json'), 'w') as f:
+            json.dump(record, f, indent=2, default=str)
+        os.replace(job_file, target)
+        lease.release()
+        with self._processed_lock:
+            self.processed += 1
+        logger.info(f"Job {job_file.name} {outcome} in {record['seconds']}s")
+
+    def stop(self, signum=None, frame=None) -> None:
+        if not self.stopping.is_set():
+            logger.info("Shutdown requested, draining in-flight jobs")
+        self.stopping.set()
+
+    def serve(self) -> int:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        logger.info(f"Serving spool {self.spool} with concurrency {self.concurrency}")
+
+        last_reclaim = 0.0
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="job") as pool:
+            while not self.stopping.is_set():
+                if time.monotonic() - last_reclaim > self.lease_ttl / 2:
+                    self.reclaim_stale()
+                    last_reclaim = time.monotonic()
+                if not self.slots.acquire(timeout=self.poll_interval):
+                    continue
+                claimed = self.claim()
+                if claimed is None:
+                    self.slots.release()
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                pool.submit(self.run_job, *claimed)
+        # Leaving the executor waits for every in-flight job
+        logger.info(f"Worker stopped after {self.processed} jobs")
+        return self.processed
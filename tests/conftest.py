@@ -0,0 +1,26 @@
+"""kackle reads config.yaml from the working directory at import time, so the
+tests run from a scratch directory holding a throwaway config."""
+import os
+import atexit
+import shutil
+import tempfile
+from pathlib import Path
+
+import yaml
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+_workdir = Path(tempfile.mkdtemp(prefix='kackle-tests-'))
+atexit.register(shutil.rmtree, _workdir, ignore_errors=True)
+with open(_workdir / 'config.yaml', 'w') as f:
+    yaml.safe_dump({
+        'folders': {
+            'articles': str(_workdir / 'articles'),
+            'images': str(_workdir / 'images'),
+            'prompts': str(REPO_ROOT / 'prompts'),
+        },
+        'openai': {'api_key': 'test', 'orginization_id': 'test', 'llm-model': 'test-model'},
+        'replicate': {'api_key': 'test', 'image-model': 'test/flux', 'width': 512, 'height': 512},
+        'img_src': 'flux',
+    }, f)
+os.chdir(_workdir)
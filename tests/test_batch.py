@@ -0,0 +1,124 @@
+import json
+from datetime import date
+
+import pytest
+import yaml
+
+from kackle.article import ArticleError
+from kackle.batch import BatchManager, LocalBatchBackend
+
+
+class FakeGenerator:
+    """Stands in for ArticleGenerator: renders prompt data and records creates"""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.created = {}
+
+    def _prompt_data(self, topic):
+        return dict({'company': '', 'key_details': ''}, **topic)
+
+    def create(self, topic, content=None):
+        if topic['topic'] in self.fail:
+            raise ArticleError(f"Failed to create article: {topic['topic']}")
+        self.created[topic['topic']] = content
+
+
+def write_topic(articles_dir, folder, topic, day, with_article=False):
+    topic_dir = articles_dir / folder
+    topic_dir.mkdir(parents=True)
+    with open(topic_dir / 'topic.yaml', 'w') as f:
+        yaml.safe_dump({'topic': topic, 'description': 'd', 'tags': ['t'], 'date': day}, f)
+    if with_article:
+        (topic_dir / 'article.yaml').write_text('title: done\n')
+
+
+@pytest.fixture
+def articles_dir(tmp_path):
+    articles = tmp_path / 'articles'
+    write_topic(articles, 'alpha', 'Alpha', '2025-01-01')
+    write_topic(articles, 'beta', 'Beta', '2025-01-02')
+    write_topic(articles, 'written', 'Written', '2025-01-01', with_article=True)
+    write_topic(articles, 'later', 'Later', '2025-02-01')
+    return articles
+
+
+def manager(articles_dir, generator, backend=None):
+    backend = backend or LocalBatchBackend(articles_dir.parent / 'local')
+    return BatchManager({'folders': {'articles': str(articles_dir)}}, backend=backend,
+                        article_generator=generator)
+
+
+def test_local_backend_walks_the_batch_lifecycle(tmp_path):
+    input_path = tmp_path / 'input.jsonl'
+    input_path.write_text(json.dumps({'custom_id': 'alpha', 'body': {
+        'model': 'm', 'messages': [{'role': 'user', 'content': 'topic: Alpha'}]}}) + "\n\n")
+    backend = LocalBatchBackend(tmp_path / 'local')
+
+    batch_id = backend.submit(input_path)
+    assert backend.status(batch_id) == ('in_progress', None)
+    status, output_file_id = backend.status(batch_id)
+    assert status == 'completed'
+    # Further polls are stable and do not rerun the batch
+    assert backend.status(batch_id) == ('completed', output_file_id)
+
+    lines = [json.loads(line) for line in backend.download(output_file_id).splitlines()]
+    assert [line['custom_id'] for line in lines] == ['alpha']
+    assert lines[0]['response']['status_code'] == 200
+    assert lines[0]['response']['body']['choices'][0]['message']['content'].startswith('### Alpha')
+
+
+def test_submit_batches_pending_topics_in_range_once(articles_dir):
+    batches = manager(articles_dir, FakeGenerator())
+
+    assert [name for name, _ in batches.pending_topics(date(2025, 1, 1), date(2025, 1, 31))] == ['alpha', 'beta']
+    batch_id = batches.submit(date(2025, 1, 1), date(2025, 1, 31))
+    assert batch_id
+
+    record = json.loads((articles_dir / '.batches' / f"{batch_id}.json").read_text())
+    assert record['status'] == 'submitted'
+    assert sorted(record['requests']) == ['alpha', 'beta']
+    # Topics in flight are not submitted again
+    assert batches.submit(date(2025, 1, 1), date(2025, 1, 31)) is None
+
+
+def test_collect_creates_articles_when_the_batch_completes(articles_dir):
+    generator = FakeGenerator()
+    batches = manager(articles_dir, generator)
+    batch_id = batches.submit(date(2025, 1, 1), date(2025, 1, 31))
+
+    assert batches.collect() == {'batches': 0, 'pending': 1, 'articles': 0, 'failed': 0}
+    assert batches.collect() == {'batches': 1, 'pending': 0, 'articles': 2, 'failed': 0}
+    assert sorted(generator.created) == ['Alpha', 'Beta']
+    assert generator.created['Alpha'].startswith('### Alpha')
+
+    record = json.loads((articles_dir / '.batches' / f"{batch_id}.json").read_text())
+    assert record['status'] == 'collected'
+    assert record['result'] == 'completed'
+    # Collected batches are skipped, and their topics can be batched again
+    assert batches.collect() == {'batches': 0, 'pending': 0, 'articles': 0, 'failed': 0}
+    assert len(batches.pending_topics(date(2025, 1, 1), date(2025, 1, 31))) == 2
+
+
+def test_failed_requests_are_counted_per_article(articles_dir):
+    generator = FakeGenerator(fail={'Beta'})
+    batches = manager(articles_dir, generator)
+    batches.submit(date(2025, 1, 1), date(2025, 1, 31))
+
+    batches.collect()
+    assert batches.collect() == {'batches': 1, 'pending': 0, 'articles': 1, 'failed': 1}
+    assert list(generator.created) == ['Alpha']
+
+
+class ExpiringBackend(LocalBatchBackend):
+    def status(self, batch_id):
+        return 'expired', None
+
+
+def test_expired_batch_fails_all_its_requests(articles_dir):
+    generator = FakeGenerator()
+    batches = manager(articles_dir, generator, ExpiringBackend(articles_dir.parent / 'local'))
+    batches.submit(date(2025, 1, 1), date(2025, 1, 31))
+
+    assert batches.collect() == {'batches': 1, 'pending': 0, 'articles': 0, 'failed': 2}
+    assert generator.created == {}
@@ -0,0 +1,80 @@
+import json
+import os
+import time
+
+import pytest
+
+from kackle.lease import DEFAULT_TTL, Lease, LeaseError, read_lease
+
+
+def write_lease(path, owner, expires):
+    path.write_text(json.dumps({'owner': owner, 'expires': expires}))
+
+
+def test_second_lease_waits_for_release(tmp_path):
+    path = tmp_path / '.lease'
+    first, second = Lease(path, ttl=60), Lease(path, ttl=60)
+
+    assert first.acquire()
+    assert first.owned()
+    assert not second.acquire()
+
+    first.release()
+    assert not path.exists()
+    assert second.acquire()
+    assert read_lease(path)['owner'] == second.owner
+    second.release()
+
+
+def test_context_manager_raises_when_held(tmp_path):
+    path = tmp_path / '.lease'
+    with Lease(path, ttl=60):
+        with pytest.raises(LeaseError):
+            with Lease(path, ttl=60):
+                pass
+    assert not path.exists()
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    path = tmp_path / '.lease'
+    write_lease(path, 'crashed-worker', time.time() - 1)
+
+    lease = Lease(path, ttl=60)
+    assert lease.acquire()
+    assert read_lease(path)['owner'] == lease.owner
+    # The stale file is renamed aside and removed, not left behind
+    assert [p.name for p in tmp_path.iterdir()] == ['.lease']
+    lease.release()
+
+
+def test_live_lease_is_not_reclaimed(tmp_path):
+    path = tmp_path / '.lease'
+    write_lease(path, 'busy-worker', time.time() + 60)
+
+    assert not Lease(path, ttl=60).acquire()
+    assert read_lease(path)['owner'] == 'busy-worker'
+
+
+def test_half_written_lease_is_reclaimed_once_old(tmp_path):
+    path = tmp_path / '.lease'
+    path.write_text('{"owner": ')
+
+    assert not Lease(path, ttl=60).acquire()
+
+    old = time.time() - DEFAULT_TTL - 1
+    os.utime(path, (old, old))
+    lease = Lease(path, ttl=60)
+    assert lease.acquire()
+    lease.release()
+
+
+def test_release_keeps_a_lease_taken_over_by_another_owner(tmp_path):
+    path = tmp_path / '.lease'
+    lease = Lease(path, ttl=60)
+    assert lease.acquire()
+    write_lease(path, 'new-owner', time.time() + 60)
+
+    assert not lease.renew()
+    assert lease.lost.is_set()
+    lease.release()
+    assert read_lease(path)['owner'] == 'new-owner'
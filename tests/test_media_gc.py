@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from kackle.media_gc import MediaGCError, find_orphans, gc_media
+from kackle.wordpress_client import WordPressError
+
+OLD = (datetime.now(timezone.utc) - timedelta(days=30)).strftime('%Y-%m-%dT%H:%M:%S')
+NEW = (datetime.now(timezone.utc) - timedelta(minutes=5)).strftime('%Y-%m-%dT%H:%M:%S')
+UPLOADS = 'https://blog.example/wp-content/uploads/2025/01'
+
+
+def media(media_id, name, date_gmt=OLD, post=0):
+    return {'id': media_id, 'date_gmt': date_gmt, 'post': post, 'source_url': f"{UPLOADS}/{name}"}
+
+
+def post(post_id, raw='', featured_media=0, **content):
+    return {'id': post_id, 'featured_media': featured_media, 'content': dict(content, raw=raw)}
+
+
+class FakeClient:
+    """Serves /posts, /pages and /media from lists and records deletions"""
+
+    name = 'fake'
+
+    def __init__(self, posts=(), pages=(), library=(), fail=None):
+        self.collections = {'/posts': list(posts), '/pages': list(pages), '/media': list(library)}
+        self.fail = fail
+        self.deleted = []
+
+    def iter_collection(self, path, params=None, fields=None, per_page=100, strict=False):
+        if path == self.fail:
+            raise WordPressError(f"400 on page 2 of {path}")
+        yield from self.collections[path]
+
+    def delete_media(self, media_id, force=False):
+        self.deleted.append(media_id)
+        return True
+
+
+@pytest.fixture
+def client():
+    return FakeClient(
+        posts=[
+            post(1, featured_media=10),
+            post(2, raw='<img class="wp-image-11" src="x.webp">'),
+            post(3, raw=f'<img src="{UPLOADS}/resized-300x200.webp">'),
+        ],
+        pages=[post(4, raw=f'<a href="{UPLOADS}/scaled-scaled.png?v=2">')],
+        library=[
+            media(10, 'featured.webp'),
+            media(11, 'inline.webp'),
+            media(12, 'resized.webp'),
+            media(13, 'scaled.png'),
+            media(14, 'attached.webp', post=99),
+            media(15, 'fresh.webp', date_gmt=NEW),
+            media(16, 'orphan.webp'),
+            media(17, 'orphan-300x200.webp'),
+        ],
+    )
+
+
+def test_only_unreferenced_old_unattached_media_are_orphans(client):
+    assert [item['id'] for item in find_orphans(client, min_age_hours=24)] == [16, 17]
+
+
+def test_min_age_zero_includes_fresh_uploads(client):
+    assert [item['id'] for item in find_orphans(client, min_age_hours=0)] == [15, 16, 17]
+
+
+def test_dry_run_deletes_nothing(client, capsys):
+    assert gc_media(client, dry_run=True) == {'orphans': 2, 'deleted': 0, 'failed': 0}
+    assert client.deleted == []
+    assert 'orphan 16' in capsys.readouterr().out
+
+
+def test_gc_deletes_the_orphans(client):
+    assert gc_media(client, dry_run=False, workers=2) == {'orphans': 2, 'deleted': 2, 'failed': 0}
+    assert sorted(client.deleted) == [16, 17]
+
+
+def test_rendered_content_is_used_when_raw_is_missing():
+    client = FakeClient(posts=[{'id': 1, 'content': {'rendered': '<img class="wp-image-10">'}}],
+                        library=[media(10, 'a.webp')])
+    assert list(find_orphans(client)) == []
+
+
+def test_protected_post_without_raw_content_fails_the_scan():
+    client = FakeClient(posts=[{'id': 1, 'content': {'rendered': '', 'protected': True}}],
+                        library=[media(10, 'a.webp')])
+    with pytest.raises(MediaGCError):
+        gc_media(client, dry_run=False)
+    assert client.deleted == []
+
+
+def test_incomplete_reference_scan_deletes_nothing(client):
+    client.fail = '/pages'
+    with pytest.raises(MediaGCError):
+        gc_media(client, dry_run=False)
+    assert client.deleted == []
@@ -0,0 +1,57 @@
+import pytest
+
+from kackle.repair import coerce, parse_lenient, repair
+
+TOPICS_SCHEMA = {
+    'type': 'array',
+    'items': {
+        'type': 'object',
+        'properties': {
+            'topic': {'type': 'string'},
+            'tags': {'type': 'array', 'items': {'type': 'string'}},
+            'score': {'type': 'integer'},
+            'draft': {'type': 'boolean'},
+        },
+        'additionalProperties': False,
+    },
+}
+
+
+@pytest.mark.parametrize('text', [
+    '```json\n[{"topic": "a"}]\n```',
+    'Sure! Here you go:\n[{"topic": "a"}]\nLet me know if you need more.',
+    '[{"topic": "a"},]',
+    '[{“topic”: “a”}]',
+])
+def test_parse_lenient_recovers_common_slips(text):
+    assert parse_lenient(text) == [{'topic': 'a'}]
+
+
+def test_parse_lenient_gives_up_on_garbage():
+    assert parse_lenient('no json here') is None
+    assert repair('[{"topic": "a"', TOPICS_SCHEMA) == (None, False)
+
+
+def test_valid_document_is_unchanged():
+    assert repair('[{"topic": "a"}]', TOPICS_SCHEMA) == ([{'topic': 'a'}], False)
+
+
+def test_envelope_is_unwrapped():
+    data, changed = repair('{"topics": [{"topic": "a"}]}', TOPICS_SCHEMA)
+    assert data == [{'topic': 'a'}]
+    assert changed
+
+
+def test_single_object_becomes_a_one_item_array():
+    assert repair('{"topic": "a"}', TOPICS_SCHEMA) == ([{'topic': 'a'}], True)
+
+
+def test_coerce_fixes_types_and_drops_extra_fields():
+    item = {'topic': 42, 'tags': 'a, b,', 'score': '3', 'draft': 'False', 'extra': 1}
+    assert coerce(item, TOPICS_SCHEMA['items']) == {
+        'topic': '42', 'tags': ['a', 'b'], 'score': 3, 'draft': False}
+
+
+def test_coerce_leaves_values_it_cannot_fix():
+    item = {'score': 'many', 'draft': 'maybe', 'tags': None}
+    assert coerce(item, TOPICS_SCHEMA['items']) == item
@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+from kackle.stream_json import IncrementalJSON, StreamAbort
+
+
+def feed_all(parser, text, size=3):
+    """Feed text in fixed-size chunks and return every completed value"""
+    results = []
+    for start in range(0, len(text), size):
+        results.extend(parser.feed(text[start:start + size]))
+    return results
+
+
+ITEMS = [
+    {'topic': 'Brackets ] and } in "strings"', 'tags': ['a', 'b']},
+    {'topic': 'Escapes \\ and \\" quotes', 'nested': {'list': [1, [2, 3]]}},
+    {'topic': 'Unicode déjà vu', 'count': 3},
+]
+
+
+@pytest.mark.parametrize('size', [1, 2, 7, 1000])
+def test_array_items_survive_any_chunking(size):
+    parser = IncrementalJSON('array', item_type='object')
+    assert feed_all(parser, json.dumps(ITEMS), size) == ITEMS
+    assert parser.finished
+    parser.close()
+
+
+def test_items_are_returned_as_soon_as_they_close():
+    parser = IncrementalJSON('array')
+    assert parser.feed('[{"a": 1}, {"b"') == [{'a': 1}]
+    assert parser.feed(': 2}') == [{'b': 2}]
+    assert not parser.finished
+    assert parser.feed(']') == []
+    assert parser.finished
+
+
+def test_scalar_items_wait_for_their_separator():
+    parser = IncrementalJSON('array')
+    assert parser.feed('[12') == []
+    assert parser.feed('3, "x"') == [123]
+    assert parser.feed(', true]') == ['x', True]
+
+
+def test_markdown_fence_before_the_root_is_skipped():
+    parser = IncrementalJSON('array')
+    assert feed_all(parser, '```json\n[{"a": 1}]\n```') == [{'a': 1}]
+    assert parser.finished
+
+
+def test_wrapper_key_unwraps_the_envelope():
+    parser = IncrementalJSON('array', wrapper_key='items')
+    assert feed_all(parser, '{ "items" : [{"a": 1}, {"a": 2}]}', size=2) == [{'a': 1}, {'a': 2}]
+
+
+def test_unexpected_envelope_aborts():
+    parser = IncrementalJSON('array', wrapper_key='items')
+    with pytest.raises(StreamAbort):
+        feed_all(parser, '{"topics": [{"a": 1}]}')
+
+
+@pytest.mark.parametrize('text', ['Here are the topics: [', '{"a": 1}', '[1, 2]'])
+def test_wrong_root_or_prose_aborts(text):
+    parser = IncrementalJSON('array', item_type='object')
+    with pytest.raises(StreamAbort):
+        feed_all(parser, text)
+
+
+def test_key_check_rejects_unexpected_fields_early():
+    parser = IncrementalJSON('array', key_check={'topic'}.__contains__)
+    assert parser.feed('[{"topic": "a"}, ') == [{'topic': 'a'}]
+    with pytest.raises(StreamAbort, match='extra'):
+        parser.feed('{"extra": ')
+
+
+def test_lenient_fixes_trailing_commas_and_smart_quotes():
+    text = '[{"a": 1,}, {"b": “x”}]'
+    with pytest.raises(StreamAbort):
+        feed_all(IncrementalJSON('array'), text)
+    assert feed_all(IncrementalJSON('array', lenient=True), text) == [{'a': 1}, {'b': 'x'}]
+
+
+def test_close_raises_on_a_truncated_document():
+    parser = IncrementalJSON('array')
+    assert parser.feed('[{"a": 1}, {"b": 2') == [{'a': 1}]
+    with pytest.raises(StreamAbort):
+        parser.close()
+
+
+def test_text_after_the_root_is_ignored():
+    parser = IncrementalJSON('array')
+    assert parser.feed('[1] trailing') == [1]
+    assert parser.finished
+    assert parser.feed('more') == []
+
+
+def test_object_mode_yields_fields_in_order():
+    parser = IncrementalJSON('object', key_check={'image_prompt', 'body'}.__contains__)
+    text = '{"image_prompt": "a {cat}", "body": {"sections": [1, 2]}}'
+    assert feed_all(parser, text) == [('image_prompt', 'a {cat}'), ('body', {'sections': [1, 2]})]
+    with pytest.raises(StreamAbort):
+        feed_all(IncrementalJSON('object', key_check={'body'}.__contains__), '{"other": 1}')